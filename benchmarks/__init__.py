@@ -0,0 +1,130 @@
+"""Declare the base benchmark class for the benchmarks suite.
+
+Each benchmark is timed in several rounds and its best time per call, the
+least disturbed by the other processes of the machine, is compared with
+the baseline stored for its name. A benchmark fails when it is slower than
+its baseline by more than the threshold, and is skipped when it has no
+baseline: the timings depend on the machine, so the baselines are stored
+locally and not versioned. The logging is disabled while timing, the I/O of
+its handlers making the runs hard to compare.
+
+Environment variables:
+    BENCHMARK_BASELINES: the baselines file. Defaults to benchmarks/baselines.json.
+    BENCHMARK_SAVE: set to 1 to store the measures as the new baselines.
+    BENCHMARK_THRESHOLD: the accepted slowdown ratio. Defaults to 0.25.
+"""
+
+import json
+import logging
+import os
+import random
+import timeit
+import unittest
+
+from faker import Faker
+
+CORPUS_SEED: int = 20240601
+DEFAULT_BASELINES_PATH: str = os.path.join(
+    os.path.dirname(__file__), "baselines.json"
+)
+DEFAULT_THRESHOLD: float = 0.25
+
+
+def password_corpus(size: int, min_length: int = 8, max_length: int = 41):
+    """Generate a reproducible corpus of passwords.
+
+    Args:
+        size (int): The number of passwords.
+        min_length (int, optional): The minimum length of a password. Defaults to 8.
+        max_length (int, optional): The maximum length (excluded) of a password. Defaults to 41.
+
+    Returns:
+        list: The passwords, the same for a same size.
+    """
+    Faker.seed(CORPUS_SEED)
+    fake = Faker()
+    rng = random.Random(CORPUS_SEED)  # nosec B311
+    return [
+        fake.password(
+            length=rng.randrange(min_length, max_length),
+            special_chars=rng.random() < 0.8,
+            digits=rng.random() < 0.8,
+            upper_case=rng.random() < 0.8,
+        )
+        for _ in range(size)
+    ]
+
+
+class BaseBenchmark(unittest.TestCase):
+    """Define the base benchmark class."""
+
+    rounds: int = 7
+
+    @classmethod
+    def setUpClass(cls):
+        """Load the baselines of the benchmarks."""
+        cls.baselines_path = os.environ.get(
+            "BENCHMARK_BASELINES", DEFAULT_BASELINES_PATH
+        )
+        cls.save = os.environ.get("BENCHMARK_SAVE", "0") == "1"
+        cls.threshold = float(
+            os.environ.get("BENCHMARK_THRESHOLD", DEFAULT_THRESHOLD)
+        )
+        cls.baselines = {}
+        if os.path.exists(cls.baselines_path):
+            with open(cls.baselines_path, encoding="utf-8") as f:
+                cls.baselines = json.load(f)
+        cls.measures = {}
+
+    @classmethod
+    def tearDownClass(cls):
+        """Store the measures as baselines when BENCHMARK_SAVE is set."""
+        if not cls.save or not cls.measures:
+            return
+        baselines = {}
+        if os.path.exists(cls.baselines_path):
+            with open(cls.baselines_path, encoding="utf-8") as f:
+                baselines = json.load(f)
+        baselines.update(cls.measures)
+        with open(cls.baselines_path, "w", encoding="utf-8") as f:
+            json.dump(baselines, f, indent=2, sort_keys=True)
+
+    def benchmark(self, name: str, function, number: int = None) -> float:
+        """Time a function and compare it with its baseline.
+
+        Args:
+            name (str): The unique name of the benchmark.
+            function (function): The function to time, called without arguments.
+            number (int, optional): The number of calls per round. Defaults to a number of calls lasting at least 0.2 second.
+
+        Returns:
+            float: The best time of a call, in seconds.
+        """
+        timer = timeit.Timer(function)
+        logging.disable(logging.CRITICAL)
+        try:
+            if number is None:
+                number = timer.autorange()[0]
+            best = (
+                min(timer.repeat(repeat=self.rounds, number=number)) / number
+            )
+        finally:
+            logging.disable(logging.NOTSET)
+        self.measures[name] = {"best": best}
+        print("\n{}: {:.3f}us per call".format(name, best * 1e6))
+
+        if self.save:
+            return best
+        baseline = self.baselines.get(name)
+        if baseline is None:
+            self.skipTest(
+                "The benchmark {} has no baseline in {}, store it with"
+                " BENCHMARK_SAVE=1".format(name, self.baselines_path)
+            )
+        self.assertLessEqual(
+            best,
+            baseline["best"] * (1 + self.threshold),
+            "The benchmark {} regressed: {:.3f}us for a baseline of"
+            " {:.3f}us".format(name, best * 1e6, baseline["best"] * 1e6),
+        )
+        return best
@@ -0,0 +1,467 @@
+"""Load test the web service end to end and report the latency per route.
+
+By default the application is started in-process, on a threaded local
+server, with local stand-ins for its services:
+
+- the database is a SQLite file in a temporary directory (or any database
+  given with --database-uri, ex: a Postgres container),
+- the Celery tasks are published to the in-memory broker (or run eagerly
+  with --celery-eager),
+- the S3 server is a moto server (or any MinIO given with --s3-host and
+  --s3-port).
+
+With --server gunicorn, the same application is served by gunicorn
+processes configured by gunicorn.conf.py (its GUNICORN_* environment
+variables select the worker class, workers, threads...) instead.
+
+With --url, an already running instance (ex: the docker image) is targeted
+instead; the API keys to use are then created through /login.
+
+Usage:
+    python -m benchmarks.load_test --concurrency 16 --requests 2000
+    GUNICORN_WORKER_CLASS=sync python -m benchmarks.load_test --server gunicorn
+    python -m benchmarks.load_test --routes score --url http://localhost:6019
+"""
+
+import argparse
+import atexit
+import http.client
+import json
+import logging
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit
+
+from benchmarks import password_corpus
+
+API_PREFIX: str = "/password-scoring/api/v1.0"
+ROUTES: tuple = ("login", "score", "bulk-scores", "s3-bulk-scores")
+PASSWORDS_PER_FILE: int = 100
+
+LOAD_TEST_CONFIG: str = "LOAD_TEST_CONFIG"
+SERVER_WERKZEUG: str = "werkzeug"
+SERVER_GUNICORN: str = "gunicorn"
+
+SCORING_POLICY: dict = {
+    "characteristics": {
+        "has_digits": True,
+        "has_lowercase": True,
+        "has_spaces": False,
+        "has_symbols": True,
+        "has_uppercase": True,
+        "max_length": 40,
+        "min_length": 10,
+    },
+    "min_accepted_score": 62,
+}
+
+
+def create_load_test_app():
+    """Create the application of the gunicorn workers of a load test.
+
+    Returns:
+        Flask: The application configured by the LOAD_TEST_CONFIG file.
+    """
+    from core import create_app
+
+    with open(os.environ[LOAD_TEST_CONFIG]) as config_file:
+        config = json.load(config_file)
+    app = create_app(config)
+    app.extensions["celery"].conf.task_always_eager = config.get(
+        "CELERY_EAGER", False
+    )
+    return app
+
+
+def start_gunicorn(config: dict, directory: str) -> str:
+    """Serve the application with gunicorn, configured by gunicorn.conf.py.
+
+    Args:
+        config (dict): The configuration of the application.
+        directory (str): A temporary directory for the configuration file.
+
+    Returns:
+        str: The base url of the application.
+    """
+    config_path = os.path.join(directory, "load-test-config.json")
+    with open(config_path, "w") as config_file:
+        json.dump(config, config_file)
+    with socket.socket() as probe:
+        probe.bind(("127.0.0.1", 0))
+        port = probe.getsockname()[1]
+
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    log_file = open(os.path.join(directory, "gunicorn.log"), "wb")
+    server = subprocess.Popen(  # nosec B603
+        [
+            sys.executable,
+            "-m",
+            "gunicorn",
+            "--config",
+            os.path.join(root, "gunicorn.conf.py"),
+            "--bind",
+            "127.0.0.1:{}".format(port),
+            "benchmarks.load_test:create_load_test_app()",
+        ],
+        cwd=root,
+        env={**os.environ, LOAD_TEST_CONFIG: config_path},
+        stdout=log_file,
+        stderr=subprocess.STDOUT,
+    )
+    atexit.register(server.terminate)
+
+    deadline = time.monotonic() + 60
+    while time.monotonic() < deadline:
+        try:
+            Client("http://127.0.0.1:{}".format(port)).request(
+                "GET", API_PREFIX, None, {}
+            )
+            return "http://127.0.0.1:{}".format(port)
+        except OSError:
+            time.sleep(0.2)
+    raise RuntimeError("gunicorn did not start.")
+
+
+def start_local_app(args, directory: str) -> tuple:
+    """Start the application in-process with its local stand-ins.
+
+    Args:
+        args (argparse.Namespace): The options of the load test.
+        directory (str): A temporary directory for the database and the uploads.
+
+    Returns:
+        tuple: The flask application and its base url.
+    """
+    from werkzeug.serving import make_server
+
+    from core import create_app, db
+    from tests import BaseTestClass
+
+    s3_host, s3_port = args.s3_host, args.s3_port
+    if not s3_host:
+        from moto.server import ThreadedMotoServer
+
+        moto_server = ThreadedMotoServer(ip_address="127.0.0.1", port=0)
+        moto_server.start()
+        s3_host, s3_port = moto_server.get_host_and_port()
+
+    config = BaseTestClass._setup_test_env()
+    config["APP_ENV"] = config["APP_ENV_PRODUCTION"]
+    config["DEBUG"] = False
+    config["TESTING"] = False
+    config["API_MAX_USAGE_LIMIT"] = str(2**62)
+    config["UPLOAD_FILES_FOLDER"] = os.path.join(directory, "uploads")
+    config["LOG_PATH"] = directory
+    config["S3_MINIO_HOST"] = s3_host
+    config["S3_MINIO_API_PORT"] = str(s3_port)
+    config["CELERY_URL_BROKER"] = "memory://"
+    config["CELERY_URL_RESULT"] = "cache+memory://"
+    config["SQLALCHEMY_DATABASE_URI"] = args.database_uri or (
+        "sqlite:///{}".format(os.path.join(directory, "load-test.db"))
+    )
+    config.update(dict(option.split("=", 1) for option in args.config))
+
+    app = create_app(config)
+    app.extensions["celery"].conf.task_always_eager = args.celery_eager
+    with app.app_context():
+        db.create_all()
+
+    if args.server == SERVER_GUNICORN:
+        # The API keys are created by this app in the same database.
+        return app, start_gunicorn(
+            {**config, "CELERY_EAGER": args.celery_eager}, directory
+        )
+    server = make_server("127.0.0.1", 0, app, threaded=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return app, "http://127.0.0.1:{}".format(server.server_port)
+
+
+class Client:
+    """Declare a keep-alive HTTP client, one per load test thread."""
+
+    def __init__(self, base_url: str) -> None:
+        """Instanciate a client of the application.
+
+        Args:
+            base_url (str): The base url of the application.
+        """
+        url = urlsplit(base_url)
+        self.host = url.hostname
+        self.port = url.port or 80
+        self.connection = None
+
+    def request(self, method: str, path: str, body: bytes, headers: dict):
+        """Send a request and read its response.
+
+        Args:
+            method (str): The HTTP method.
+            path (str): The path of the route.
+            body (bytes): The body of the request.
+            headers (dict): The headers of the request.
+
+        Returns:
+            tuple: The status code and the body of the response.
+        """
+        if self.connection is None:
+            self.connection = http.client.HTTPConnection(
+                self.host, self.port, timeout=60
+            )
+        try:
+            self.connection.request(method, path, body, headers)
+            response = self.connection.getresponse()
+            return response.status, response.read()
+        except (http.client.HTTPException, OSError):
+            self.connection.close()
+            self.connection = None
+            raise
+
+
+def json_request(path: str, payload: dict) -> tuple:
+    return (
+        "POST",
+        path,
+        json.dumps(payload).encode("utf-8"),
+        {"Content-Type": "application/json"},
+    )
+
+
+def file_request(path: str, passwords: list) -> tuple:
+    boundary = uuid.uuid4().hex
+    body = b"".join(
+        [
+            "--{}\r\n".format(boundary).encode("utf-8"),
+            (
+                b'Content-Disposition: form-data; name="file";'
+                b' filename="passwords.txt"\r\n'
+            ),
+            b"Content-Type: text/plain\r\n\r\n",
+            "\n".join(passwords).encode("utf-8"),
+            "\r\n--{}--\r\n".format(boundary).encode("utf-8"),
+        ]
+    )
+    return (
+        "POST",
+        path,
+        body,
+        {"Content-Type": "multipart/form-data; boundary={}".format(boundary)},
+    )
+
+
+def build_requests(
+    route: str, count: int, api_keys: list, passwords: list, domain: str
+):
+    """Build the requests of a route.
+
+    Args:
+        route (str): The route to load.
+        count (int): The number of requests.
+        api_keys (list): The API keys to spread the scoring requests on.
+        passwords (list): The corpus of passwords.
+        domain (str): The domain of the emails of the new users, it must be deliverable.
+
+    Returns:
+        list: The (method, path, body, headers) of the requests.
+    """
+    requests = []
+    for i in range(count):
+        if route == "login":
+            requests.append(
+                json_request(
+                    API_PREFIX + "/login",
+                    {"email": "load-{}@{}".format(uuid.uuid4().hex, domain)},
+                )
+            )
+        elif route == "score":
+            requests.append(
+                json_request(
+                    API_PREFIX + "/score",
+                    {
+                        "api_key": api_keys[i % len(api_keys)],
+                        "password": passwords[i % len(passwords)],
+                        **SCORING_POLICY,
+                    },
+                )
+            )
+        else:
+            start = (i * PASSWORDS_PER_FILE) % len(passwords)
+            requests.append(
+                file_request(
+                    "/".join([API_PREFIX, route]),
+                    passwords[start : start + PASSWORDS_PER_FILE],
+                )
+            )
+    return requests
+
+
+def run_route(base_url: str, requests: list, concurrency: int) -> dict:
+    """Send the requests of a route with concurrent clients.
+
+    Args:
+        base_url (str): The base url of the application.
+        requests (list): The requests to send.
+        concurrency (int): The number of concurrent clients.
+
+    Returns:
+        dict: The latency percentiles, the throughput and the errors.
+    """
+    local = threading.local()
+    latencies = []
+    errors = []
+
+    def send(request):
+        if not hasattr(local, "client"):
+            local.client = Client(base_url)
+        start = time.perf_counter()
+        try:
+            status, _ = local.client.request(*request)
+        except (http.client.HTTPException, OSError):
+            status = None
+        latencies.append(time.perf_counter() - start)
+        if status is None or status >= 400:
+            errors.append(status)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        list(executor.map(send, requests))
+    duration = time.perf_counter() - start
+
+    quantiles = statistics.quantiles(latencies, n=100, method="inclusive")
+    return {
+        "requests": len(requests),
+        "errors": len(errors),
+        "throughput": len(requests) / duration,
+        "p50": quantiles[49] * 1000,
+        "p95": quantiles[94] * 1000,
+        "p99": quantiles[98] * 1000,
+    }
+
+
+def create_api_keys(base_url: str, count: int, domain: str) -> list:
+    client = Client(base_url)
+    api_keys = []
+    for _ in range(count):
+        status, body = client.request(
+            *json_request(
+                API_PREFIX + "/login",
+                {"email": "load-{}@{}".format(uuid.uuid4().hex, domain)},
+            )
+        )
+        if status == 200 and json.loads(body).get("api_key"):
+            api_keys.append(json.loads(body)["api_key"])
+    return api_keys
+
+
+def create_local_api_keys(count: int) -> list:
+    from flask import current_app
+
+    from tests import BaseTestClass
+
+    return [
+        BaseTestClass.create_user(
+            "load-{}@load-test.local".format(uuid.uuid4().hex),
+            current_app.config["SECRET_KEY"],
+        ).token
+        for _ in range(count)
+    ]
+
+
+def main():
+    """Run the load test and print its report."""
+    parser = argparse.ArgumentParser(
+        description="Load test the password scoring web service."
+    )
+    parser.add_argument("--url", help="Target a running application.")
+    parser.add_argument("--routes", default=",".join(ROUTES))
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument(
+        "--requests", type=int, default=500, help="Requests per route."
+    )
+    parser.add_argument("--api-keys", type=int, default=8)
+    parser.add_argument(
+        "--email-domain",
+        default="gmail.com",
+        help="The domain of the /login emails, checked through the DNS.",
+    )
+    parser.add_argument(
+        "--server",
+        choices=(SERVER_WERKZEUG, SERVER_GUNICORN),
+        default=SERVER_WERKZEUG,
+        help="The server of the in-process application.",
+    )
+    parser.add_argument("--database-uri")
+    parser.add_argument("--celery-eager", action="store_true")
+    parser.add_argument("--s3-host", help="Use this S3 server, not moto.")
+    parser.add_argument("--s3-port", default="9500")
+    parser.add_argument(
+        "--config",
+        action="append",
+        default=[],
+        metavar="KEY=VALUE",
+        help="Override a configuration key of the in-process application.",
+    )
+    parser.add_argument("--json", action="store_true", help="JSON report.")
+    args = parser.parse_args()
+
+    # The access logs of werkzeug (local server and moto) are not measured.
+    logging.getLogger("werkzeug").setLevel(logging.ERROR)
+    routes = [route for route in args.routes.split(",") if route]
+    passwords = password_corpus(max(args.requests, PASSWORDS_PER_FILE))
+
+    with tempfile.TemporaryDirectory() as directory:
+        if args.url:
+            base_url = args.url.rstrip("/")
+            api_keys = create_api_keys(
+                base_url, args.api_keys, args.email_domain
+            )
+        else:
+            app, base_url = start_local_app(args, directory)
+            with app.app_context():
+                api_keys = create_local_api_keys(args.api_keys)
+        if "score" in routes and not api_keys:
+            parser.error("No API key could be created through /login.")
+
+        report = {}
+        for route in routes:
+            report[route] = run_route(
+                base_url,
+                build_requests(
+                    route,
+                    args.requests,
+                    api_keys,
+                    passwords,
+                    args.email_domain,
+                ),
+                args.concurrency,
+            )
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return
+    print(
+        "{:<16}{:>10}{:>8}{:>12}{:>10}{:>10}{:>10}".format(
+            "route",
+            "requests",
+            "errors",
+            "req/s",
+            "p50 ms",
+            "p95 ms",
+            "p99 ms",
+        )
+    )
+    for route, measures in report.items():
+        print(
+            "{:<16}{requests:>10}{errors:>8}{throughput:>12.1f}"
+            "{p50:>10.2f}{p95:>10.2f}{p99:>10.2f}".format(route, **measures)
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+import statistics
+import threading
+import time
+
+from core import db
+from tests import BaseTestClass
+
+from . import BaseBenchmark
+
+CONCURRENT_THREADS = 16
+ACQUISITIONS_PER_THREAD = 200
+
+
+class TestDbPoolBenchmark(BaseBenchmark, BaseTestClass):
+    def test_connection_acquire(self):
+        with self.app.app_context():
+            engine = db.engine
+
+            def acquire():
+                engine.connect().close()
+
+            self.benchmark("db_connection_acquire", acquire)
+
+    def test_connection_acquire_under_load(self):
+        """Acquire the connections of the pool with more threads than connections."""
+        with self.app.app_context():
+            engine = db.engine
+            latencies = []
+            lock = threading.Lock()
+            barrier = threading.Barrier(CONCURRENT_THREADS)
+
+            def acquire():
+                measures = []
+                barrier.wait()
+                for _ in range(ACQUISITIONS_PER_THREAD):
+                    start = time.perf_counter()
+                    with engine.connect() as connection:
+                        measures.append(time.perf_counter() - start)
+                        connection.exec_driver_sql("SELECT 1")
+                with lock:
+                    latencies.extend(measures)
+
+            threads = [
+                threading.Thread(target=acquire)
+                for _ in range(CONCURRENT_THREADS)
+            ]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+
+        quantiles = statistics.quantiles(latencies, n=100)
+        print(
+            "\ndb_connection_acquire_under_load ({} threads, {}): p50"
+            " {:.1f}us, p99 {:.1f}us, max {:.1f}us".format(
+                CONCURRENT_THREADS,
+                engine.pool.status(),
+                quantiles[49] * 1e6,
+                quantiles[98] * 1e6,
+                max(latencies) * 1e6,
+            )
+        )
+        self.assertEqual(
+            CONCURRENT_THREADS * ACQUISITIONS_PER_THREAD, len(latencies)
+        )
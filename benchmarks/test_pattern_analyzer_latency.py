@@ -0,0 +1,59 @@
+import gc
+import random
+import time
+from unittest import TestCase
+
+from faker import Faker
+
+from password_scoring.pattern_analyzer import analyze_password
+
+CORPUS_SEED = 20240601
+CORPUS_SIZE = 5000
+LATENCY_BUDGET_P99_SECONDS = 0.001
+
+PREDICTABLE_PASSWORDS = [
+    "Password1234!",
+    "P@ssw0rd2024!!",
+    "qwertyuiop123456",
+    "azertyuiop&é\"'(",
+    "Soleil01/02/1990",
+    "abcabcabcabcabcabcabcabcabcabcabcabcabca",
+    "1111111111111111111111111111111111111111",
+    "01/02/1990-12/12/2012_2020202020202020",
+]
+
+
+class TestPatternAnalyzerLatency(TestCase):
+    def setUp(self):
+        Faker.seed(CORPUS_SEED)
+        fake = Faker()
+        rng = random.Random(CORPUS_SEED)  # nosec B311
+        self.corpus = [
+            fake.password(length=rng.randrange(8, 41))
+            for _ in range(CORPUS_SIZE)
+        ]
+        self.corpus += PREDICTABLE_PASSWORDS * (CORPUS_SIZE // 100)
+        analyze_password("warm up the dictionary and keyboard graphs")
+
+    def test_p99_latency_is_under_budget(self):
+        durations = []
+        gc.disable()
+        try:
+            for password in self.corpus:
+                start = time.perf_counter()
+                analyze_password(password)
+                durations.append(time.perf_counter() - start)
+        finally:
+            gc.enable()
+        durations.sort()
+        p50 = durations[len(durations) // 2]
+        p99 = durations[int(len(durations) * 0.99)]
+        print(
+            "\npattern analyzer: p50 {:.1f}us, p99 {:.1f}us over {}"
+            " passwords".format(p50 * 1e6, p99 * 1e6, len(durations))
+        )
+        self.assertLess(
+            p99,
+            LATENCY_BUDGET_P99_SECONDS,
+            "The p99 latency of the pattern analysis is over budget!",
+        )
@@ -0,0 +1,68 @@
+import itertools
+
+import msgpack
+
+from core.api import ROUTE_PASSWORD_SCORING
+from core.service.payload_validator import decode_scoring_policy
+from core.wire_format import MIMETYPE_MSGPACK
+from password_scoring import encode_policy_id
+from tests import BaseTestClass
+
+from . import BaseBenchmark, password_corpus
+
+CORPUS_SIZE = 200
+
+
+class TestScoreEndpointBenchmark(BaseBenchmark, BaseTestClass):
+    def setUp(self):
+        super().setUp()
+        self.app.config["API_MAX_USAGE_LIMIT"] = str(2**62)
+        with self.app.app_context():
+            api_key = BaseTestClass.get_user().token
+        self.payloads = itertools.cycle(
+            [
+                {
+                    "api_key": api_key,
+                    "password": password,
+                    **self.characteristics,
+                }
+                for password in password_corpus(CORPUS_SIZE)
+            ]
+        )
+        policy_id = encode_policy_id(
+            decode_scoring_policy(self.characteristics)
+        )
+        self.msgpack_payloads = itertools.cycle(
+            [
+                msgpack.packb(
+                    {
+                        "api_key": api_key,
+                        "password": password,
+                        "policy_id": policy_id,
+                    }
+                )
+                for password in password_corpus(CORPUS_SIZE)
+            ]
+        )
+
+    def test_score_request(self):
+        def score_request():
+            response = self.client.post(
+                ROUTE_PASSWORD_SCORING, json=next(self.payloads)
+            )
+            assert response.status_code == 200  # nosec B101
+
+        with self.app.app_context():
+            self.benchmark("score_request", score_request)
+
+    def test_score_request_msgpack(self):
+        def score_request():
+            response = self.client.post(
+                ROUTE_PASSWORD_SCORING,
+                data=next(self.msgpack_payloads),
+                content_type=MIMETYPE_MSGPACK,
+            )
+            assert response.status_code == 200  # nosec B101
+
+        with self.app.app_context():
+            self.benchmark("score_request_msgpack", score_request)
@@ -0,0 +1,81 @@
+from core.service.payload_validator import (
+    PAYLOAD_TYPE_SCORING,
+    is_valid_payload,
+)
+from password_scoring import ColorScore, PasswordConfig
+
+from . import BaseBenchmark, password_corpus
+
+CORPUS_SIZE = 1000
+
+
+class TestScoringHotPathBenchmark(BaseBenchmark):
+    def setUp(self):
+        self.passwords = password_corpus(CORPUS_SIZE)
+        self.characteristics = {
+            "has_digits": True,
+            "has_lowercase": True,
+            "has_spaces": False,
+            "has_symbols": True,
+            "has_uppercase": True,
+            "max_length": 40,
+            "min_length": 10,
+        }
+        self.payloads = [
+            {
+                "api_key": "benchmark",
+                "password": password,
+                "characteristics": self.characteristics,
+                "min_accepted_score": 62,
+            }
+            for password in self.passwords
+        ]
+        self.password_config = PasswordConfig()
+
+    def test_password_config_construction(self):
+        self.benchmark("password_config_construction", PasswordConfig)
+
+    def test_validate_password(self):
+        validate_password = self.password_config.validate_password
+
+        def validate_corpus():
+            for password in self.passwords:
+                validate_password(password)
+
+        self.benchmark(
+            "validate_password_x{}".format(CORPUS_SIZE), validate_corpus
+        )
+
+    def test_validate_password_with_pattern_analysis(self):
+        validate_password = PasswordConfig(
+            analyze_patterns=True
+        ).validate_password
+
+        def validate_corpus():
+            for password in self.passwords:
+                validate_password(password)
+
+        self.benchmark(
+            "validate_password_with_patterns_x{}".format(CORPUS_SIZE),
+            validate_corpus,
+        )
+
+    def test_get_color_from_score(self):
+        scores = [i / 10 for i in range(0, 2000, 2)]
+
+        def color_scores():
+            for score in scores:
+                ColorScore.get_color_from_score(score)
+
+        self.benchmark(
+            "get_color_from_score_x{}".format(len(scores)), color_scores
+        )
+
+    def test_is_valid_payload(self):
+        def validate_payloads():
+            for payload in self.payloads:
+                is_valid_payload(PAYLOAD_TYPE_SCORING, payload)
+
+        self.benchmark(
+            "is_valid_payload_x{}".format(CORPUS_SIZE), validate_payloads
+        )
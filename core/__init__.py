@@ -14,6 +14,18 @@ from flask_wtf.csrf import CSRFProtect
 
 from core.celery_init import celery_init_app
 from core.configuration.env.env_config import load_env_variables
+from core.database import engine_options_init_app, replica_init_app
+from core.json_provider import FastJSONProvider
+from core.logging_handlers import (
+    LOG_FORMAT_JSON,
+    JsonFormatter,
+    start_queue_logging,
+)
+from core.profiling import profiling_init_app
+from core.service.API_key_generator import api_key_verifier_init_app
+from core.service.policy_registry import policy_registry_init_app
+from core.service.score_cache import score_cache_init_app
+from core.service.score_coalescer import score_coalescer_init_app
 from core.swagger.swagger_config import SWAGGER_URL, swaggerui_blueprint
 
 login_manager = LoginManager()
@@ -33,13 +45,21 @@ def register_blueprints(app):
     """
     # Register the blueprints
     from .api import api_bp
+    from .metrics import metrics_bp
 
     app.register_blueprint(api_bp)
+    app.register_blueprint(metrics_bp)
     app.register_blueprint(swaggerui_blueprint, url_prefix=SWAGGER_URL)
 
 
-def logging_formatter():
-    """Define the logger formatter for the output."""
+def logging_formatter(log_format: str = LOG_FORMAT_JSON):
+    """Define the logger formatter for the output.
+
+    Args:
+        log_format (str, optional): json or text. Defaults to json.
+    """
+    if log_format == LOG_FORMAT_JSON:
+        return JsonFormatter()
     return logging.Formatter(
         "[%(asctime)s.%(msecs)d]\t %(levelname)s"
         " \t[%(name)s.%(funcName)s:%(lineno)d]\t %(message)s",
@@ -48,12 +68,16 @@ def logging_formatter():
 
 
 def configure_logging(app):
-    """Configure the loggers for the application."""
+    """Configure the loggers for the application.
+
+    The loggers only enqueue their records, the handlers run in a listener thread.
+    """
     LOG_LEVEL_DEBUG = logging.DEBUG
     LOG_LEVEL_INFO = logging.INFO
     LOG_LEVEL = None
     LOG_MAX_BYTES = 1048576 * 1.5
     LOG_BACKUP_COUNT = 9
+    LOG_FORMAT = app.config.get("LOG_FORMAT", LOG_FORMAT_JSON)
 
     # erase all existing loggers
     del app.logger.handlers[:]
@@ -70,7 +94,7 @@ def configure_logging(app):
     # -----------------  STD OUT handler --------------------------------
     console_handler = logging.StreamHandler(stream=sys.stdout)
     console_handler.setLevel(LOG_LEVEL_DEBUG)
-    console_handler.setFormatter(logging_formatter())
+    console_handler.setFormatter(logging_formatter(LOG_FORMAT))
 
     # -----------------  File handler -----------------------------------
     # Add file rotating handler, with level DEBUG
@@ -84,7 +108,7 @@ def configure_logging(app):
             backupCount=LOG_BACKUP_COUNT,
         )
         file_rotating_handler.setLevel(LOG_LEVEL_DEBUG)
-        file_rotating_handler.setFormatter(logging_formatter())
+        file_rotating_handler.setFormatter(logging_formatter(LOG_FORMAT))
 
     # print(app.config)
     if app.config["APP_ENV"] in (
@@ -106,10 +130,10 @@ def configure_logging(app):
         file_rotating_handler.setLevel(LOG_LEVEL)
         handlers.append(file_rotating_handler)
 
-    # Bind each handlers to each loggers
+    # Bind the queue of the handlers to each loggers
+    queue_handler = start_queue_logging(app, handlers)
     for l in loggers:
-        for handler in handlers:
-            l.addHandler(handler)
+        l.addHandler(queue_handler)
         l.propagate = False
         l.setLevel(LOG_LEVEL)
 
@@ -142,14 +166,23 @@ def create_app(test_config: dict = None) -> Flask:
 
     login_manager.init_app(app)
 
+    engine_options_init_app(app)
     db.init_app(app)
+    replica_init_app(app)
     migrate.init_app(app, db)
     csrf.init_app(app)
     celery_init_app(app)
+    api_key_verifier_init_app(app)
+    score_cache_init_app(app)
+    score_coalescer_init_app(app)
+    policy_registry_init_app(app)
+    profiling_init_app(app)
 
     from core.api import ROUTE_INIT_SESSION_TOKEN
+    from core.cli import usage_counters_cli
 
     csrf.exempt(ROUTE_INIT_SESSION_TOKEN)
+    app.cli.add_command(usage_counters_cli)
 
     CORS(
         app,
@@ -174,6 +207,6 @@ def create_app(test_config: dict = None) -> Flask:
 
     register_blueprints(app)
 
-    app.json.compact = False
+    app.json = FastJSONProvider(app)
 
     return app
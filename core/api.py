@@ -2,31 +2,70 @@
 
 import logging
 import os
-from functools import wraps
-
-from flask import Blueprint, current_app, jsonify, render_template, request
+import re
+import time
+from functools import lru_cache, partial, wraps
+
+from flask import (
+    Blueprint,
+    Response,
+    current_app,
+    jsonify,
+    render_template,
+    request,
+    stream_with_context,
+)
 from flask_login import current_user, login_user
 from flask_wtf.csrf import generate_csrf
+from werkzeug.exceptions import RequestEntityTooLarge
 from werkzeug.utils import secure_filename
+from werkzeug.wsgi import get_input_stream
 
-from core import csrf, login_manager
+from core import csrf, login_manager, metrics
 from core.auth import (
     login_with_api_key_in_payload,
     login_with_api_key_in_url_args,
     login_with_basic_auth_header,
     login_with_id,
 )
-from core.celery_tasks import multiple_password_scoring
+from core.celery_tasks import (
+    multiple_password_scoring,
+    s3_object_password_scoring,
+)
 from core.forms import UploadFileForm
-from core.models import User
+from core.models import NamedPolicy, User, verify_api_key
+from core.service.breach_index import get_breach_index
 from core.service.file_validator import expected_file
-from core.service.password_scoring import PasswordConfig
 from core.service.payload_validator import (
     PAYLOAD_TYPE_EMAIL,
-    PAYLOAD_TYPE_SCORING,
+    PayloadValidationError,
+    decode_batch_scoring_payload,
+    decode_scoring_payload,
+    decode_scoring_policy,
+    encode_policy_payload,
     is_valid_payload,
+    is_valid_policy_name,
+)
+from core.service.s3_uploads import (
+    UPLOAD_ID,
+    connect_s3_driver,
+    create_upload,
+    get_upload_max_size,
+    make_upload_object_name,
+)
+from core.service.score_cache import make_policy_id
+from core.service.score_stream import (
+    DEFAULT_BATCH_SIZE,
+    DEFAULT_MAX_LINE_LENGTH,
+    MIMETYPE_NDJSON,
+    MIMETYPE_TEXT,
+    NDJSON_MIMETYPES,
+    encode_lines,
+    iter_password_batches,
+    score_batch,
 )
-from core.service.s3_managers.S3_driver_interface import S3DriverInterface
+from core.wire_format import get_payload, make_payload_response
+from password_scoring import PasswordConfig, ScoringPolicy, encode_policy_id
 
 logger = logging.getLogger(__name__)
 
@@ -39,18 +78,118 @@ ROUTE_RESET_SESSION_TOKEN: str = "".join(
     [API_PREFIX, API_VERSION, "/reset-token"]
 )
 ROUTE_PASSWORD_SCORING: str = "".join([API_PREFIX, API_VERSION, "/score"])
+ROUTE_BATCH_PASSWORD_SCORING: str = "".join(
+    [API_PREFIX, API_VERSION, "/score/batch"]
+)
+ROUTE_STREAM_PASSWORD_SCORING: str = "".join(
+    [API_PREFIX, API_VERSION, "/score/stream"]
+)
+ROUTE_POLICY_ID: str = "".join([API_PREFIX, API_VERSION, "/policy-id"])
+ROUTE_POLICIES: str = "".join([API_PREFIX, API_VERSION, "/policies"])
+ROUTE_NAMED_POLICY: str = "".join(
+    [API_PREFIX, API_VERSION, "/policies/<name>"]
+)
 ROUTE_BULK_PASSWORD_SCORING: str = "".join(
     [API_PREFIX, API_VERSION, "/bulk-scores"]
 )
 ROUTE_S3_BULK_PASSWORD_SCORING: str = "".join(
     [API_PREFIX, API_VERSION, "/s3-bulk-scores"]
 )
+ROUTE_S3_UPLOADS: str = "".join([API_PREFIX, API_VERSION, "/s3-uploads"])
+ROUTE_S3_UPLOAD_COMPLETION: str = "".join(
+    [API_PREFIX, API_VERSION, "/s3-uploads/<upload_id>/complete"]
+)
+ROUTE_BREACH_RANGE: str = "".join([API_PREFIX, API_VERSION, "/range/<prefix>"])
 
 ROUTE_TEST_USE_API: str = "".join(
     [API_PREFIX, API_VERSION, "/test-count-use-api"]
 )
 
+BREACH_RANGE_PREFIX = re.compile(r"[0-9A-Fa-f]{5}")
+BREACH_RANGE_MAX_AGE: int = 86400
+
 api_bp = Blueprint("api_urls", __name__, template_folder="templates")
+api_bp.before_request(metrics.start_request_timer)
+api_bp.after_request(metrics.observe_request)
+
+
+# The breach index of the cached validators.
+_password_configs_index = None
+
+
+@lru_cache(maxsize=256)
+def _make_password_config(
+    policy: ScoringPolicy, breach_index=None
+) -> PasswordConfig:
+    return PasswordConfig(breach_index=breach_index, **policy.as_config())
+
+
+def get_password_config(
+    policy: ScoringPolicy, breach_index=None
+) -> PasswordConfig:
+    """Give the validator of a scoring policy, built once per process.
+
+    The validators are cached for the current breach index: when the index is rebuilt, the validators of the previous one are dropped, releasing its memory mapping.
+
+    Args:
+        policy (ScoringPolicy): The decoded scoring policy.
+        breach_index (BreachIndex, optional): The index of the breached passwords. Defaults to None.
+
+    Returns:
+        PasswordConfig: The validator of the policy.
+    """
+    global _password_configs_index
+    if (
+        breach_index is not None
+        and breach_index is not _password_configs_index
+    ):
+        _make_password_config.cache_clear()
+        _password_configs_index = breach_index
+    return _make_password_config(policy, breach_index)
+
+
+@lru_cache(maxsize=1024)
+def get_policy_id(policy: ScoringPolicy, breach_generation: str = None) -> str:
+    """Give the score cache id of a scoring policy, computed once per process.
+
+    Args:
+        policy (ScoringPolicy): The decoded scoring policy.
+        breach_generation (str, optional): The generation of the breach index. Defaults to None.
+
+    Returns:
+        str: The id of the policy.
+    """
+    return make_policy_id(policy.as_config(), breach_generation)
+
+
+def get_policy_resolver(api_key: str):
+    """Give the resolver of the named policies of an API key.
+
+    Args:
+        api_key (str): The API token key of the request.
+
+    Returns:
+        function: Give the cached ScoringPolicy of a policy name of the API key, None when it does not exist.
+    """
+    return partial(current_app.extensions["policy_registry"].get, api_key)
+
+
+def api_key_rejected_response(message: str, token: str):
+    """Give the response of a request of which the API key is rejected.
+
+    Args:
+        message (str): The reason of the rejection.
+        token (str): The API token key of the request.
+
+    Returns:
+        Response: The 401 response.
+    """
+    metrics.QUOTA_REJECTIONS.inc()
+    return make_payload_response(
+        {"status": False, "message": message, "api_key": token},
+        401,
+        {"API-TOKEN": token},
+    )
 
 
 def token_usage_reached(f):
@@ -65,36 +204,43 @@ def token_usage_reached(f):
 
     @wraps(f)
     def _decorated_function(*args, **kwargs):
-        data = request.get_json()
-        token = data.get("api_key", None)
-        if not data or not token:
-            return (
-                jsonify(
-                    {
-                        "status": False,
-                        "message": "The API key is missing!",
-                        "api_key": token,
-                    }
-                ),
-                401,
-                {"API-TOKEN": token},
+        with metrics.stage_timer(metrics.STAGE_AUTH):
+            data = get_payload()
+            token = (
+                data.get("api_key", None) if isinstance(data, dict) else None
             )
+        if not data or not token:
+            return api_key_rejected_response("The API key is missing!", token)
+
+        if not verify_api_key(token):
+            return api_key_rejected_response("The API key is invalid!", token)
 
-        if token and not User.has_reached_usage_limit(
-            token, int(current_app.config.get("API_MAX_USAGE_LIMIT"))
-        ):
-            return f(*args, **kwargs)
+        # A batch uses the API key once per password, an invalid one once.
+        passwords = data.get("passwords")
+        max_passwords = int(
+            current_app.config.get("SCORE_BATCH_MAX_SIZE", 1000)
+        )
+        uses = (
+            len(passwords)
+            if isinstance(passwords, list)
+            and 0 < len(passwords) <= max_passwords
+            else 1
+        )
+        with metrics.stage_timer(metrics.STAGE_QUOTA):
+            usage_limit_reached = User.has_reached_usage_limit(
+                token,
+                int(current_app.config.get("API_MAX_USAGE_LIMIT")),
+                uses,
+            )
+        if not usage_limit_reached:
+            response = current_app.make_response(f(*args, **kwargs))
+            if uses > 1 and response.status_code == 400:
+                # The rejected batch uses the API key once, not per password.
+                User.refund_usage(token, uses - 1)
+            return response
         else:
-            return (
-                jsonify(
-                    {
-                        "status": False,
-                        "message": "The API key limit is reached!",
-                        "api_key": token,
-                    }
-                ),
-                401,
-                {"API-TOKEN": token},
+            return api_key_rejected_response(
+                "The API key limit is reached!", token
             )
 
     return _decorated_function
@@ -152,13 +298,11 @@ def load_user_from_request(request) -> User | None:
 @api_bp.route(ROUTE_WELCOME + "/", methods=["GET"])
 def default():
     """Define a test endpoint to check the webservice status."""
-    logger.info(
-        "Call of welcome endpoint - headers {}".format(request.headers)
-    )
-    logger.info("user -> {}".format(current_user))
-    logger.info(
-        "current user authenticated ? {}".format(current_user.is_authenticated)
-    )
+    logger.info("Call of welcome endpoint")
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug(
+            "current user authenticated ? %s", current_user.is_authenticated
+        )
 
     return (
         jsonify(
@@ -181,40 +325,491 @@ def default():
 def score():
     """Define the endpoint to the scoring password API.
 
+       The payload is JSON or MessagePack, its policy is given by its characteristics or by a policy id.
+
     Returns:
         dict: The payload indicating the status and the score strength of the password.
     """
-    logger.info(request)
+    logger.info("Call score endpoint")
+    try:
+        data = get_payload()
+        with metrics.stage_timer(metrics.STAGE_VALIDATION):
+            try:
+                scoring_request = decode_scoring_payload(
+                    data, get_policy_resolver(data["api_key"])
+                )
+            except PayloadValidationError as e:
+                return make_payload_response(
+                    {
+                        "message": "The input data is invalid!",
+                        "error": "Bad request.",
+                        "errors": e.errors,
+                    },
+                    400,
+                )
+
+        with metrics.stage_timer(metrics.STAGE_POLICY):
+            policy = scoring_request.policy
+            breach_index = get_breach_index(
+                current_app.config.get("BREACH_INDEX_PATH", "")
+            )
+        password = scoring_request.password
+
+        score_cache = current_app.extensions.get("score_cache")
+        if score_cache is not None:
+            with metrics.stage_timer(metrics.STAGE_CACHE):
+                policy_id = get_policy_id(
+                    policy, breach_index.generation if breach_index else None
+                )
+                result = score_cache.get(policy_id, password)
+            if result is not None:
+                metrics.observe_score_cache(score_cache)
+                metrics.SCORE_RESULTS.labels(color=result["color"]).inc()
+                with metrics.stage_timer(metrics.STAGE_SERIALIZATION):
+                    return make_payload_response(result)
+
+        with metrics.stage_timer(metrics.STAGE_SCORING):
+            password_scoring = get_password_config(policy, breach_index)
+            score_coalescer = current_app.extensions.get("score_coalescer")
+            if score_coalescer is not None:
+                result = score_coalescer.validate_password(
+                    password_scoring, password
+                )
+            else:
+                result = password_scoring.validate_password(password)
+        if score_cache is not None:
+            score_cache.set(policy_id, password, result)
+            metrics.observe_score_cache(score_cache)
+        metrics.SCORE_RESULTS.labels(color=result["color"]).inc()
+        with metrics.stage_timer(metrics.STAGE_SERIALIZATION):
+            return make_payload_response(result)
+
+    except Exception as e:
+        logger.error("unknown exception here %s", e)
+        return make_payload_response(
+            {"message": "Something went wrong!", "error": str(e)}, 500
+        )
+
+
+@csrf.exempt
+@api_bp.route(ROUTE_BATCH_PASSWORD_SCORING, methods=["POST"])
+@token_usage_reached
+def batch_score():
+    """Define the endpoint to score a batch of passwords with the same policy.
+
+       The payload is JSON or MessagePack, its policy is given by its characteristics or by a policy id. Each password uses the API key once.
+
+    Returns:
+        dict: The payload with the results of the passwords, in the same order.
+    """
+    logger.info("Call batch score endpoint")
+    try:
+        data = get_payload()
+        try:
+            batch_request = decode_batch_scoring_payload(
+                data,
+                int(current_app.config.get("SCORE_BATCH_MAX_SIZE", 1000)),
+                get_policy_resolver(data["api_key"]),
+            )
+        except PayloadValidationError as e:
+            return make_payload_response(
+                {
+                    "message": "The input data is invalid!",
+                    "error": "Bad request.",
+                    "errors": e.errors,
+                },
+                400,
+            )
+
+        policy = batch_request.policy
+        breach_index = get_breach_index(
+            current_app.config.get("BREACH_INDEX_PATH", "")
+        )
+        password_scoring = get_password_config(policy, breach_index)
+        score_cache = current_app.extensions.get("score_cache")
+        if score_cache is not None:
+            policy_id = get_policy_id(
+                policy, breach_index.generation if breach_index else None
+            )
+
+        if score_cache is None:
+            results = password_scoring.validate_passwords(
+                batch_request.passwords
+            )
+        else:
+            results = []
+            for password in batch_request.passwords:
+                result = score_cache.get(policy_id, password)
+                if result is None:
+                    result = password_scoring.validate_password(password)
+                    score_cache.set(policy_id, password, result)
+                results.append(result)
+            metrics.observe_score_cache(score_cache)
+        for result in results:
+            metrics.SCORE_RESULTS.labels(color=result["color"]).inc()
+        return make_payload_response({"results": results})
+
+    except Exception as e:
+        logger.error("unknown exception here %s", e)
+        return make_payload_response(
+            {"message": "Something went wrong!", "error": str(e)}, 500
+        )
+
+
+def _stream_results(password_scoring, batch: list, batches, token: str):
+    dumps = current_app.json.dumps
+    usage_limit = int(current_app.config.get("API_MAX_USAGE_LIMIT"))
+    try:
+        while batch is not None:
+            results = score_batch(password_scoring, batch)
+            for result in results:
+                if "color" in result:
+                    metrics.SCORE_RESULTS.labels(color=result["color"]).inc()
+            yield encode_lines(results, dumps)
+
+            batch = next(batches, None)
+            if batch is not None and User.has_reached_usage_limit(
+                token, usage_limit, len(batch)
+            ):
+                metrics.QUOTA_REJECTIONS.inc()
+                yield encode_lines(
+                    [
+                        {
+                            "status": False,
+                            "message": "The API key limit is reached!",
+                            "api_key": token,
+                        }
+                    ],
+                    dumps,
+                )
+                return
+    except RequestEntityTooLarge:
+        yield encode_lines(
+            [
+                {
+                    "message": "The request body is too large!",
+                    "error": "Content too large.",
+                }
+            ],
+            dumps,
+        )
+    except Exception as e:
+        logger.error("unknown exception here %s", e)
+        yield encode_lines(
+            [{"message": "Something went wrong!", "error": str(e)}], dumps
+        )
+
+
+@csrf.exempt
+@api_bp.route(ROUTE_STREAM_PASSWORD_SCORING, methods=["POST"])
+def stream_score():
+    """Define the endpoint to score a stream of passwords with the same policy.
+
+       The body is read as it arrives, one password per line: raw passwords (text/plain) or JSON objects with a password (application/x-ndjson). The API key and the policy id are given in the url args. Each line is answered, in the same order, by a JSON line with its result and uses the API key once.
+
+    Returns:
+        Response: The streamed JSON lines of the results.
+    """
+    logger.info("Call stream score endpoint")
+    token = request.args.get("api_key")
+    if not token:
+        return api_key_rejected_response("The API key is missing!", token)
+    if not verify_api_key(token):
+        return api_key_rejected_response("The API key is invalid!", token)
+
+    payload = {"policy_id": request.args.get("policy_id")}
     try:
-        data = request.json
-        if not is_valid_payload(PAYLOAD_TYPE_SCORING, data):
-            return {
+        if payload["policy_id"] is None:
+            raise PayloadValidationError(["policy_id: is required"])
+        policy = decode_scoring_policy(payload, get_policy_resolver(token))
+    except PayloadValidationError as e:
+        return make_payload_response(
+            {
                 "message": "The input data is invalid!",
                 "error": "Bad request.",
-            }, 400
-
-        password_scoring = PasswordConfig(
-            has_digits=data.get("characteristics").get("has_digits"),
-            has_lowercase=data.get("characteristics").get("has_lowercase"),
-            has_spaces=data.get("characteristics").get("has_spaces"),
-            has_symbols=data.get("characteristics").get("has_symbols"),
-            has_uppercase=data.get("characteristics").get("has_uppercase"),
-            max_characters=data.get("characteristics").get("max_length"),
-            min_characters=data.get("characteristics").get("min_length"),
-            min_score=data.get("min_accepted_score"),
+                "errors": e.errors,
+            },
+            400,
         )
-        return (
-            jsonify(password_scoring.validate_password(data.get("password"))),
-            200,
+    if request.mimetype not in NDJSON_MIMETYPES | {MIMETYPE_TEXT}:
+        return make_payload_response(
+            {
+                "message": "The content type is not supported!",
+                "error": "Unsupported media type.",
+            },
+            415,
         )
 
-    except Exception as e:
-        logger.error("unknown exception here {}".format(e))
-        return (
-            jsonify({"message": "Something went wrong!", "error": str(e)}),
-            500,
+    # The body is not limited by MAX_CONTENT_LENGTH, it is never held whole.
+    max_content_length = int(
+        current_app.config.get("SCORE_STREAM_MAX_CONTENT_LENGTH") or 0
+    )
+    batches = iter_password_batches(
+        get_input_stream(
+            request.environ, max_content_length=max_content_length or None
+        ),
+        request.mimetype in NDJSON_MIMETYPES,
+        int(
+            current_app.config.get(
+                "SCORE_STREAM_BATCH_SIZE", DEFAULT_BATCH_SIZE
+            )
+        ),
+        int(
+            current_app.config.get(
+                "SCORE_STREAM_MAX_LINE_LENGTH", DEFAULT_MAX_LINE_LENGTH
+            )
+        ),
+        current_app.json.loads,
+    )
+    # The first batch is checked before the response starts, to answer 401.
+    batch = next(batches, None)
+    if batch is not None and User.has_reached_usage_limit(
+        token, int(current_app.config.get("API_MAX_USAGE_LIMIT")), len(batch)
+    ):
+        return api_key_rejected_response(
+            "The API key limit is reached!", token
         )
 
+    breach_index = get_breach_index(
+        current_app.config.get("BREACH_INDEX_PATH", "")
+    )
+    return Response(
+        stream_with_context(
+            _stream_results(
+                get_password_config(policy, breach_index),
+                batch,
+                batches,
+                token,
+            )
+        ),
+        mimetype=MIMETYPE_NDJSON,
+    )
+
+
+@csrf.exempt
+@api_bp.route(ROUTE_POLICY_ID, methods=["POST"])
+def policy_id():
+    """Define the endpoint giving the policy id of a scoring policy.
+
+       The policy id replaces the characteristics, the minimum score and the options of the scoring payloads.
+
+    Returns:
+        dict: The payload with the policy id.
+    """
+    logger.info("Call policy id endpoint")
+    try:
+        policy = decode_scoring_policy(get_payload())
+    except PayloadValidationError as e:
+        return make_payload_response(
+            {
+                "message": "The input data is invalid!",
+                "error": "Bad request.",
+                "errors": e.errors,
+            },
+            400,
+        )
+    return make_payload_response({"policy_id": encode_policy_id(policy)})
+
+
+def get_policy_owner() -> User | None:
+    """Give the user of the API key of a named policies request.
+
+    The API key is given in the url args or in the payload.
+
+    Returns:
+        User: The user of the API key, None if it is missing or unknown.
+    """
+    api_key = request.args.get("api_key")
+    if not api_key and request.content_length:
+        data = get_payload()
+        api_key = data.get("api_key") if isinstance(data, dict) else None
+    return User.get_by_api_token(api_key, replica=True) if api_key else None
+
+
+def named_policy_document(named_policy: NamedPolicy) -> dict:
+    """Give the payload describing a named policy.
+
+    Args:
+        named_policy (NamedPolicy): The named policy.
+
+    Returns:
+        dict: The name of the policy, to give as policy_id, with its characteristics, minimum score and options.
+    """
+    return {
+        "name": named_policy.name,
+        **encode_policy_payload(named_policy.get_policy()),
+    }
+
+
+def policy_owner_missing_response():
+    """Give the response to a named policies request without a valid API key.
+
+    Returns:
+        tuple: The 401 response.
+    """
+    return make_payload_response(
+        {"status": False, "message": "The API key is missing or unknown!"},
+        401,
+    )
+
+
+def policy_not_found_response():
+    """Give the response to a request on a missing named policy.
+
+    Returns:
+        tuple: The 404 response.
+    """
+    return make_payload_response(
+        {"message": "The policy does not exist!", "error": "Not found."}, 404
+    )
+
+
+@csrf.exempt
+@api_bp.route(ROUTE_POLICIES, methods=["GET", "POST"])
+def named_policies():
+    """Define the endpoint to list and create the named policies of an API key.
+
+       The name of a policy is then given as policy_id in the scoring payloads of the API key.
+
+    Returns:
+        response: The named policies of the API key for a GET request, the created policy for a POST request.
+    """
+    logger.info("Call named policies endpoint")
+    user = get_policy_owner()
+    if user is None:
+        return policy_owner_missing_response()
+    if request.method == "GET":
+        return make_payload_response(
+            {
+                "policies": [
+                    named_policy_document(named_policy)
+                    for named_policy in NamedPolicy.get_all_by_user(user.id)
+                ]
+            }
+        )
+
+    data = get_payload()
+    name = data.get("name") if isinstance(data, dict) else None
+    errors = (
+        []
+        if is_valid_policy_name(name)
+        else [
+            "name: must be 1 to 64 lowercase letters, digits or underscores,"
+            " starting with a letter"
+        ]
+    )
+    try:
+        policy = decode_scoring_policy(data)
+    except PayloadValidationError as e:
+        errors.extend(e.errors)
+    if errors:
+        return make_payload_response(
+            {
+                "message": "The input data is invalid!",
+                "error": "Bad request.",
+                "errors": errors,
+            },
+            400,
+        )
+    if NamedPolicy.get_by_user_and_name(user.id, name) is not None:
+        return make_payload_response(
+            {"message": "The policy already exists!", "error": "Conflict."},
+            409,
+        )
+
+    named_policy = NamedPolicy(user.id, name, policy)
+    named_policy.save()
+    current_app.extensions["policy_registry"].invalidate(name)
+    logger.info("named policy %s created for user %s", name, user.id)
+    return make_payload_response(named_policy_document(named_policy), 201)
+
+
+@csrf.exempt
+@api_bp.route(ROUTE_NAMED_POLICY, methods=["GET", "PUT", "DELETE"])
+def manage_named_policy(name: str):
+    """Define the endpoint to read, replace and delete a named policy of an API key.
+
+       A replaced or deleted policy is evicted from the policy caches of all the workers.
+
+    Args:
+        name (str): The name of the policy.
+
+    Returns:
+        response: The policy for a GET or PUT request, a confirmation for a DELETE request.
+    """
+    logger.info("Call named policy endpoint")
+    user = get_policy_owner()
+    if user is None:
+        return policy_owner_missing_response()
+    named_policy = NamedPolicy.get_by_user_and_name(user.id, name)
+    if named_policy is None:
+        return policy_not_found_response()
+    if request.method == "GET":
+        return make_payload_response(named_policy_document(named_policy))
+
+    registry = current_app.extensions["policy_registry"]
+    if request.method == "DELETE":
+        named_policy.delete()
+        registry.invalidate(name)
+        logger.info("named policy %s deleted for user %s", name, user.id)
+        return make_payload_response(
+            {"status": True, "message": "The policy has been deleted."}
+        )
+
+    try:
+        policy = decode_scoring_policy(get_payload())
+    except PayloadValidationError as e:
+        return make_payload_response(
+            {
+                "message": "The input data is invalid!",
+                "error": "Bad request.",
+                "errors": e.errors,
+            },
+            400,
+        )
+    named_policy.set_policy(policy)
+    named_policy.save()
+    registry.invalidate(name)
+    logger.info("named policy %s updated for user %s", name, user.id)
+    return make_payload_response(named_policy_document(named_policy))
+
+
+@api_bp.route(ROUTE_BREACH_RANGE, methods=["GET"])
+def breach_range(prefix: str):
+    """Define the k-anonymity endpoint to look up breached password hashes.
+
+       The client sends the 5 first hexadecimal characters of the SHA-1 of a password and receives all the breached hash suffixes sharing this prefix, as "SUFFIX:COUNT" lines.
+
+    Args:
+        prefix (str): The 5 first hexadecimal characters of a SHA-1 hash.
+
+    Returns:
+        response: The streamed suffixes with their count, cacheable by clients and CDNs.
+    """
+    if not BREACH_RANGE_PREFIX.fullmatch(prefix):
+        return {
+            "message": "The prefix must be 5 hexadecimal characters!",
+            "error": "Bad request.",
+        }, 400
+
+    index = get_breach_index(current_app.config.get("BREACH_INDEX_PATH", ""))
+    if index is None:
+        return {
+            "message": "The breach index is not available!",
+            "error": "Service unavailable.",
+        }, 503
+
+    prefix = prefix.upper()
+    response = Response(
+        index.iter_range(prefix), mimetype="text/plain", status=200
+    )
+    response.set_etag("-".join([index.generation, prefix]))
+    response.cache_control.public = True
+    response.cache_control.max_age = int(
+        current_app.config.get("BREACH_RANGE_MAX_AGE", BREACH_RANGE_MAX_AGE)
+    )
+    return response.make_conditional(request)
+
 
 def upload_file_to_s3(
     s3_bucket_name: str,
@@ -240,13 +835,8 @@ def upload_file_to_s3(
         driver (str, optional): Indicate the provider. Currently 2 possibilities aws or minio. Defaults to "minio".
         compress_data (bool, optional): Indicate if the data should be stored compressed or not. Defaults to False.
     """
-    driverManager = S3DriverInterface.get_instance(driver)
-    driverManager.connect(
-        hostname=current_app.config.get("S3_MINIO_HOST"),
-        port=current_app.config.get("S3_MINIO_API_PORT"),
-        user=current_app.config.get("S3_MINIO_USER"),
-        password=current_app.config.get("S3_MINIO_PASSWORD"),
-    )
+    start = time.perf_counter()
+    driverManager = connect_s3_driver(driver)
     driverManager.create_bucket(current_app.config.get("S3_MINIO_BUCKET_NAME"))
     if from_memory:
         driverManager.upload_file_from_memory(
@@ -265,6 +855,11 @@ def upload_file_to_s3(
             bucket_destination_path=s3_bucket_destination_name,
             compress=compress_data,
         )
+    metrics.S3_UPLOAD_DURATION.labels(driver=driver).observe(
+        time.perf_counter() - start
+    )
+    if file_size:
+        metrics.S3_UPLOAD_BYTES.labels(driver=driver).inc(file_size)
 
 
 @api_bp.route(ROUTE_BULK_PASSWORD_SCORING, methods=["GET", "POST"])
@@ -276,9 +871,7 @@ def bulk_scores():
     Returns:
         response: a payload indicating that the file was processed in the case of a POST request. A redirect to the upload file form in case of a GET request.
     """
-    logger.info(
-        "Call bulk scores endpoint - headers {}".format(request.headers)
-    )
+    logger.info("Call bulk scores endpoint")
     file_form = UploadFileForm()
     allowed_extensions = set(
         current_app.config.get("ALLOWED_FILE_EXTENSIONS").split(" ")
@@ -338,9 +931,7 @@ def s3_bulk_scores():
     Returns:
         response: a payload indicating that the file was processed in the case of a POST request. A redirect to the upload file form in case of a GET request.
     """
-    logger.info(
-        "Call S3 bulk scores endpoint - headers {}".format(request.headers)
-    )
+    logger.info("Call S3 bulk scores endpoint")
     file_form = UploadFileForm()
     allowed_extensions = set(
         current_app.config.get("ALLOWED_FILE_EXTENSIONS").split(" ")
@@ -398,6 +989,114 @@ def s3_bulk_scores():
     return render_template("file_upload.html", form=file_form)
 
 
+@csrf.exempt
+@api_bp.route(ROUTE_S3_UPLOADS, methods=["POST"])
+@token_usage_reached
+def s3_uploads():
+    """Define the endpoint giving a presigned form to upload a bulk scoring file straight to the S3 service.
+
+       The file does not go through the web tier. Its scoring is queued once the upload is completed, through the completion endpoint.
+
+    Returns:
+        dict: The payload with the upload id, the url and the fields of the presigned POST form, the maximum size of the file and the validity of the form.
+    """
+    logger.info("Call S3 uploads endpoint")
+    token = get_payload()["api_key"]
+    try:
+        user = User.get_by_api_token(token, replica=True)
+        if user is None:
+            return api_key_rejected_response("The API key is invalid!", token)
+        return make_payload_response(
+            create_upload(connect_s3_driver(), user.id), 201
+        )
+
+    except Exception as e:
+        logger.error("unknown exception here %s", e)
+        return make_payload_response(
+            {"message": "Something went wrong!", "error": str(e)}, 500
+        )
+
+
+@csrf.exempt
+@api_bp.route(ROUTE_S3_UPLOAD_COMPLETION, methods=["POST"])
+def complete_s3_upload(upload_id: str):
+    """Define the endpoint queueing the scoring of a file uploaded straight to the S3 service.
+
+       The payload gives the API key of the upload and the scoring policy, by its characteristics or by a policy id. Each line of the file uses the API key once, when it is scored.
+
+    Args:
+        upload_id (str): The id of the upload given by the uploads endpoint.
+
+    Returns:
+        dict: The payload with the id of the Celery task scoring the file.
+    """
+    logger.info("Call S3 upload completion endpoint")
+    data = get_payload()
+    token = data.get("api_key") if isinstance(data, dict) else None
+    if not token:
+        return api_key_rejected_response("The API key is missing!", token)
+    user = (
+        User.get_by_api_token(token, replica=True)
+        if verify_api_key(token)
+        else None
+    )
+    if user is None:
+        return api_key_rejected_response("The API key is invalid!", token)
+
+    try:
+        policy = decode_scoring_policy(data, get_policy_resolver(token))
+    except PayloadValidationError as e:
+        return make_payload_response(
+            {
+                "message": "The input data is invalid!",
+                "error": "Bad request.",
+                "errors": e.errors,
+            },
+            400,
+        )
+
+    try:
+        bucket_name = current_app.config.get("S3_MINIO_BUCKET_NAME")
+        object_name = make_upload_object_name(user.id, upload_id)
+        size = (
+            connect_s3_driver().get_object_size(bucket_name, object_name)
+            if UPLOAD_ID.fullmatch(upload_id)
+            else None
+        )
+        if size is None:
+            return make_payload_response(
+                {"message": "The upload is not found!", "error": "Not found."},
+                404,
+            )
+        if size > get_upload_max_size():
+            return make_payload_response(
+                {
+                    "message": "The file is too large!",
+                    "error": "Content too large.",
+                },
+                413,
+            )
+
+        # The task uses the API key once per line of the file.
+        task = s3_object_password_scoring.delay(
+            bucket_name, object_name, policy.as_config(), token
+        )
+        return make_payload_response(
+            {
+                "status": "OK",
+                "message": "The scoring of your file is queued.",
+                "task_id": task.id,
+            },
+            202,
+        )
+
+    except Exception as e:
+        logger.error("unknown exception here %s", e)
+        return make_payload_response(
+            {"message": "Something went wrong!", "error": str(e)}, 500
+        )
+
+
 @csrf.exempt
 @api_bp.route(ROUTE_INIT_SESSION_TOKEN, methods=["POST"])
 def init_session_token_of_user():
@@ -408,9 +1107,7 @@ def init_session_token_of_user():
     Returns:
         response: a payload indicating the API token key of the user if the email was correctly input. An error otherwise.
     """
-    logger.info(
-        "Call init API token endpoint - headers {}".format(request.headers)
-    )
+    logger.info("Call init API token endpoint")
     data: dict = request.json
 
     if not is_valid_payload(PAYLOAD_TYPE_EMAIL, data):
@@ -419,10 +1116,10 @@ def init_session_token_of_user():
             "error": "Bad request.",
         }, 400
     email = data.get("email")
-    user = User.get_by_email(
-        email
-    )  # Verify that the user does not already exist
-    if user:
+    user = User.create_with_token(
+        email, current_app.config.get("SECRET_KEY")
+    )  # None when a user with this email already exists
+    if not user:
         return (
             jsonify(
                 {
@@ -436,15 +1133,10 @@ def init_session_token_of_user():
             200,
         )
     else:
-        user = User(email=email)
-        user.set_token(
-            secret_key=current_app.config.get("SECRET_KEY"), message=email
-        )
         user.log_user_in()
-        user.save()
 
     logged_in = login_user(user, remember=True, force=True)
-    logger.info("The user {} logged in ? {}".format(user, logged_in))
+    logger.info("The user with id %s logged in ? %s", user.id, logged_in)
 
     return (
         jsonify(
@@ -467,26 +1159,23 @@ def renew_token_for_user():
     Returns:
         response: a payload wit hthe renewed API Token key if the user exists. An error otherwise.
     """
-    logger.info(
-        "Call re-new API token endpoint - headers {}".format(request.headers)
-    )
+    logger.info("Call re-new API token endpoint")
     data: dict = request.json
 
     token = data.get("api_key")
-    if not token:
+    # An expired key is renewed, not its user locked out.
+    user = User.get_by_api_token(token, allow_expired=True) if token else None
+    if not user:
         return (
             jsonify({"status": False, "message": "The token is invalid."}),
             200,
         )
     else:
-        user = User.get_by_api_token(token)
         user.reset_token(current_app.config.get("SECRET_KEY"))
         user.save()
 
         logged_in = login_user(user, remember=True, force=True)
-        logger.info(
-            "The user with id {} logged in ? {}".format(user.id, logged_in)
-        )
+        logger.info("The user with id %s logged in ? %s", user.id, logged_in)
 
     return (
         jsonify(
@@ -510,11 +1199,7 @@ def test_use_api():
     Returns:
         response: a payload with the API token key or an error message if the API token key reached its max usage.
     """
-    logger.info(
-        "Call sanity check usage for API token endpoint - headers {}".format(
-            request.headers
-        )
-    )
+    logger.info("Call sanity check usage for API token endpoint")
     data: dict = request.json
     token = data.get("api_key")
     return (
@@ -4,6 +4,7 @@ import base64
 import logging
 
 from core.models import User
+from core.wire_format import get_payload
 
 logger = logging.getLogger(__name__)
 
@@ -19,7 +20,7 @@ def login_with_id(user_id: str) -> User | None:
     Returns:
         User: Return an instance of the user having this ID string or None otherwise.
     """
-    user = User.get_by_api_token(user_id)
+    user = User.get_by_api_token(user_id, replica=True)
     return user if user else None
 
 
@@ -36,12 +37,12 @@ def login_with_api_key_in_payload(request) -> dict:
     """
     result = {}
     try:
-        data = request.json
+        data = get_payload()
         api_key = data.get("api_key")
         if api_key:
-            user = User.get_by_api_token(api_key)
+            user = User.get_by_api_token(api_key, replica=True)
             if user:
-                logger.info("login user -> {}".format(user))
+                logger.info("login user with id %s", user.id)
                 result["user"] = user
                 result["status"] = True
             else:
@@ -49,7 +50,7 @@ def login_with_api_key_in_payload(request) -> dict:
     except Exception as e:
         result["status"] = False
         logger.error(
-            "Exception when searching for the user through JSON: {}".format(e)
+            "Exception when searching for the user through JSON: %s", e
         )
     return result
 
@@ -66,9 +67,9 @@ def login_with_api_key_in_url_args(request):
     result = {}
     api_key = request.args.get("api_key")
     if api_key:
-        user = User.query.filter_by(token=api_key).first()
+        user = User.get_by_api_token(api_key, replica=True)
         if user:
-            logger.info("login user -> {}".format(user))
+            logger.info("login user with id %s", user.id)
             result["user"] = user
             result["status"] = True
         else:
@@ -95,9 +96,9 @@ def login_with_basic_auth_header(request):
             api_key = base64.b64decode(api_key)
         except TypeError:
             pass
-        user = User.query.filter_by(token=api_key).first()
+        user = User.get_by_api_token(api_key, replica=True)
         if user:
-            logger.info("login user -> {}".format(user))
+            logger.info("login user with id %s", user.id)
             result["user"] = user
             result["status"] = True
         else:
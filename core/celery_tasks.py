@@ -3,8 +3,13 @@
 import os
 
 from celery import shared_task
+from flask import current_app
 
-from core.service.password_scoring import PasswordConfig
+from core.models import User
+from core.service.breach_index import get_breach_index
+from core.service.s3_uploads import connect_s3_driver
+from core.service.score_stream import iter_password_batches, score_batch
+from password_scoring import PasswordConfig
 
 
 @shared_task
@@ -28,3 +33,52 @@ def multiple_password_scoring(passwords: list):
         result = password_scoring.validate_password(password)
         # if result["status"]:
         #    print("password => {}, scoring => {}".format(password, result["score"]))
+
+
+@shared_task
+def s3_object_password_scoring(
+    bucket_name: str, object_name: str, policy: dict, api_key: str
+) -> dict:
+    """Score the passwords of a file stored on the S3 service in async mode.
+
+    The file is read as a stream, one password per line, a batch of lines at a time. Each line uses the API key once, the scoring stops when its limit is reached.
+
+    Args:
+        bucket_name (str): The bucket of the file.
+        object_name (str): The name of the file on the S3 server.
+        policy (dict): The arguments of the PasswordConfig of the scoring policy.
+        api_key (str): The API key of the upload, charged per line.
+
+    Returns:
+        dict: The number of scored passwords, of invalid lines and of results per color, and if the limit of the API key stopped the scoring.
+    """
+    password_scoring = PasswordConfig(
+        breach_index=get_breach_index(
+            current_app.config.get("BREACH_INDEX_PATH", "")
+        ),
+        **policy,
+    )
+    usage_limit = int(current_app.config.get("API_MAX_USAGE_LIMIT"))
+    summary = {
+        "passwords": 0,
+        "invalid_lines": 0,
+        "colors": {},
+        "usage_limit_reached": False,
+    }
+    stream = connect_s3_driver().open_object(bucket_name, object_name)
+    try:
+        for batch in iter_password_batches(stream, ndjson=False):
+            if User.has_reached_usage_limit(api_key, usage_limit, len(batch)):
+                summary["usage_limit_reached"] = True
+                break
+            for result in score_batch(password_scoring, batch):
+                if "color" not in result:
+                    summary["invalid_lines"] += 1
+                    continue
+                summary["passwords"] += 1
+                summary["colors"][result["color"]] = (
+                    summary["colors"].get(result["color"], 0) + 1
+                )
+    finally:
+        stream.close()
+    return summary
@@ -0,0 +1,21 @@
+"""Define the commands of the application, run with flask --app app."""
+
+import click
+from flask.cli import AppGroup
+
+from core import db
+
+usage_counters_cli = AppGroup(
+    "usage-counters", help="Manage the usage counters of the API keys."
+)
+
+
+@usage_counters_cli.command("migrate")
+def migrate_usage_counters():
+    """Create the token_usage table and move the uses counted on the users into it."""
+    from core.models import TokenUsage
+
+    # Only the missing tables are created.
+    db.create_all()
+    moved = TokenUsage.migrate_user_counts()
+    click.echo("The uses of {} users are moved.".format(moved))
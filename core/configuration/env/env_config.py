@@ -20,9 +20,54 @@ DOCKER_VAR_ENVS = (
     "CORS_ORIGINS_ROUTE_SCORING",
     "LOG_PATH",
     "LOG_FILENAME",
+    "LOG_FORMAT",
+    "LOG_SAMPLING",
     "UPLOAD_FOLDER",
     "MAX_CONTENT_LENGTH",
     "CORS_HEADER",
+    "BREACH_INDEX_PATH",
+    "API_KEY_MAX_AGE",
+    "API_KEY_ACCEPT_LEGACY",
+    "API_KEY_REVOCATION_MAX_ENTRIES",
+    "USAGE_COUNTER_SLOTS",
+    "DB_POOL_MODE",
+    "DB_POOL_SIZE",
+    "DB_GEVENT_POOL_SIZE",
+    "DB_MAX_OVERFLOW",
+    "DB_POOL_TIMEOUT",
+    "DB_POOL_RECYCLE",
+    "DB_POOL_PRE_PING",
+    "DB_QUERY_CACHE_SIZE",
+    "DB_REPLICA_URI",
+    "DB_REPLICA_MAX_LAG",
+    "GUNICORN_WORKER_CLASS",
+    "GUNICORN_THREADS",
+    "SCORE_CACHE_ENABLED",
+    "SCORE_CACHE_MAX_ENTRIES",
+    "SCORE_CACHE_TTL",
+    "SCORE_CACHE_REDIS_URL",
+    "SCORE_BATCH_MAX_SIZE",
+    "S3_DRIVER",
+    "S3_UPLOAD_MAX_SIZE",
+    "S3_UPLOAD_EXPIRES_IN",
+    "SCORE_STREAM_BATCH_SIZE",
+    "SCORE_STREAM_MAX_LINE_LENGTH",
+    "SCORE_STREAM_MAX_CONTENT_LENGTH",
+    "SCORE_COALESCING_ENABLED",
+    "SCORE_COALESCING_WINDOW_MS",
+    "SCORE_COALESCING_MAX_BATCH_SIZE",
+    "SCORE_COALESCING_MAX_DELAY_MS",
+    "POLICY_CACHE_TTL",
+    "POLICY_CACHE_MAX_ENTRIES",
+    "POLICY_CACHE_REDIS_URL",
+    "PROFILING_ENDPOINTS",
+    "PROFILING_SAMPLE_RATE",
+    "PROFILING_HEADER",
+    "PROFILING_ALLOWED_KEYS",
+    "PROFILING_FORMAT",
+    "PROFILING_INTERVAL",
+    "PROFILING_MAX_FILES",
+    "PROFILING_MAX_BYTES",
 )
 
 
@@ -174,6 +219,14 @@ class AppConfig:
     APP_ENV_DEVELOPMENT: str = "development"
     APP_ENV_PRODUCTION: str = "production"
     APP_ENV_STAGING: str = "integ"
+    DB_POOL_MODE: str = "queue"
+    DB_POOL_SIZE: int = 0
+    DB_GEVENT_POOL_SIZE: int = 20
+    DB_MAX_OVERFLOW: int = 2
+    DB_POOL_TIMEOUT: float = 5.0
+    DB_POOL_RECYCLE: int = 1800
+    DB_POOL_PRE_PING: bool = True
+    DB_QUERY_CACHE_SIZE: int = 1200
 
     def __init__(self, env):
         """
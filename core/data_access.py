@@ -0,0 +1,180 @@
+"""Define the SQL statements of the authentication and quota queries.
+
+The statements are built once per process and executed with bound
+parameters: SQLAlchemy compiles each of them once, then serves it from its
+compiled cache, instead of building a legacy Query object per call. The
+queries needing only ids, tokens or counts give rows, not ORM instances.
+
+With a replica database (DB_REPLICA_URI), the read-only lookups of the users
+can be sent to it; a user missing from the replica, not replicated yet, is
+looked up again in the primary. The quota queries, followed by writes,
+stay on the primary.
+"""
+
+from functools import cache
+from types import SimpleNamespace
+
+from flask import current_app
+from sqlalchemy import bindparam, func, insert, select, update
+
+from core import db
+
+
+def _replica_bind_arguments() -> dict | None:
+    replica = current_app.extensions.get("db_replica")
+    return {"bind": replica} if replica is not None else None
+
+
+def _select_user(statement, parameters: dict, replica: bool):
+    if replica:
+        bind_arguments = _replica_bind_arguments()
+        if bind_arguments is not None:
+            user = db.session.scalars(
+                statement, parameters, bind_arguments=bind_arguments
+            ).first()
+            if user is not None:
+                return user
+    return db.session.scalars(statement, parameters).first()
+
+
+@cache
+def _statements() -> SimpleNamespace:
+    # Built at the first query, once the models are declared.
+    from core.models import NamedPolicy, TokenUsage, User
+
+    app_user = User.__table__
+    token_usage = TokenUsage.__table__
+    named_policy = NamedPolicy.__table__
+    uses_of_user = (
+        select(func.coalesce(func.sum(token_usage.c.uses), 0))
+        .where(token_usage.c.user_id == app_user.c.id)
+        .scalar_subquery()
+    )
+    return SimpleNamespace(
+        user_by_token=select(User).where(User.token == bindparam("token")),
+        user_by_email=select(User).where(User.email == bindparam("email")),
+        token_usage=select(
+            app_user.c.id,
+            (app_user.c.number_of_uses_for_token + uses_of_user).label("uses"),
+        ).where(app_user.c.token == bindparam("token")),
+        uses=select(func.coalesce(func.sum(token_usage.c.uses), 0)).where(
+            token_usage.c.user_id == bindparam("user_id")
+        ),
+        # The column names are reserved to the SET clause of an update.
+        increment_uses=update(token_usage)
+        .where(
+            token_usage.c.user_id == bindparam("counter_user_id"),
+            token_usage.c.slot == bindparam("counter_slot"),
+        )
+        .values(uses=token_usage.c.uses + bindparam("added_uses")),
+        insert_uses=insert(token_usage),
+        named_policy=select(named_policy.c.policy)
+        .join_from(named_policy, app_user)
+        .where(
+            app_user.c.token == bindparam("token"),
+            named_policy.c.name == bindparam("name"),
+        ),
+    )
+
+
+def select_user_by_token(token: str, replica: bool = False):
+    """Give the user of an API token key.
+
+    Args:
+        token (str): The API token key.
+        replica (bool, optional): Indicates if the replica database, when configured, is read first. Defaults to False.
+
+    Returns:
+        User: The user, None when the key is unknown.
+    """
+    return _select_user(_statements().user_by_token, {"token": token}, replica)
+
+
+def select_user_by_email(email: str, replica: bool = False):
+    """Give the user of an email.
+
+    Args:
+        email (str): The email of the user.
+        replica (bool, optional): Indicates if the replica database, when configured, is read first. Defaults to False.
+
+    Returns:
+        User: The user, None when the email is unknown.
+    """
+    return _select_user(_statements().user_by_email, {"email": email}, replica)
+
+
+def select_token_usage(token: str):
+    """Give the ID of the user of an API token key and its number of uses, in one query.
+
+    Args:
+        token (str): The API token key.
+
+    Returns:
+        Row: The (id, uses) row of the user, None when the key is unknown.
+    """
+    return db.session.execute(
+        _statements().token_usage, {"token": token}
+    ).first()
+
+
+def select_uses(user_id: int) -> int:
+    """Give the number of uses of a user, summed over its counter slots.
+
+    Args:
+        user_id (int): The ID of the user.
+
+    Returns:
+        int: The number of uses.
+    """
+    return db.session.execute(
+        _statements().uses, {"user_id": user_id}
+    ).scalar_one()
+
+
+def increment_uses(user_id: int, slot: int, uses: int) -> int:
+    """Add uses to an existing counter slot of a user, not committed.
+
+    Args:
+        user_id (int): The ID of the user.
+        slot (int): The counter slot.
+        uses (int): The number of uses to add.
+
+    Returns:
+        int: The number of updated slots, 0 when the slot does not exist yet.
+    """
+    return db.session.execute(
+        _statements().increment_uses,
+        {"counter_user_id": user_id, "counter_slot": slot, "added_uses": uses},
+    ).rowcount
+
+
+def insert_uses(user_id: int, slot: int, uses: int):
+    """Create a counter slot of a user, not committed.
+
+    Args:
+        user_id (int): The ID of the user.
+        slot (int): The counter slot.
+        uses (int): The number of uses of the slot.
+
+    Raises:
+        IntegrityError: When the slot already exists.
+    """
+    db.session.execute(
+        _statements().insert_uses,
+        {"user_id": user_id, "slot": slot, "uses": uses},
+    )
+
+
+def select_named_policy(token: str, name: str) -> dict | None:
+    """Give the stored policy of an API token key by its name.
+
+    Args:
+        token (str): The API token key owning the policy.
+        name (str): The name of the policy.
+
+    Returns:
+        dict: The arguments of the ScoringPolicy, None when the key has no policy of this name.
+    """
+    return db.session.execute(
+        _statements().named_policy, {"token": token, "name": name}
+    ).scalar()
@@ -0,0 +1,152 @@
+"""Define the options of the SQLAlchemy engine of the application.
+
+Every scoring request uses the database for the quota of its API key, the
+connection pool of a worker is therefore sized on its concurrency: one
+connection per thread of a gthread worker (GUNICORN_THREADS), one for a
+sync worker and DB_GEVENT_POOL_SIZE for a gevent worker, plus
+DB_MAX_OVERFLOW connections for the bursts. DB_POOL_SIZE overrides the
+derived size. The connections are checked before use (DB_POOL_PRE_PING)
+and replaced after DB_POOL_RECYCLE seconds, below the idle timeouts of the
+servers and of the load balancers.
+
+DB_REPLICA_URI gives the replica database of the read-only lookups, with
+the same engine options (an absolute path for SQLite).
+
+With DB_POOL_MODE=pgbouncer, the connections are pooled by a PgBouncer in
+transaction pooling mode: the workers keep no connection open and the
+server-side prepared statements, bound to a server connection, are
+disabled.
+"""
+
+import logging
+
+from sqlalchemy import create_engine
+from sqlalchemy.pool import NullPool
+
+logger = logging.getLogger(__name__)
+
+POOL_MODE_QUEUE: str = "queue"
+POOL_MODE_PGBOUNCER: str = "pgbouncer"
+DEFAULT_MAX_OVERFLOW: int = 2
+DEFAULT_GEVENT_POOL_SIZE: int = 20
+DEFAULT_POOL_TIMEOUT: float = 5.0
+DEFAULT_POOL_RECYCLE: int = 1800
+DEFAULT_QUERY_CACHE_SIZE: int = 1200
+
+_MEMORY_DATABASES = ("sqlite://", "sqlite:///:memory:")
+
+
+def _to_bool(value) -> bool:
+    return str(value).lower() in ("true", "yes", "1")
+
+
+def get_pool_size(config: dict) -> int:
+    """Give the number of connections of the pool of a worker.
+
+    Args:
+        config (dict): The configuration of the flask app.
+
+    Returns:
+        int: DB_POOL_SIZE when set, the concurrency of a worker otherwise.
+    """
+    pool_size = int(config.get("DB_POOL_SIZE") or 0)
+    if pool_size > 0:
+        return pool_size
+    worker_class = config.get("GUNICORN_WORKER_CLASS") or "gthread"
+    if worker_class == "gevent":
+        return int(
+            config.get("DB_GEVENT_POOL_SIZE") or DEFAULT_GEVENT_POOL_SIZE
+        )
+    if worker_class == "sync":
+        return 1
+    return int(config.get("GUNICORN_THREADS") or 4)
+
+
+def make_engine_options(config: dict, database_uri: str = None) -> dict:
+    """Give the options of the SQLAlchemy engine of a configuration.
+
+    Args:
+        config (dict): The configuration of the flask app.
+        database_uri (str, optional): The URI of the database. Defaults to None, for SQLALCHEMY_DATABASE_URI.
+
+    Returns:
+        dict: The keyword arguments of sqlalchemy.create_engine.
+    """
+    if database_uri is None:
+        database_uri = config.get("SQLALCHEMY_DATABASE_URI") or ""
+    options = {
+        "query_cache_size": int(
+            config.get("DB_QUERY_CACHE_SIZE", DEFAULT_QUERY_CACHE_SIZE)
+        ),
+    }
+    pool_mode = config.get("DB_POOL_MODE") or POOL_MODE_QUEUE
+    if pool_mode == POOL_MODE_PGBOUNCER:
+        if not database_uri.startswith("postgresql"):
+            logger.error(
+                "The pgbouncer pool mode needs a postgresql database, the"
+                " connections are pooled by the workers."
+            )
+        else:
+            options["poolclass"] = NullPool
+            if database_uri.startswith("postgresql+psycopg:"):
+                # psycopg 3 prepares the statements executed several times.
+                options["connect_args"] = {"prepare_threshold": None}
+            return options
+
+    options["pool_pre_ping"] = _to_bool(config.get("DB_POOL_PRE_PING", "true"))
+    if database_uri in _MEMORY_DATABASES:
+        # A single connection per thread, not a sized pool.
+        return options
+    options["pool_size"] = get_pool_size(config)
+    options["max_overflow"] = int(
+        config.get("DB_MAX_OVERFLOW", DEFAULT_MAX_OVERFLOW)
+    )
+    options["pool_timeout"] = float(
+        config.get("DB_POOL_TIMEOUT", DEFAULT_POOL_TIMEOUT)
+    )
+    options["pool_recycle"] = int(
+        config.get("DB_POOL_RECYCLE", DEFAULT_POOL_RECYCLE)
+    )
+    return options
+
+
+def engine_options_init_app(app) -> dict:
+    """Set the options of the SQLAlchemy engine of the flask app, before the init of the database.
+
+    The options given in SQLALCHEMY_ENGINE_OPTIONS take precedence.
+
+    Args:
+        app (Flask): The flask application.
+
+    Returns:
+        dict: The options of the engine.
+    """
+    engine_options = {
+        **make_engine_options(app.config),
+        **app.config.get("SQLALCHEMY_ENGINE_OPTIONS", {}),
+    }
+    app.config["SQLALCHEMY_ENGINE_OPTIONS"] = engine_options
+    logger.debug("The engine options: %s", engine_options)
+    return engine_options
+
+
+def replica_init_app(app):
+    """Create the engine of the replica database of the flask app, if configured.
+
+    The engine is not a bind of Flask-SQLAlchemy: no table is created or dropped in the replica.
+
+    Args:
+        app (Flask): The flask application.
+
+    Returns:
+        Engine: The engine of the replica, None when DB_REPLICA_URI is not set.
+    """
+    app.extensions.pop("db_replica", None)
+    replica_uri = app.config.get("DB_REPLICA_URI")
+    if not replica_uri:
+        return None
+    replica = create_engine(
+        replica_uri, **make_engine_options(app.config, replica_uri)
+    )
+    app.extensions["db_replica"] = replica
+    return replica
@@ -0,0 +1,142 @@
+"""Define the JSON provider of the flask app.
+
+The responses are serialized compactly, straight to bytes, and the request
+bodies are parsed with the fastest available library: orjson, else msgspec,
+else the standard json module.
+"""
+
+import json
+
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover
+    orjson = None
+
+try:
+    import msgspec
+except ImportError:  # pragma: no cover
+    msgspec = None
+
+BACKEND_ORJSON: str = "orjson"
+BACKEND_MSGSPEC: str = "msgspec"
+BACKEND_STDLIB: str = "json"
+
+
+def available_backend() -> str:
+    """Give the fastest JSON library installed.
+
+    Returns:
+        str: orjson, msgspec or json.
+    """
+    if orjson is not None:
+        return BACKEND_ORJSON
+    if msgspec is not None:
+        return BACKEND_MSGSPEC
+    return BACKEND_STDLIB
+
+
+class FastJSONProvider(DefaultJSONProvider):
+    """Serialize and parse JSON with orjson or msgspec, when installed.
+
+    The data types supported by the default flask provider are serialized the same way (dates as HTTP dates, dataclasses, UUID, Markup), except the dates with msgspec, serialized as RFC 3339 strings.
+    """
+
+    compact = True
+
+    def __init__(self, app, backend: str = None) -> None:
+        """Instanciate the JSON provider of an app.
+
+        Args:
+            app (Flask): The flask application.
+            backend (str, optional): orjson, msgspec or json. Defaults to the fastest installed.
+        """
+        super().__init__(app)
+        self.backend = backend or available_backend()
+        if self.backend == BACKEND_MSGSPEC:
+            self.__msgspec_decoder = msgspec.json.Decoder()
+
+    def encode(self, obj) -> bytes:
+        """Serialize data as compact JSON.
+
+        Args:
+            obj (object): The data to serialize.
+
+        Returns:
+            bytes: The UTF-8 JSON document.
+        """
+        if self.backend == BACKEND_ORJSON:
+            option = orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME
+            if self.sort_keys:
+                option |= orjson.OPT_SORT_KEYS
+            try:
+                return orjson.dumps(obj, default=self.default, option=option)
+            except orjson.JSONEncodeError:
+                pass  # ex: an integer of more than 64 bits
+        elif self.backend == BACKEND_MSGSPEC:
+            try:
+                return msgspec.json.encode(
+                    obj,
+                    enc_hook=self.default,
+                    order="sorted" if self.sort_keys else None,
+                )
+            except (TypeError, msgspec.EncodeError):
+                pass
+        return json.dumps(
+            obj,
+            default=self.default,
+            ensure_ascii=False,
+            sort_keys=self.sort_keys,
+            separators=(",", ":"),
+        ).encode("utf-8")
+
+    def dumps(self, obj, **kwargs) -> str:
+        """Serialize data as JSON to a string.
+
+        Args:
+            obj (object): The data to serialize.
+            kwargs (dict): Passed to json.dumps, which is then used.
+
+        Returns:
+            str: The JSON document.
+        """
+        if kwargs:
+            return super().dumps(obj, **kwargs)
+        return self.encode(obj).decode("utf-8")
+
+    def loads(self, s: str | bytes, **kwargs):
+        """Deserialize data as JSON from a string or bytes.
+
+        Args:
+            s (str | bytes): The JSON document, text or UTF-8 bytes.
+            kwargs (dict): Passed to json.loads, which is then used.
+
+        Returns:
+            object: The deserialized data.
+        """
+        if kwargs or self.backend == BACKEND_STDLIB:
+            return super().loads(s, **kwargs)
+        if self.backend == BACKEND_ORJSON:
+            return orjson.loads(s)
+        try:
+            return self.__msgspec_decoder.decode(s)
+        except msgspec.DecodeError as e:
+            raise ValueError(str(e)) from e
+
+    def response(self, *args, **kwargs):
+        """Serialize the given arguments as a compact JSON response.
+
+        Args:
+            args (list): A single value to serialize, or multiple values to treat as a list.
+            kwargs (dict): Treat as a dict to serialize.
+
+        Returns:
+            Response: The response with the JSON document.
+        """
+        if self.compact is False:
+            return super().response(*args, **kwargs)
+        return self._app.response_class(
+            self.encode(self._prepare_response_obj(args, kwargs)),
+            mimetype=self.mimetype,
+        )
@@ -0,0 +1,204 @@
+"""Declare the asynchronous and structured logging pipeline.
+
+The loggers of the application only put their records in a queue: the
+formatting and the I/O of the console and file handlers are done by a
+listener thread, off the request threads. The records are formatted as
+JSON lines, their message being interpolated by the listener only.
+
+The INFO and DEBUG records of the requests of some routes can be sampled:
+LOG_SAMPLING maps endpoints to the fraction of their requests to log, ex:
+"api_urls.score=0.01 api_urls.default=0". The warnings and errors are
+always logged.
+"""
+
+import atexit
+import json
+import logging
+import os
+import queue
+import random
+import time
+from logging.handlers import QueueHandler, QueueListener
+
+from flask import Flask, g, has_request_context, request
+
+LOG_FORMAT_JSON: str = "json"
+LOG_FORMAT_TEXT: str = "text"
+
+_RECORD_ATTRIBUTES = frozenset(
+    logging.LogRecord("", 0, "", 0, "", None, None).__dict__
+) | {"message", "asctime"}
+
+
+class JsonFormatter(logging.Formatter):
+    """Format the log records as JSON lines."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        """Format a record as a JSON object.
+
+        The attributes given through `extra` are added to the object.
+
+        Args:
+            record (logging.LogRecord): The record to format.
+
+        Returns:
+            str: The JSON object of the record, on one line.
+        """
+        document = {
+            "time": "{}.{:03d}Z".format(
+                time.strftime(
+                    "%Y-%m-%dT%H:%M:%S", time.gmtime(record.created)
+                ),
+                int(record.msecs),
+            ),
+            "level": record.levelname,
+            "logger": record.name,
+            "function": record.funcName,
+            "line": record.lineno,
+            "process": record.process,
+            "message": record.getMessage(),
+        }
+        for key, value in record.__dict__.items():
+            if key not in _RECORD_ATTRIBUTES:
+                document[key] = value
+        if record.exc_info:
+            document["exception"] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            document["exception"] = record.exc_text
+        return json.dumps(document, default=str)
+
+
+_DEFERRED_TYPES = (str, int, float, bool, type(None))
+
+
+class DeferredQueueHandler(QueueHandler):
+    """Enqueue the records without formatting them.
+
+    The standard QueueHandler interpolates the message in the calling thread; here it is left to the listener thread when the arguments are plain values. The other arguments (ex: a model instance, bound to the request session) and the exceptions are rendered on the spot.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        """Prepare a record for the queue.
+
+        Args:
+            record (logging.LogRecord): The record to enqueue.
+
+        Returns:
+            logging.LogRecord: The record, safe to format in another thread.
+        """
+        if record.args and not all(
+            isinstance(arg, _DEFERRED_TYPES)
+            for arg in (
+                record.args.values()
+                if isinstance(record.args, dict)
+                else record.args
+            )
+        ):
+            record.msg = record.getMessage()
+            record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(
+                record.exc_info
+            )
+            record.exc_info = None
+        return record
+
+
+class RouteSamplingFilter(logging.Filter):
+    """Sample the INFO and DEBUG records of the requests per route."""
+
+    def __init__(self, rates: dict) -> None:
+        """Instanciate a per-route sampling filter.
+
+        Args:
+            rates (dict): The fraction of the requests to log, per endpoint name.
+        """
+        super().__init__()
+        self.rates = rates
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        """Indicate if a record is logged.
+
+        All the records of a request are either kept or dropped together.
+
+        Args:
+            record (logging.LogRecord): The record to filter.
+
+        Returns:
+            bool: True to log the record.
+        """
+        if record.levelno >= logging.WARNING or not has_request_context():
+            return True
+        sampled = g.get("log_sampled")
+        if sampled is None:
+            rate = self.rates.get(request.endpoint, 1.0)
+            sampled = g.log_sampled = random.random() < rate  # nosec B311
+        return sampled
+
+
+def parse_sampling_rates(value: str) -> dict:
+    """Parse the LOG_SAMPLING setting.
+
+    Args:
+        value (str): Space separated "endpoint=rate" pairs.
+
+    Returns:
+        dict: The rate per endpoint name.
+    """
+    rates = {}
+    for pair in value.split():
+        endpoint, _, rate = pair.partition("=")
+        rates[endpoint] = float(rate)
+    return rates
+
+
+_listener = None
+
+
+def stop_listener():
+    """Flush the queued records and stop the listener thread."""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+def _restart_listener_in_child():
+    # The listener thread is not inherited by the forked processes (ex: the
+    # Celery prefork pool): start a new listener on the copy of the queue.
+    global _listener
+    if _listener is not None:
+        _listener = QueueListener(
+            _listener.queue,
+            *_listener.handlers,
+            respect_handler_level=_listener.respect_handler_level,
+        )
+        _listener.start()
+
+
+def start_queue_logging(app: Flask, handlers: list) -> QueueHandler:
+    """Start the listener thread that runs the handlers of the application.
+
+    Args:
+        app (Flask): The flask application.
+        handlers (list): The handlers run by the listener (console, files...).
+
+    Returns:
+        QueueHandler: The handler to bind to the loggers of the application.
+    """
+    global _listener
+    stop_listener()
+
+    log_queue = queue.SimpleQueue()
+    _listener = QueueListener(log_queue, *handlers, respect_handler_level=True)
+    _listener.start()
+
+    queue_handler = DeferredQueueHandler(log_queue)
+    rates = parse_sampling_rates(app.config.get("LOG_SAMPLING", ""))
+    if rates:
+        queue_handler.addFilter(RouteSamplingFilter(rates))
+    return queue_handler
+
+
+atexit.register(stop_listener)
+os.register_at_fork(after_in_child=_restart_listener_in_child)
@@ -0,0 +1,201 @@
+"""Define the Prometheus metrics of the application and their endpoint.
+
+The metrics are only updated in memory (or in the memory-mapped files of
+the multiprocess mode) while serving, they are aggregated and formatted
+when /metrics is scraped.
+
+Under gunicorn, or with Celery workers on the same host, each process
+writes its own values: set PROMETHEUS_MULTIPROC_DIR to an empty directory,
+shared by all the processes, before they start. The gunicorn configuration
+removes the files of the dead workers (see gunicorn.conf.py).
+"""
+
+import logging
+import os
+import threading
+import time
+
+from celery.signals import task_postrun, task_prerun
+from flask import Blueprint, Response, g, request
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+    multiprocess,
+)
+
+logger = logging.getLogger(__name__)
+
+ROUTE_METRICS: str = "/metrics"
+
+REQUEST_BUCKETS: tuple = (
+    0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0,
+    10.0,
+)  # fmt: skip
+STAGE_BUCKETS: tuple = (
+    0.00001, 0.000025, 0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025,
+    0.005, 0.01, 0.025, 0.05, 0.1,
+)  # fmt: skip
+
+STAGE_AUTH: str = "auth"
+STAGE_QUOTA: str = "quota"
+STAGE_VALIDATION: str = "validation"
+STAGE_POLICY: str = "policy"
+STAGE_CACHE: str = "cache"
+STAGE_SCORING: str = "scoring"
+STAGE_SERIALIZATION: str = "serialization"
+SCORE_STAGES: tuple = (
+    STAGE_AUTH,
+    STAGE_QUOTA,
+    STAGE_VALIDATION,
+    STAGE_POLICY,
+    STAGE_CACHE,
+    STAGE_SCORING,
+    STAGE_SERIALIZATION,
+)
+
+REQUEST_DURATION = Histogram(
+    "http_request_duration_seconds",
+    "Latency of the API requests.",
+    ["endpoint", "method", "status"],
+    buckets=REQUEST_BUCKETS,
+)
+SCORE_STAGE_DURATION = Histogram(
+    "score_stage_duration_seconds",
+    "Latency of the stages of the /score requests.",
+    ["stage"],
+    buckets=STAGE_BUCKETS,
+)
+SCORE_RESULTS = Counter(
+    "score_results_total", "Scored passwords per color.", ["color"]
+)
+QUOTA_REJECTIONS = Counter(
+    "quota_rejections_total", "Requests rejected for a missing or spent key."
+)
+SCORE_CACHE_EVENTS = Counter(
+    "score_cache_events_total",
+    "Lookups and evictions of the score cache.",
+    ["event"],
+)
+SCORE_CACHE_SIZE = Gauge(
+    "score_cache_entries",
+    "Entries of the per-process tier of the score cache.",
+    multiprocess_mode="livesum",
+)
+CELERY_TASK_DURATION = Histogram(
+    "celery_task_duration_seconds",
+    "Duration of the Celery tasks.",
+    ["task", "state"],
+    buckets=REQUEST_BUCKETS + (30.0, 60.0, 300.0),
+)
+S3_UPLOAD_DURATION = Histogram(
+    "s3_upload_duration_seconds",
+    "Latency of the uploads to the S3 server.",
+    ["driver"],
+    buckets=REQUEST_BUCKETS,
+)
+S3_UPLOAD_BYTES = Counter(
+    "s3_upload_bytes_total", "Bytes uploaded to the S3 server.", ["driver"]
+)
+
+_STAGE_TIMERS = {
+    stage: SCORE_STAGE_DURATION.labels(stage=stage) for stage in SCORE_STAGES
+}
+_score_cache_snapshot = {}
+_score_cache_lock = threading.Lock()
+_celery_task_starts = {}
+
+metrics_bp = Blueprint("metrics", __name__)
+
+
+def stage_timer(stage: str):
+    """Time a stage of a /score request.
+
+    Args:
+        stage (str): One of SCORE_STAGES.
+
+    Returns:
+        contextmanager: The timer of the stage, to use in a with statement.
+    """
+    return _STAGE_TIMERS[stage].time()
+
+
+def start_request_timer():
+    """Store the start time of a request, before its view."""
+    g.metrics_request_start = time.perf_counter()
+
+
+def observe_request(response):
+    """Observe the latency of a request, after its view.
+
+    Args:
+        response (Response): The response of the view.
+
+    Returns:
+        Response: The same response.
+    """
+    start = g.pop("metrics_request_start", None)
+    if start is not None:
+        REQUEST_DURATION.labels(
+            request.endpoint, request.method, response.status_code
+        ).observe(time.perf_counter() - start)
+    return response
+
+
+def observe_score_cache(score_cache):
+    """Report the new events of the score cache of this process.
+
+    Args:
+        score_cache (ScoreCache): The score cache of the application.
+    """
+    stats = score_cache.stats()
+    with _score_cache_lock:
+        for event in ("hits", "redis_hits", "misses", "evictions"):
+            delta = stats[event] - _score_cache_snapshot.get(event, 0)
+            if delta > 0:
+                SCORE_CACHE_EVENTS.labels(event=event).inc(delta)
+            _score_cache_snapshot[event] = stats[event]
+    SCORE_CACHE_SIZE.set(stats["size"])
+
+
+@task_prerun.connect
+def _start_celery_task_timer(task_id=None, **kwargs):
+    _celery_task_starts[task_id] = time.perf_counter()
+
+
+@task_postrun.connect
+def _observe_celery_task(task_id=None, task=None, state=None, **kwargs):
+    start = _celery_task_starts.pop(task_id, None)
+    if start is not None:
+        CELERY_TASK_DURATION.labels(task.name, state).observe(
+            time.perf_counter() - start
+        )
+
+
+@metrics_bp.route(ROUTE_METRICS, methods=["GET"])
+def metrics():
+    """Define the endpoint scraped by Prometheus.
+
+    Returns:
+        Response: The metrics of all the processes, in the Prometheus text format.
+    """
+    if "PROMETHEUS_MULTIPROC_DIR" in os.environ:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return Response(generate_latest(registry), mimetype=CONTENT_TYPE_LATEST)
+
+
+def mark_process_dead(pid: int):
+    """Remove the live gauges of a dead process, in multiprocess mode.
+
+    Args:
+        pid (int): The id of the dead process.
+    """
+    if "PROMETHEUS_MULTIPROC_DIR" in os.environ:
+        multiprocess.mark_process_dead(pid)
@@ -1,9 +1,69 @@
-"""Defines the models for the users module."""
+"""Defines the models for the users, their usage counters and their named policies."""
 
 import datetime
+import random
+import time
 
-from core import db
-from core.service.API_key_generator import create_sha256_signature
+from flask import current_app
+from sqlalchemy import delete, insert, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.exc import IntegrityError
+
+from core import data_access, db
+from core.service.API_key_generator import create_signed_api_key
+from password_scoring import ScoringPolicy
+
+# The INSERT ... ON CONFLICT of the dialects supporting it.
+_UPSERT_INSERTS = {
+    "postgresql": postgresql.insert,
+    "sqlite": sqlite.insert,
+}
+
+
+def revoke_api_key(api_key: str):
+    """Reject an API key without a database lookup from now on, in this process.
+
+    Args:
+        api_key (str): The renewed or unknown API key.
+    """
+    api_key_verifier = current_app.extensions.get("api_key_verifier")
+    if api_key_verifier is not None and api_key:
+        api_key_verifier.revoke(api_key)
+
+
+def verify_api_key(api_key: str, allow_expired: bool = False) -> bool:
+    """Indicate if an API key may be looked up in the database, with pure CPU.
+
+    Args:
+        api_key (str): The API key.
+        allow_expired (bool, optional): Indicates if an expired signed key is still valid, ex: to renew it. Defaults to False.
+
+    Returns:
+        bool: False for a forged, expired or revoked signed key, True otherwise.
+    """
+    api_key_verifier = current_app.extensions.get("api_key_verifier")
+    return api_key_verifier is None or api_key_verifier.verify(
+        api_key, allow_expired
+    )
+
+
+def is_replicated_api_key(api_key: str) -> bool:
+    """Indicate if an API key is old enough to be looked up in the replica database.
+
+    The keys issued (created or renewed) less than DB_REPLICA_MAX_LAG seconds ago may not be replicated yet: they are looked up in the primary.
+
+    Args:
+        api_key (str): The API key.
+
+    Returns:
+        bool: False for a signed key issued within the replication lag, True otherwise.
+    """
+    api_key_verifier = current_app.extensions.get("api_key_verifier")
+    claims = api_key_verifier.get_claims(api_key) if api_key_verifier else None
+    if claims is None:
+        return True
+    max_lag = int(current_app.config.get("DB_REPLICA_MAX_LAG", 5))
+    return claims.issued_at + max_lag < time.time()
 
 
 class User(db.Model):
@@ -58,36 +118,34 @@ class User(db.Model):
         """
         self.email = email
 
-    def _make_timestamp_message(self, message: str):
-        return "".join(
-            [
-                message,
-                datetime.datetime.utcnow().strftime("%m/%d/%Y, %H:%M:%S"),
-            ]
-        )
-
-    def set_token(self, secret_key: str, message: str):
-        """Set the token for a user.
+    def set_token(self, secret_key: str):
+        """Set the token for a user, a signed API key of the current version.
 
         Args:
             secret_key (str): the APP secret key
-            message (str): the message to encode
         """
-        self.token = create_sha256_signature(
-            secret_key, self._make_timestamp_message(message)
+        if not self.id:
+            # The key embeds the ID of the user.
+            db.session.add(self)
+            db.session.flush()
+        self.token = create_signed_api_key(
+            secret_key, self.id, self.number_of_token_renewal or 0
         )
 
     def reset_token(self, secret_key: str):
         """Reset the token for a user.
 
+        The previous token is revoked in this process, the other ones reject it at its database lookup.
+
         Args:
             secret_key (str): the APP secret key
-            message (str): the message to encode
         """
-        self.token = self.set_token(secret_key, self.email)
+        revoke_api_key(self.token)
+        TokenUsage.reset(self.id)
         self.number_of_uses_for_token = 0
         self.number_of_token_renewal += 1
         self.last_date_token_renewed = datetime.datetime.utcnow()
+        self.set_token(secret_key)
 
     def check_token(self, api_key):
         """Control that a given password is correct.
@@ -127,7 +185,7 @@ class User(db.Model):
         Returns:
             User: An instance of a user.
         """
-        return User.query.get(id)
+        return db.session.get(User, id)
 
     @staticmethod
     def get_number_of_token_uses_by_id(id) -> int:
@@ -139,31 +197,90 @@ class User(db.Model):
         Returns:
              int: The number of times the token API has been used.
         """
-        return User.query.get(id).number_of_uses_for_token
+        return db.session.get(User, id).get_number_of_uses_for_token()
 
     @staticmethod
-    def get_by_email(email) -> "User":
+    def create_with_token(email: str, secret_key: str) -> "User":
+        """Create a user of an email with its token, unless the email is already registered.
+
+           The user is inserted by a single INSERT ... ON CONFLICT DO NOTHING RETURNING: the concurrent creations of an email get the already exists outcome, not an integrity error. The token, embedding the ID of the user, is set in the same transaction. On the databases without such an insert, the user is added through the session and a concurrent creation of the email is rolled back.
+
+        Args:
+            email (str): the email of the user.
+            secret_key (str): the APP secret key
+
+        Returns:
+            User: The created user, detached from the session, None if a user with this email already exists.
+        """
+        values = {
+            "email": email,
+            "number_of_uses_for_token": 0,
+            "number_of_token_renewal": 0,
+        }
+        dialect = db.session.get_bind().dialect.name
+        if dialect in _UPSERT_INSERTS:
+            user = db.session.scalars(
+                _UPSERT_INSERTS[dialect](User)
+                .values(**values)
+                .on_conflict_do_nothing(index_elements=[User.email])
+                .returning(User)
+            ).first()
+        else:
+            # A plain INSERT, portable to the databases without RETURNING:
+            # the concurrent creation of the email fails on its unique index.
+            user = User(email)
+            db.session.add(user)
+            try:
+                db.session.flush()
+            except IntegrityError:
+                db.session.rollback()
+                return None
+        if user is None:
+            db.session.rollback()
+            return None
+        user.set_token(secret_key)
+        db.session.flush()
+        # Detached, the user keeps its state after the commit instead of
+        # being loaded again.
+        db.session.expunge(user)
+        db.session.commit()
+        return user
+
+    @staticmethod
+    def get_by_email(email, replica: bool = False) -> "User":
         """Retrieve a user according to its email.
 
         Args:
             email (str): the email of a user.
+            replica (bool, optional): Indicates if the user is read-only, to be looked up in the replica database when configured. Defaults to False.
 
         Returns:
             User: An instance of a user.
         """
-        return User.query.filter_by(email=email).first()
+        return data_access.select_user_by_email(email, replica=replica)
 
     @staticmethod
-    def get_by_api_token(api_token) -> "User":
+    def get_by_api_token(
+        api_token, replica: bool = False, allow_expired: bool = False
+    ) -> "User":
         """Retrieve a user according to its email.
 
         Args:
             api_token (str): the api_token of a user.
+            replica (bool, optional): Indicates if the user is read-only, to be looked up in the replica database when configured and the key is not too recent. Defaults to False.
+            allow_expired (bool, optional): Indicates if an expired signed key still gives its user, ex: to renew it. Defaults to False.
 
         Returns:
             User: An instance of a user.
         """
-        return User.query.filter_by(token=api_token).first()
+        if not verify_api_key(api_token, allow_expired):
+            return None
+        user = data_access.select_user_by_token(
+            api_token, replica=replica and is_replicated_api_key(api_token)
+        )
+        if user is None:
+            revoke_api_key(api_token)
+        return user
 
     @staticmethod
     def get_number_of_token_uses_by_email(email) -> int:
@@ -175,51 +292,80 @@ class User(db.Model):
         Returns:
             int: The number of times the token API has been used.
         """
-        return (
-            User.query.filter_by(email=email).first().number_of_uses_for_token
-        )
+        return User.get_by_email(
+            email, replica=True
+        ).get_number_of_uses_for_token()
 
-    @staticmethod
-    def increment_number_of_use_for_token(token: str):
+    def increment_number_of_use_for_token(self: "User", uses: int = 1):
         """Increment the number of time a token API is used.
 
+        The uses are counted in the token_usage table, not on the row of the user.
+
         Args:
-            token (str): the token api of a user.
+            self (User): The user for whom to update the token API key usage counter.
+            uses (int, optional): The number of uses to add. Defaults to 1.
         """
-        user = User.query.filter_by(token=token).first()
-        user.number_of_uses_for_token += 1
-        user.save()
+        TokenUsage.increment(
+            self.id,
+            uses,
+            int(current_app.config.get("USAGE_COUNTER_SLOTS", 1)),
+        )
 
-    def increment_number_of_use_for_token(self: "User"):
-        """Increment the number of time a token API is used.
+    def get_number_of_uses_for_token(self) -> int:
+        """Give the number of time the token API of the user is used.
 
-        Args:
-            self (User): The user for whom to update the token API key usage counter.
+        Returns:
+            int: The uses counted in the token_usage table, plus the ones of the user row not migrated yet.
         """
-        self.number_of_uses_for_token += 1
-        self.save()
+        return self.number_of_uses_for_token + data_access.select_uses(self.id)
 
     @staticmethod
-    def has_reached_usage_limit(token, max_usage_limit) -> bool:
+    def has_reached_usage_limit(token, max_usage_limit, uses: int = 1) -> bool:
         """Verify if a token API key can still be in use.
 
         Args:
             token (str): the API token key of a user.
             max_usage_limit (int): the maximum authorized usage of an API key token.
+            uses (int, optional): The number of uses of the request (ex: the passwords of a batch). Defaults to 1.
 
         Returns:
             bool: _description_
         """
-        user: User = User.query.filter_by(token=token).first()
-        if user:
-            current_nb_of_use = user.number_of_uses_for_token
-            user.increment_number_of_use_for_token()
-            return current_nb_of_use >= max_usage_limit
+        if not verify_api_key(token):
+            return True
+        # The ID and the uses of the user, not the whole user.
+        token_usage = data_access.select_token_usage(token)
+        if token_usage:
+            TokenUsage.increment(
+                token_usage.id,
+                uses,
+                int(current_app.config.get("USAGE_COUNTER_SLOTS", 1)),
+            )
+            return token_usage.uses + uses > max_usage_limit
         else:
+            revoke_api_key(token)
             return True
 
+    @staticmethod
+    def refund_usage(token, uses: int):
+        """Give back uses counted for a token API key, ex: for a request rejected after its count.
+
+        Args:
+            token (str): the API token key of a user.
+            uses (int): The number of uses to give back.
+        """
+        token_usage = data_access.select_token_usage(token)
+        if token_usage:
+            TokenUsage.increment(
+                token_usage.id,
+                -uses,
+                int(current_app.config.get("USAGE_COUNTER_SLOTS", 1)),
+            )
+
     def delete(self):
-        """Delete an instance of a user."""
+        """Delete an instance of a user, with its usage counters and its named policies."""
+        TokenUsage.reset(self.id)
+        NamedPolicy.delete_all_by_user(self.id)
         db.session.delete(self)
         db.session.commit()
 
@@ -227,3 +373,210 @@ class User(db.Model):
     def get_all():
         """Retrieve the list of all the users."""
         return User.query.all()
+
+
+class TokenUsage(db.Model):
+    """Define the model class of the usage counters of the token API keys.
+
+    A narrow table apart from the users: counting a use locks a counter row,
+    not the row of the user. The uses of a key can be spread over several
+    counter slots, summed on read, so that the concurrent requests of a key
+    do not wait for each other.
+    """
+
+    __tablename__ = "token_usage"
+
+    user_id = db.Column(
+        db.Integer, db.ForeignKey("app_user.id"), primary_key=True
+    )
+    slot = db.Column(db.SmallInteger, primary_key=True, autoincrement=False)
+    uses = db.Column(db.BigInteger, default=0, nullable=False)
+
+    @staticmethod
+    def increment(user_id: int, uses: int = 1, slots: int = 1):
+        """Add uses to a counter slot of a user, picked at random.
+
+        Args:
+            user_id (int): the ID of the user.
+            uses (int, optional): the number of uses to add. Defaults to 1.
+            slots (int, optional): the number of counter slots of the user. Defaults to 1.
+        """
+        slot = random.randrange(slots) if slots > 1 else 0  # nosec B311
+        if data_access.increment_uses(user_id, slot, uses) == 0:
+            try:
+                data_access.insert_uses(user_id, slot, uses)
+                db.session.commit()
+                return
+            except IntegrityError:
+                # Created by a concurrent request meanwhile.
+                db.session.rollback()
+                data_access.increment_uses(user_id, slot, uses)
+        db.session.commit()
+
+    @staticmethod
+    def get_uses(user_id: int) -> int:
+        """Give the number of uses of a user, summed over its counter slots.
+
+        Args:
+            user_id (int): the ID of the user.
+
+        Returns:
+            int: The number of uses.
+        """
+        return data_access.select_uses(user_id)
+
+    @staticmethod
+    def reset(user_id: int):
+        """Delete the counter slots of a user, committed with the session.
+
+        Args:
+            user_id (int): the ID of the user.
+        """
+        table = TokenUsage.__table__
+        db.session.execute(delete(table).where(table.c.user_id == user_id))
+
+    @staticmethod
+    def migrate_user_counts() -> int:
+        """Move the uses counted on the rows of the users into their counter slots.
+
+        Running it again moves nothing: the counts of the users are set to 0.
+
+        Returns:
+            int: The number of users of which the uses are moved.
+        """
+        table = TokenUsage.__table__
+        users = User.query.filter(User.number_of_uses_for_token > 0).all()
+        for user in users:
+            # The count and its move are committed together.
+            moved = db.session.execute(
+                update(table)
+                .where(table.c.user_id == user.id, table.c.slot == 0)
+                .values(uses=table.c.uses + user.number_of_uses_for_token)
+            )
+            if moved.rowcount == 0:
+                db.session.execute(
+                    insert(table).values(
+                        user_id=user.id,
+                        slot=0,
+                        uses=user.number_of_uses_for_token,
+                    )
+                )
+            user.number_of_uses_for_token = 0
+            db.session.commit()
+        return len(users)
+
+
+class NamedPolicy(db.Model):
+    """Define the model class of the scoring policies named by a user."""
+
+    __tablename__ = "named_policy"
+    __table_args__ = (db.UniqueConstraint("user_id", "name"),)
+
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(
+        db.Integer, db.ForeignKey("app_user.id"), nullable=False, index=True
+    )
+    name = db.Column(db.String(64), nullable=False)
+    policy = db.Column(db.JSON, nullable=False)
+    last_date_updated = db.Column(db.DateTime, nullable=False)
+
+    def __init__(self, user_id: int, name: str, policy: ScoringPolicy):
+        """Declare constructor for NamedPolicy.
+
+        Args:
+            user_id (int): the ID of the user owning the policy.
+            name (str): the name of the policy.
+            policy (ScoringPolicy): the scoring policy.
+        """
+        self.user_id = user_id
+        self.name = name
+        self.set_policy(policy)
+
+    def set_policy(self, policy: ScoringPolicy):
+        """Set the scoring policy of a named policy.
+
+        Args:
+            policy (ScoringPolicy): the scoring policy.
+        """
+        self.policy = policy.as_config()
+        self.last_date_updated = datetime.datetime.utcnow()
+
+    def get_policy(self) -> ScoringPolicy:
+        """Give the scoring policy of a named policy.
+
+        Returns:
+            ScoringPolicy: the scoring policy.
+        """
+        return ScoringPolicy(**self.policy)
+
+    def save(self):
+        """Save an instance of a named policy in the database."""
+        if not self.id:
+            db.session.add(self)
+        db.session.commit()
+
+    def delete(self):
+        """Delete an instance of a named policy."""
+        db.session.delete(self)
+        db.session.commit()
+
+    def __repr__(self):
+        """Set the representation of an instance of a named policy.
+
+        Returns:
+            str: An instance of a named policy.
+        """
+        return f"<NamedPolicy {self.name}, user: {self.user_id}>"
+
+    @staticmethod
+    def get_by_user_and_name(user_id: int, name: str) -> "NamedPolicy":
+        """Retrieve a named policy of a user.
+
+        Args:
+            user_id (int): the ID of a user.
+            name (str): the name of the policy.
+
+        Returns:
+            NamedPolicy: An instance of a named policy.
+        """
+        return NamedPolicy.query.filter_by(user_id=user_id, name=name).first()
+
+    @staticmethod
+    def get_all_by_user(user_id: int) -> list:
+        """Retrieve the named policies of a user.
+
+        Args:
+            user_id (int): the ID of a user.
+
+        Returns:
+            list: The named policies of the user, by name.
+        """
+        return (
+            NamedPolicy.query.filter_by(user_id=user_id)
+            .order_by(NamedPolicy.name)
+            .all()
+        )
+
+    @staticmethod
+    def delete_all_by_user(user_id: int):
+        """Delete the named policies of a user, committed with the session.
+
+        Args:
+            user_id (int): the ID of the user.
+        """
+        table = NamedPolicy.__table__
+        db.session.execute(delete(table).where(table.c.user_id == user_id))
+
+    @staticmethod
+    def load_policy(api_key: str, name: str) -> ScoringPolicy | None:
+        """Load the scoring policy of an API key by its name.
+
+        Args:
+            api_key (str): the API token key of the user owning the policy.
+            name (str): the name of the policy.
+
+        Returns:
+            ScoringPolicy: the scoring policy, None if the user has no policy of this name.
+        """
+        policy = data_access.select_named_policy(api_key, name)
+        return ScoringPolicy(**policy) if policy else None
@@ -0,0 +1,279 @@
+"""Profile a sample of the hot requests and keep the profiles on disk.
+
+A request of a profiled endpoint is profiled when:
+
+- it is drawn among the PROFILING_SAMPLE_RATE fraction of the requests,
+- or its PROFILING_HEADER header holds one of the PROFILING_ALLOWED_KEYS.
+
+Its profile is written under LOG_PATH/profiles, in one of the formats:
+
+- "pstats": the cProfile statistics, for pstats, snakeviz...
+- "text": the cProfile statistics sorted by cumulative time,
+- "collapsed": the stacks sampled every PROFILING_INTERVAL seconds, one
+  "frame;frame;frame count" line per stack, for flame graphs.
+
+The profiles directory is a ring: the oldest profiles are removed once
+there are more than PROFILING_MAX_FILES files or PROFILING_MAX_BYTES bytes.
+"""
+
+import cProfile
+import hmac
+import io
+import itertools
+import logging
+import os
+import pstats
+import random
+import sys
+import threading
+import time
+from collections import Counter
+
+from flask import Flask, g, request
+
+logger = logging.getLogger(__name__)
+
+FORMAT_PSTATS: str = "pstats"
+FORMAT_TEXT: str = "text"
+FORMAT_COLLAPSED: str = "collapsed"
+FORMAT_EXTENSIONS: dict = {
+    FORMAT_PSTATS: "prof",
+    FORMAT_TEXT: "txt",
+    FORMAT_COLLAPSED: "collapsed",
+}
+
+DEFAULT_ENDPOINTS: str = (
+    "api_urls.score api_urls.bulk_scores api_urls.s3_bulk_scores"
+)
+DEFAULT_HEADER: str = "X-Profile-Key"
+DEFAULT_INTERVAL: float = 0.001
+DEFAULT_MAX_FILES: int = 100
+DEFAULT_MAX_BYTES: int = 50 * 1024 * 1024
+PROFILES_DIRECTORY: str = "profiles"
+
+
+class StackSampler:
+    """Declare a sampler of the stacks of a thread."""
+
+    def __init__(self, thread_id: int, interval: float) -> None:
+        """Instanciate a sampler of the stacks of a thread.
+
+        Args:
+            thread_id (int): The id of the thread to sample.
+            interval (float): The time between two samples, in seconds.
+        """
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks = Counter()
+        self.__stopped = threading.Event()
+        self.__thread = threading.Thread(target=self.__run, daemon=True)
+
+    def __run(self):
+        while not self.__stopped.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(
+                    "{}:{}".format(
+                        frame.f_globals.get("__name__", code.co_filename),
+                        code.co_name,
+                    )
+                )
+                frame = frame.f_back
+            if stack:
+                self.stacks[";".join(reversed(stack))] += 1
+
+    def enable(self):
+        """Start sampling."""
+        self.__thread.start()
+
+    def disable(self):
+        """Stop sampling."""
+        self.__stopped.set()
+        self.__thread.join()
+
+    def dump(self, stream):
+        """Write the collapsed stacks.
+
+        Args:
+            stream (file): The text stream to write to.
+        """
+        for stack, count in self.stacks.most_common():
+            stream.write("{} {}\n".format(stack, count))
+
+
+class RequestProfiler:
+    """Declare the profiler of the requests of an application."""
+
+    def __init__(
+        self,
+        directory: str,
+        endpoints: set,
+        sample_rate: float = 0.0,
+        header: str = DEFAULT_HEADER,
+        allowed_keys: set = None,
+        output_format: str = FORMAT_PSTATS,
+        interval: float = DEFAULT_INTERVAL,
+        max_files: int = DEFAULT_MAX_FILES,
+        max_bytes: int = DEFAULT_MAX_BYTES,
+    ) -> None:
+        """Instanciate a requests profiler.
+
+        The settings are plain attributes, they can be changed while the application runs.
+
+        Args:
+            directory (str): The directory of the profiles.
+            endpoints (set): The names of the profiled endpoints (ex: api_urls.score).
+            sample_rate (float, optional): The fraction of the requests to profile. Defaults to 0.0.
+            header (str, optional): The header that requests a profile. Defaults to X-Profile-Key.
+            allowed_keys (set, optional): The values of the header that are honored. Defaults to None.
+            output_format (str, optional): pstats, text or collapsed. Defaults to pstats.
+            interval (float, optional): The time between two stack samples of the collapsed format, in seconds. Defaults to 0.001.
+            max_files (int, optional): The maximum number of profiles kept. Defaults to 100.
+            max_bytes (int, optional): The maximum size of the profiles kept. Defaults to 50MB.
+        """
+        if output_format not in FORMAT_EXTENSIONS:
+            raise ValueError(
+                "Unknown profile format: {}".format(output_format)
+            )
+        self.directory = directory
+        self.endpoints = endpoints
+        self.sample_rate = sample_rate
+        self.header = header
+        self.allowed_keys = allowed_keys or set()
+        self.output_format = output_format
+        self.interval = interval
+        self.max_files = max_files
+        self.max_bytes = max_bytes
+        self.__lock = threading.Lock()
+        self.__sequence = itertools.count()
+
+    def is_requested(self) -> bool:
+        """Indicate if the current request must be profiled.
+
+        Returns:
+            bool: True to profile the request.
+        """
+        if request.endpoint not in self.endpoints:
+            return False
+        key = request.headers.get(self.header)
+        if key and any(
+            hmac.compare_digest(key, allowed) for allowed in self.allowed_keys
+        ):
+            return True
+        return random.random() < self.sample_rate  # nosec B311
+
+    def start(self):
+        """Start profiling the current request, if requested."""
+        if not self.is_requested():
+            return
+        if self.output_format == FORMAT_COLLAPSED:
+            profiler = StackSampler(threading.get_ident(), self.interval)
+        else:
+            profiler = cProfile.Profile()
+        try:
+            profiler.enable()
+        except ValueError as e:
+            # Another profiler is already active in this process.
+            logger.warning("The request can not be profiled: %s", e)
+            return
+        g.request_profile = (profiler, time.perf_counter())
+
+    def stop(self, exception=None):
+        """Stop profiling the current request and store its profile.
+
+        Args:
+            exception (Exception, optional): The exception raised by the request. Defaults to None.
+        """
+        profile = g.pop("request_profile", None)
+        if profile is None:
+            return
+        profiler, start = profile
+        profiler.disable()
+        try:
+            self.__store(profiler, time.perf_counter() - start)
+        except OSError as e:
+            logger.error("The request profile can not be stored: %s", e)
+
+    def __store(self, profiler, duration: float):
+        os.makedirs(self.directory, exist_ok=True)
+        path = os.path.join(
+            self.directory,
+            "{}-{}-{}-{}-{}ms.{}".format(
+                time.strftime("%Y%m%dT%H%M%S"),
+                os.getpid(),
+                next(self.__sequence),
+                request.endpoint,
+                int(duration * 1000),
+                FORMAT_EXTENSIONS[self.output_format],
+            ),
+        )
+        if self.output_format == FORMAT_PSTATS:
+            profiler.dump_stats(path)
+        else:
+            stream = io.StringIO()
+            if self.output_format == FORMAT_TEXT:
+                pstats.Stats(profiler, stream=stream).sort_stats(
+                    pstats.SortKey.CUMULATIVE
+                ).print_stats()
+            else:
+                profiler.dump(stream)
+            with open(path, "w", encoding="utf-8") as f:
+                f.write(stream.getvalue())
+        self.__trim()
+
+    def __trim(self):
+        """Remove the oldest profiles beyond the limits of the ring."""
+        with self.__lock:
+            profiles = []
+            for entry in os.scandir(self.directory):
+                try:
+                    stat = entry.stat()
+                except FileNotFoundError:
+                    continue
+                profiles.append((stat.st_mtime_ns, entry.path, stat.st_size))
+            profiles.sort(reverse=True)
+
+            kept_bytes = 0
+            for position, (_, path, size) in enumerate(profiles):
+                kept_bytes += size
+                if position >= self.max_files or kept_bytes > self.max_bytes:
+                    try:
+                        os.remove(path)
+                    except FileNotFoundError:
+                        pass
+
+
+def profiling_init_app(app: Flask) -> RequestProfiler:
+    """Register the requests profiler of the flask app.
+
+    Args:
+        app (Flask): The flask application.
+
+    Returns:
+        RequestProfiler: The profiler, also available in app.extensions["profiler"].
+    """
+    profiler = RequestProfiler(
+        directory=os.path.join(
+            app.config.get("LOG_PATH", "logs"), PROFILES_DIRECTORY
+        ),
+        endpoints=set(
+            app.config.get("PROFILING_ENDPOINTS", DEFAULT_ENDPOINTS).split()
+        ),
+        sample_rate=float(app.config.get("PROFILING_SAMPLE_RATE", 0.0)),
+        header=app.config.get("PROFILING_HEADER", DEFAULT_HEADER),
+        allowed_keys=set(app.config.get("PROFILING_ALLOWED_KEYS", "").split()),
+        output_format=app.config.get("PROFILING_FORMAT", FORMAT_PSTATS),
+        interval=float(app.config.get("PROFILING_INTERVAL", DEFAULT_INTERVAL)),
+        max_files=int(
+            app.config.get("PROFILING_MAX_FILES", DEFAULT_MAX_FILES)
+        ),
+        max_bytes=int(
+            app.config.get("PROFILING_MAX_BYTES", DEFAULT_MAX_BYTES)
+        ),
+    )
+    app.before_request(profiler.start)
+    app.teardown_request(profiler.stop)
+    app.extensions["profiler"] = profiler
+    return profiler
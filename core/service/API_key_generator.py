@@ -1,8 +1,19 @@
-"""Define the module to hamdle the API Token creation."""
+"""Define the module to hamdle the API Token creation.
+
+The API keys are signed with the secret key of the application and embed
+the ID of their user, their version and their issue time: the forged,
+expired and revoked keys are rejected without a database lookup, the user
+being fetched only for the quota accounting. The revoked keys (renewed or
+unknown to the database) are kept in memory, per process.
+"""
 
 import binascii
 import hashlib
 import hmac
+import threading
+import time
+from collections import OrderedDict
+from typing import NamedTuple
 
 
 def create_sha256_signature(key: str, message: str) -> hmac.HMAC:
@@ -18,3 +29,179 @@ def create_sha256_signature(key: str, message: str) -> hmac.HMAC:
     byte_key = binascii.unhexlify(key)
     message = message.encode("UTF-8")
     return hmac.new(byte_key, message, hashlib.sha512).hexdigest().upper()
+
+
+API_KEY_PREFIX: str = "pk1"
+DEFAULT_REVOCATION_MAX_ENTRIES: int = 100000
+_SIGNATURE_LENGTH: int = 64
+
+
+class ApiKeyClaims(NamedTuple):
+    """Declare the claims embedded in a signed API key."""
+
+    user_id: int
+    version: int
+    issued_at: int
+
+
+def _sign_api_key_claims(key: bytes, claims: str) -> str:
+    return hmac.new(key, claims.encode("UTF-8"), hashlib.sha256).hexdigest()
+
+
+def create_signed_api_key(
+    key: str, user_id: int, version: int, issued_at: int = None
+) -> str:
+    """Generate an API key embedding its user, its version and its issue time, signed with a secret key.
+
+       Ex: "pk1.42.3.1718000000.<hmac-sha256>", verifiable without a database lookup.
+
+    Args:
+        key (str): The secret key, hexadecimal.
+        user_id (int): The ID of the user owning the key.
+        version (int): The version of the key, incremented at each renewal.
+        issued_at (int, optional): The issue time of the key, in seconds since the epoch. Defaults to None, for now.
+
+    Returns:
+        str: The Token API Key of the user.
+    """
+    if issued_at is None:
+        issued_at = int(time.time())
+    claims = ".".join(
+        [API_KEY_PREFIX, str(int(user_id)), str(version), str(issued_at)]
+    )
+    signature = _sign_api_key_claims(binascii.unhexlify(key), claims)
+    return ".".join([claims, signature])
+
+
+def is_signed_api_key(api_key: str) -> bool:
+    """Indicate if an API key has the signed format, whatever its validity.
+
+    Args:
+        api_key (str): The API key.
+
+    Returns:
+        bool: True for a signed API key, False for a legacy one.
+    """
+    return isinstance(api_key, str) and api_key.startswith(
+        API_KEY_PREFIX + "."
+    )
+
+
+class ApiKeyVerifier:
+    """Declare the verifier of the signed API keys, without the database."""
+
+    def __init__(
+        self,
+        key: str,
+        max_age: int = 0,
+        accept_legacy: bool = True,
+        max_revocations: int = DEFAULT_REVOCATION_MAX_ENTRIES,
+        clock=time.time,
+    ) -> None:
+        """Instanciate a verifier of the API keys signed with a secret key.
+
+        Args:
+            key (str): The secret key, hexadecimal.
+            max_age (int, optional): The lifetime of a signed API key, in seconds. Defaults to 0, for no expiry.
+            accept_legacy (bool, optional): Indicates if the unsigned keys of the former format are still accepted, to be looked up in the database. Defaults to True.
+            max_revocations (int, optional): The maximum number of revoked keys kept in memory, the oldest ones are forgotten first. Defaults to 100000.
+            clock (function, optional): The time source, in seconds since the epoch. Defaults to time.time.
+        """
+        self.__key = binascii.unhexlify(key)
+        self.__max_age = max_age
+        self.__accept_legacy = accept_legacy
+        self.__max_revocations = max_revocations
+        self.__clock = clock
+        self.__revoked = OrderedDict()
+        self.__lock = threading.Lock()
+
+    def get_claims(
+        self, api_key: str, allow_expired: bool = False
+    ) -> ApiKeyClaims | None:
+        """Give the claims of a valid signed API key.
+
+        Args:
+            api_key (str): The API key.
+            allow_expired (bool, optional): Indicates if an expired key is still valid, ex: to renew it. Defaults to False.
+
+        Returns:
+            ApiKeyClaims: The claims of the key, None when the key is not signed, forged, expired or revoked.
+        """
+        if not is_signed_api_key(api_key):
+            return None
+        claims, _, signature = api_key.rpartition(".")
+        # compare_digest only takes ASCII strings.
+        if (
+            len(signature) != _SIGNATURE_LENGTH
+            or not signature.isascii()
+            or not hmac.compare_digest(
+                signature, _sign_api_key_claims(self.__key, claims)
+            )
+        ):
+            return None
+        _, user_id, version, issued_at = claims.split(".")
+        claims = ApiKeyClaims(int(user_id), int(version), int(issued_at))
+        if (
+            self.__max_age
+            and not allow_expired
+            and claims.issued_at + self.__max_age < int(self.__clock())
+        ):
+            return None
+        if api_key in self.__revoked:
+            return None
+        return claims
+
+    def verify(self, api_key: str, allow_expired: bool = False) -> bool:
+        """Indicate if an API key may be looked up in the database, with pure CPU.
+
+        Args:
+            api_key (str): The API key.
+            allow_expired (bool, optional): Indicates if an expired signed key is still valid, ex: to renew it. Defaults to False.
+
+        Returns:
+            bool: True for a valid signed API key or a legacy one when they are accepted, False otherwise.
+        """
+        if not isinstance(api_key, str) or not api_key:
+            return False
+        if not is_signed_api_key(api_key):
+            return self.__accept_legacy
+        return self.get_claims(api_key, allow_expired) is not None
+
+    def revoke(self, api_key: str):
+        """Reject a signed API key from now on, in this process.
+
+        Args:
+            api_key (str): The renewed or unknown API key.
+        """
+        if not is_signed_api_key(api_key):
+            return
+        with self.__lock:
+            self.__revoked[api_key] = True
+            self.__revoked.move_to_end(api_key)
+            while len(self.__revoked) > self.__max_revocations:
+                self.__revoked.popitem(last=False)
+
+
+def api_key_verifier_init_app(app) -> ApiKeyVerifier:
+    """Create the API keys verifier of the flask app.
+
+    Args:
+        app (Flask): The flask application.
+
+    Returns:
+        ApiKeyVerifier: The verifier of the API keys.
+    """
+    accept_legacy = str(app.config.get("API_KEY_ACCEPT_LEGACY", "true"))
+    api_key_verifier = ApiKeyVerifier(
+        key=app.config["SECRET_KEY"],
+        max_age=int(app.config.get("API_KEY_MAX_AGE", 0)),
+        accept_legacy=accept_legacy.lower() in ("true", "yes", "1"),
+        max_revocations=int(
+            app.config.get(
+                "API_KEY_REVOCATION_MAX_ENTRIES",
+                DEFAULT_REVOCATION_MAX_ENTRIES,
+            )
+        ),
+    )
+    app.extensions["api_key_verifier"] = api_key_verifier
+    return api_key_verifier
@@ -0,0 +1,401 @@
+"""Check if a password belongs to a breach corpus with an on-disk index.
+
+The index is built offline from a list of SHA-1 hashes (one "HASH" or
+"HASH:COUNT" per line, as distributed by Have I Been Pwned) into a single
+file made of:
+
+- a header: magic, fan-out bits and number of records,
+- a fan-out table: for each prefix of `fanout_bits` bits, the position of
+  its first record (2^fanout_bits + 1 unsigned 32 bits integers),
+- the records sorted by hash: 20 bytes of SHA-1 followed by the number of
+  times the hash was seen (unsigned 32 bits integer).
+
+The file is memory-mapped read-only, so the pages are shared through the
+page cache by all the gunicorn and Celery processes of a host. A lookup is
+a fan-out jump followed by a binary search in the bucket of the prefix.
+
+To build an index:
+    python -m core.service.breach_index pwned-passwords-sha1.txt breach.idx
+"""
+
+import argparse
+import array
+import hashlib
+import logging
+import mmap
+import os
+import struct
+import sys
+import threading
+import time
+from itertools import accumulate
+
+logger = logging.getLogger(__name__)
+
+INDEX_MAGIC: bytes = b"PWBRIDX1"
+DEFAULT_FANOUT_BITS: int = 20
+HASH_SIZE: int = 20
+INDEX_CHECK_INTERVAL: float = 5.0
+
+_HEADER = struct.Struct("<8sB3xQ")
+_RECORD = struct.Struct("<20sI")
+_OFFSET = struct.Struct("<I")
+_MAX_RECORDS: int = 2**32 - 1
+
+# The index path -> the index, the signature of its file and its check time.
+_loaded_indexes = {}
+_loaded_indexes_lock = threading.Lock()
+
+
+class BreachIndexError(Exception):
+    """Raised when a breach index can not be built or loaded."""
+
+    pass
+
+
+def _parse_hash_line(line: str) -> tuple:
+    """Parse a line of a hash list.
+
+    Args:
+        line (str): A line "HASH" or "HASH:COUNT".
+
+    Returns:
+        tuple: The 20 bytes of the hash and its count.
+    """
+    digest, _, count = line.strip().partition(":")
+    try:
+        digest = bytes.fromhex(digest)
+        count = int(count) if count else 1
+    except ValueError:
+        raise BreachIndexError("Invalid hash list line: {!r}".format(line))
+    if len(digest) != HASH_SIZE:
+        raise BreachIndexError("Invalid hash list line: {!r}".format(line))
+    return digest, min(count, _MAX_RECORDS)
+
+
+def build_breach_index(
+    source_path: str,
+    index_path: str,
+    fanout_bits: int = DEFAULT_FANOUT_BITS,
+    presorted: bool = True,
+) -> int:
+    """Build the on-disk index from a list of SHA-1 hashes.
+
+    Args:
+        source_path (str): The path to the hash list.
+        index_path (str): The path of the index file to write.
+        fanout_bits (int, optional): The number of leading bits of the hashes used to partition the records. Defaults to 20, that is 5 hex characters.
+        presorted (bool, optional): Indicates if the hash list is already sorted by hash, which allows to stream it. Otherwise the hashes are sorted in memory. Defaults to True.
+
+    Returns:
+        int: The number of records of the index.
+    """
+    if not 0 < fanout_bits <= 24:
+        raise BreachIndexError("The fan-out bits must be between 1 and 24.")
+
+    with open(source_path, encoding="utf-8") as source:
+        records = (_parse_hash_line(line) for line in source if line.strip())
+        if not presorted:
+            records = iter(sorted(records))
+        return _write_index(records, index_path, fanout_bits)
+
+
+def _write_index(records, index_path: str, fanout_bits: int) -> int:
+    bucket_shift = HASH_SIZE * 8 - fanout_bits
+    bucket_sizes = [0] * (2**fanout_bits)
+    body_path = index_path + ".body"
+    temporary_path = index_path + ".tmp"
+    number_of_records = 0
+    previous = None
+    try:
+        with open(body_path, "wb") as body:
+            for digest, count in records:
+                if previous is not None and digest <= previous:
+                    if digest == previous:
+                        continue
+                    raise BreachIndexError(
+                        "The hash list is not sorted, build it with"
+                        " presorted=False."
+                    )
+                previous = digest
+                bucket_sizes[
+                    int.from_bytes(digest, "big") >> bucket_shift
+                ] += 1
+                body.write(_RECORD.pack(digest, count))
+                number_of_records += 1
+        if number_of_records > _MAX_RECORDS:
+            raise BreachIndexError("Too many hashes for a breach index.")
+
+        # The live index may be mapped by the workers: it is replaced by a
+        # new file, never rewritten in place.
+        with open(temporary_path, "wb") as index, open(
+            body_path, "rb"
+        ) as body:
+            index.write(
+                _HEADER.pack(INDEX_MAGIC, fanout_bits, number_of_records)
+            )
+            offsets = array.array("I", accumulate(bucket_sizes, initial=0))
+            if sys.byteorder == "big":
+                offsets.byteswap()
+            index.write(offsets.tobytes())
+            while chunk := body.read(1024 * 1024):
+                index.write(chunk)
+            index.flush()
+            os.fsync(index.fileno())
+        os.replace(temporary_path, index_path)
+    finally:
+        for path in (body_path, temporary_path):
+            if os.path.exists(path):
+                os.remove(path)
+    return number_of_records
+
+
+class BreachIndex:
+    """Declare the read-only, memory-mapped breach index."""
+
+    def __init__(self, index_path: str) -> None:
+        """Map an index file in memory.
+
+        Args:
+            index_path (str): The path to an index built by build_breach_index.
+        """
+        with open(index_path, "rb") as f:
+            stat = os.fstat(f.fileno())
+            self.generation = "{:x}-{:x}".format(
+                stat.st_mtime_ns, stat.st_size
+            )
+            try:
+                self.__mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            except ValueError:
+                raise BreachIndexError(
+                    "The file {} is not a breach index.".format(index_path)
+                )
+        try:
+            magic, self.fanout_bits, self.number_of_records = (
+                _HEADER.unpack_from(self.__mm, 0)
+            )
+        except struct.error:
+            magic = None
+        if magic != INDEX_MAGIC:
+            self.__mm.close()
+            raise BreachIndexError(
+                "The file {} is not a breach index.".format(index_path)
+            )
+        self.__bucket_shift = HASH_SIZE * 8 - self.fanout_bits
+        self.__fanout_start = _HEADER.size
+        self.records_start = self.__fanout_start + _OFFSET.size * (
+            2**self.fanout_bits + 1
+        )
+
+    def bucket_bounds(self, prefix: int) -> tuple:
+        """Give the positions of the records of a fan-out prefix.
+
+        Args:
+            prefix (int): The first fanout_bits bits of the hashes.
+
+        Returns:
+            tuple: The first record position and the position after the last record.
+        """
+        position = self.__fanout_start + prefix * _OFFSET.size
+        return (
+            _OFFSET.unpack_from(self.__mm, position)[0],
+            _OFFSET.unpack_from(self.__mm, position + _OFFSET.size)[0],
+        )
+
+    def record(self, position: int) -> tuple:
+        """Read a record of the index.
+
+        Args:
+            position (int): The position of the record.
+
+        Returns:
+            tuple: The 20 bytes of the hash and its count.
+        """
+        return _RECORD.unpack_from(
+            self.__mm, self.records_start + position * _RECORD.size
+        )
+
+    def __bisect(self, low: int, high: int, digest: bytes, right: bool) -> int:
+        """Find the insertion position of a hash in the records.
+
+        Args:
+            low (int): The first position to search.
+            high (int): The position after the last one to search.
+            digest (bytes): The 20 bytes of the hash to position.
+            right (bool): Give the position after the equal records instead of before.
+
+        Returns:
+            int: The insertion position of the hash.
+        """
+        while low < high:
+            middle = (low + high) // 2
+            start = self.records_start + middle * _RECORD.size
+            candidate = self.__mm[start : start + HASH_SIZE]
+            if candidate < digest or (right and candidate == digest):
+                low = middle + 1
+            else:
+                high = middle
+        return low
+
+    def count_hash(self, digest: bytes) -> int:
+        """Give the number of times a SHA-1 hash appears in the breaches.
+
+        Args:
+            digest (bytes): The 20 bytes of the SHA-1 hash.
+
+        Returns:
+            int: The count of the hash, 0 if it is not breached.
+        """
+        low, high = self.bucket_bounds(
+            int.from_bytes(digest, "big") >> self.__bucket_shift
+        )
+        position = self.__bisect(low, high, digest, right=False)
+        if position < high:
+            candidate, count = self.record(position)
+            if candidate == digest:
+                return count
+        return 0
+
+    def prefix_bounds(self, prefix: str) -> tuple:
+        """Give the positions of the records of which the hash starts with a prefix.
+
+        Args:
+            prefix (str): The first hexadecimal characters of the hashes.
+
+        Returns:
+            tuple: The first record position and the position after the last record.
+        """
+        bits = len(prefix) * 4
+        value = int(prefix, 16)
+        if bits == self.fanout_bits:
+            return self.bucket_bounds(value)
+
+        first = value << (HASH_SIZE * 8 - bits)
+        last = ((value + 1) << (HASH_SIZE * 8 - bits)) - 1
+        low = self.bucket_bounds(first >> self.__bucket_shift)[0]
+        high = self.bucket_bounds(last >> self.__bucket_shift)[1]
+        return (
+            self.__bisect(
+                low, high, first.to_bytes(HASH_SIZE, "big"), right=False
+            ),
+            self.__bisect(
+                low, high, last.to_bytes(HASH_SIZE, "big"), right=True
+            ),
+        )
+
+    def iter_range(self, prefix: str, lines_per_chunk: int = 256):
+        """Stream the suffixes of the hashes starting with a prefix.
+
+        The lines "SUFFIX:COUNT" are produced by chunks, so that a bucket is never fully loaded in memory.
+
+        Args:
+            prefix (str): The first hexadecimal characters of the hashes.
+            lines_per_chunk (int, optional): The number of lines of a chunk. Defaults to 256.
+
+        Yields:
+            str: The chunks of lines of the suffixes.
+        """
+        low, high = self.prefix_bounds(prefix)
+        skip = len(prefix)
+        for chunk_start in range(low, high, lines_per_chunk):
+            yield "".join(
+                "{}:{}\r\n".format(digest.hex().upper()[skip:], count)
+                for digest, count in (
+                    self.record(position)
+                    for position in range(
+                        chunk_start, min(chunk_start + lines_per_chunk, high)
+                    )
+                )
+            )
+
+    def is_breached(self, password: str) -> bool:
+        """Indicate if a password appears in the breaches.
+
+        Args:
+            password (str): The password to check.
+
+        Returns:
+            bool: True if the password is breached.
+        """
+        digest = hashlib.sha1(password.encode("utf-8")).digest()  # nosec B324
+        return self.count_hash(digest) > 0
+
+    def close(self):
+        """Unmap the index file."""
+        self.__mm.close()
+
+
+def _file_signature(index_path: str) -> tuple | None:
+    try:
+        stat = os.stat(index_path)
+    except OSError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+
+def _open_breach_index(index_path: str) -> BreachIndex | None:
+    try:
+        return BreachIndex(index_path)
+    except (OSError, BreachIndexError) as e:
+        logger.error("The breach index can not be loaded: %s", e)
+        return None
+
+
+def get_breach_index(
+    index_path: str, check_interval: float = INDEX_CHECK_INTERVAL
+) -> BreachIndex | None:
+    """Give the breach index of this process, opened on first use.
+
+    The file is checked again every check_interval seconds at most: a rebuilt index is opened again, with a new generation, and a missing or invalid one is retried once its file changes.
+
+    Args:
+        index_path (str): The path to the index file.
+        check_interval (float, optional): The seconds between two checks of the file. Defaults to INDEX_CHECK_INTERVAL.
+
+    Returns:
+        BreachIndex: The index, None if no valid index is available at this path.
+    """
+    if not index_path:
+        return None
+    now = time.monotonic()
+    loaded = _loaded_indexes.get(index_path)
+    if loaded is not None and now - loaded[2] < check_interval:
+        return loaded[0]
+
+    with _loaded_indexes_lock:
+        loaded = _loaded_indexes.get(index_path)
+        if loaded is not None and now - loaded[2] < check_interval:
+            return loaded[0]
+        signature = _file_signature(index_path)
+        if loaded is not None and signature == loaded[1]:
+            index = loaded[0]
+        else:
+            # The previous index stays mapped while it is still in use.
+            index = _open_breach_index(index_path)
+        _loaded_indexes[index_path] = (index, signature, now)
+        return index
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Build a breach index from a list of SHA-1 hashes."
+    )
+    parser.add_argument("source", help="The hash list, HASH[:COUNT] lines.")
+    parser.add_argument("index", help="The index file to write.")
+    parser.add_argument("--fanout-bits", type=int, default=DEFAULT_FANOUT_BITS)
+    parser.add_argument(
+        "--unsorted",
+        action="store_true",
+        help="Sort the hashes in memory before writing the index.",
+    )
+    args = parser.parse_args()
+    print(
+        "{} hashes indexed.".format(
+            build_breach_index(
+                args.source,
+                args.index,
+                fanout_bits=args.fanout_bits,
+                presorted=not args.unsorted,
+            )
+        )
+    )
@@ -1,122 +1,398 @@
-"""Validate the payload for the API."""
+"""Validate the payload for the API.
 
-from functools import wraps
+The scoring payload is decoded in a single pass into a typed and hashable
+ScoringRequest, of which the policy keys the per-process caches of the
+scoring engine. A valid payload goes through straight-line checks; an
+invalid one is then walked field by field to report each invalid field
+with a precise message.
+
+Instead of its characteristics, a payload can reference its policy with a
+policy id (see password_scoring.policy) or, by its name, a policy that its
+API key registered on the server: the names have no hyphen, unlike the
+policy ids.
+"""
+
+import re
+from typing import NamedTuple
 
 from core.service.email_validator import EmailValidator
+from password_scoring.policy import ScoringPolicy, decode_policy_id
 
 PAYLOAD_TYPE_SCORING: str = "password_scoring"
 PAYLOAD_TYPE_EMAIL: str = "email"
 
 
-def has_characteristics(f):
-    """Define a decorator to verify the existence of the key characteristics in the payload.
+class PayloadValidationError(ValueError):
+    """Raised when a payload can not be decoded."""
+
+    def __init__(self, errors: list) -> None:
+        """Instanciate a payload validation error.
+
+        Args:
+            errors (list): The messages of the invalid fields.
+        """
+        super().__init__("; ".join(errors))
+        self.errors = errors
+
+
+class ScoringRequest(NamedTuple):
+    """Declare a decoded scoring payload."""
+
+    password: str
+    policy: ScoringPolicy
+
+
+class BatchScoringRequest(NamedTuple):
+    """Declare a decoded batch scoring payload."""
+
+    passwords: list
+    policy: ScoringPolicy
+
+
+_POLICY_NAME = re.compile(r"[a-z][a-z0-9_]{0,63}")
+
+
+def is_valid_policy_name(name) -> bool:
+    """Indicate if a policy name is valid.
 
     Args:
-        f (function): the call back function for this decorator.
+        name (str): The name of a policy.
 
     Returns:
-        function | bool: Return False when the key is not present. Proceed to the callback function otherwise.
+        bool: True for 1 to 64 lowercase letters, digits or underscores, starting with a letter.
     """
+    return isinstance(name, str) and _POLICY_NAME.fullmatch(name) is not None
 
-    @wraps(f)
-    def decorated(*args, **kwargs):
-        if not args[0].get("characteristics"):
-            return False
-        return f(*args, **kwargs)
 
-    return decorated
+def encode_policy_payload(policy: ScoringPolicy) -> dict:
+    """Give the payload fields of a scoring policy.
 
+    Args:
+        policy (ScoringPolicy): The scoring policy.
 
-def __is_payload_empty(payload: dict):
-    return True if payload is None else False
+    Returns:
+        dict: The characteristics, the minimum score and the options of the policy, as sent to /score.
+    """
+    payload = {"characteristics": {}}
+    for section, key, field, _check, _required in _SCORING_FIELDS:
+        if section is None:
+            payload[key] = getattr(policy, field)
+        else:
+            payload[section][key] = getattr(policy, field)
+    return payload
 
 
-def __has_password(payload: dict):
-    return True if payload.get("password") else False
+def _boolean(value) -> str | None:
+    return None if isinstance(value, bool) else "must be a boolean"
 
 
-def __has_email(payload: dict):
-    return True if payload.get("email") else False
+def _positive_integer(value) -> str | None:
+    if isinstance(value, int) and not isinstance(value, bool) and value > 0:
+        return None
+    return "must be a positive integer"
 
 
-@has_characteristics
-def __has_min_length(payload: dict):
-    return True if payload.get("characteristics").get("min_length") else False
+def _positive_number(value) -> str | None:
+    if (
+        isinstance(value, (int, float))
+        and not isinstance(value, bool)
+        and value > 0
+    ):
+        return None
+    return "must be a positive number"
 
 
-@has_characteristics
-def __has_max_length(payload: dict):
-    return True if payload.get("characteristics").get("max_length") else False
+def _non_empty_string(value) -> str | None:
+    if isinstance(value, str) and value:
+        return None
+    return "must be a non empty string"
 
 
-@has_characteristics
-def __has_uppercase(payload: dict):
-    return (
-        True
-        if payload.get("characteristics").get("has_uppercase") is not None
-        else False
-    )
+# (section of the payload, key, policy field, check, required)
+_SCORING_FIELDS: tuple = (
+    (None, "min_accepted_score", "min_score", _positive_number, True),
+    (None, "analyze_patterns", "analyze_patterns", _boolean, False),
+    (None, "reject_breached", "reject_breached", _boolean, False),
+    ("characteristics", "min_length", "min_characters", _positive_integer, True),
+    ("characteristics", "max_length", "max_characters", _positive_integer, True),
+    ("characteristics", "has_uppercase", "has_uppercase", _boolean, True),
+    ("characteristics", "has_lowercase", "has_lowercase", _boolean, True),
+    ("characteristics", "has_digits", "has_digits", _boolean, True),
+    ("characteristics", "has_symbols", "has_symbols", _boolean, True),
+    ("characteristics", "has_spaces", "has_spaces", _boolean, True),
+)  # fmt: skip
 
+# Pack the already checked values without the NamedTuple constructors.
+_pack = tuple.__new__
 
-@has_characteristics
-def __has_lowercase(payload: dict):
-    return (
-        True
-        if payload.get("characteristics").get("has_lowercase") is not None
-        else False
-    )
 
+def decode_scoring_payload(payload, resolve_policy=None) -> ScoringRequest:
+    """Decode and validate a scoring payload.
 
-@has_characteristics
-def __has_digit(payload: dict):
-    return (
-        True
-        if payload.get("characteristics").get("has_digits") is not None
-        else False
+    Args:
+        payload (dict): The body of a scoring request.
+        resolve_policy (function, optional): Give the ScoringPolicy of a policy name, None when it does not exist. Defaults to None, for no named policy.
+
+    Raises:
+        PayloadValidationError: When the payload is invalid, with a message per invalid field.
+
+    Returns:
+        ScoringRequest: The password to score and its policy.
+    """
+    if type(payload) is dict:
+        password = payload.get("password")
+        if type(password) is str and password:
+            policy = _decode_policy(payload, resolve_policy)
+            if policy is not None:
+                return _pack(ScoringRequest, (password, policy))
+
+    raise PayloadValidationError(
+        _scoring_payload_errors(payload, _password_errors, resolve_policy)
     )
 
 
-@has_characteristics
-def __has_symbol(payload: dict):
-    return (
-        True
-        if payload.get("characteristics").get("has_symbols") is not None
-        else False
+def decode_batch_scoring_payload(
+    payload, max_passwords: int, resolve_policy=None
+) -> BatchScoringRequest:
+    """Decode and validate a batch scoring payload.
+
+    Args:
+        payload (dict): The body of a batch scoring request, with a list of passwords.
+        max_passwords (int): The maximum number of passwords of a batch.
+        resolve_policy (function, optional): Give the ScoringPolicy of a policy name, None when it does not exist. Defaults to None, for no named policy.
+
+    Raises:
+        PayloadValidationError: When the payload is invalid, with a message per invalid field.
+
+    Returns:
+        BatchScoringRequest: The passwords to score and their policy.
+    """
+    if type(payload) is dict:
+        passwords = payload.get("passwords")
+        if (
+            type(passwords) is list
+            and 0 < len(passwords) <= max_passwords
+            and all(
+                type(password) is str and password for password in passwords
+            )
+        ):
+            policy = _decode_policy(payload, resolve_policy)
+            if policy is not None:
+                return _pack(BatchScoringRequest, (passwords, policy))
+
+    raise PayloadValidationError(
+        _scoring_payload_errors(
+            payload,
+            lambda payload: _passwords_errors(payload, max_passwords),
+            resolve_policy,
+        )
     )
 
 
-@has_characteristics
-def __has_space(payload: dict):
-    return (
-        True
-        if payload.get("characteristics").get("has_spaces") is not None
-        else False
+def decode_scoring_policy(payload, resolve_policy=None) -> ScoringPolicy:
+    """Decode and validate the policy of a payload, without password.
+
+    Args:
+        payload (dict): A body with the characteristics and the minimum score of a policy, or its policy id.
+        resolve_policy (function, optional): Give the ScoringPolicy of a policy name, None when it does not exist. Defaults to None, for no named policy.
+
+    Raises:
+        PayloadValidationError: When the payload is invalid, with a message per invalid field.
+
+    Returns:
+        ScoringPolicy: The policy.
+    """
+    if type(payload) is dict:
+        policy = _decode_policy(payload, resolve_policy)
+        if policy is not None:
+            return policy
+
+    raise PayloadValidationError(
+        _scoring_payload_errors(payload, resolve_policy=resolve_policy)
     )
 
 
-def __has_min_score(payload: dict):
-    return True if payload.get("min_accepted_score") else False
+def _decode_policy(payload: dict, resolve_policy=None) -> ScoringPolicy | None:
+    """Decode the policy of a valid payload with straight-line checks.
+
+    Args:
+        payload (dict): The body of a scoring request.
+        resolve_policy (function, optional): Give the ScoringPolicy of a policy name. Defaults to None.
+
+    Returns:
+        ScoringPolicy: The policy of the payload, None when it is invalid.
+    """
+    policy_id = payload.get("policy_id")
+    if policy_id is not None:
+        if type(policy_id) is not str:
+            return None
+        policy = decode_policy_id(policy_id)
+        if (
+            policy is None
+            and resolve_policy is not None
+            and _POLICY_NAME.fullmatch(policy_id)
+        ):
+            policy = resolve_policy(policy_id)
+        return policy
+
+    try:
+        characteristics = payload["characteristics"]
+        min_score = payload["min_accepted_score"]
+        min_characters = characteristics["min_length"]
+        max_characters = characteristics["max_length"]
+        has_uppercase = characteristics["has_uppercase"]
+        has_lowercase = characteristics["has_lowercase"]
+        has_digits = characteristics["has_digits"]
+        has_symbols = characteristics["has_symbols"]
+        has_spaces = characteristics["has_spaces"]
+        analyze_patterns = payload.get("analyze_patterns")
+        if analyze_patterns is None:
+            analyze_patterns = False
+        reject_breached = payload.get("reject_breached")
+        if reject_breached is None:
+            reject_breached = False
+    except (KeyError, TypeError):
+        return None
+
+    if (
+        type(min_characters) is int
+        and type(max_characters) is int
+        and 0 < min_characters <= max_characters
+        and (type(min_score) is int or type(min_score) is float)
+        and min_score > 0
+        and type(has_uppercase) is bool
+        and type(has_lowercase) is bool
+        and type(has_digits) is bool
+        and type(has_symbols) is bool
+        and type(has_spaces) is bool
+        and type(analyze_patterns) is bool
+        and type(reject_breached) is bool
+    ):
+        return _pack(
+            ScoringPolicy,
+            (
+                min_characters,
+                max_characters,
+                has_uppercase,
+                has_lowercase,
+                has_digits,
+                has_symbols,
+                has_spaces,
+                min_score,
+                analyze_patterns,
+                reject_breached,
+            ),
+        )
+    return None
+
+
+def _scoring_payload_errors(
+    payload, password_errors=None, resolve_policy=None
+) -> list:
+    """Give the messages of the invalid fields of a scoring payload.
+
+    Args:
+        payload (dict): The body of a scoring request.
+        password_errors (function, optional): Give the messages of the invalid passwords of the payload. Defaults to None, for a payload without password.
+        resolve_policy (function, optional): Give the ScoringPolicy of a policy name. Defaults to None.
+
+    Returns:
+        list: A message per invalid field.
+    """
+    if not isinstance(payload, dict):
+        return ["payload: must be a JSON object"]
+    errors = []
+    sections = {}  # The policy fields are not read with a policy id.
+    policy_id = payload.get("policy_id")
+    if policy_id is None:
+        sections[None] = payload
+        characteristics = payload.get("characteristics")
+        if isinstance(characteristics, dict):
+            sections["characteristics"] = characteristics
+        elif characteristics is None:
+            errors.append("characteristics: is required")
+        else:
+            errors.append("characteristics: must be a JSON object")
+
+    if password_errors is not None:
+        errors.extend(password_errors(payload))
+
+    values = {}
+    for section, key, field, check, required in _SCORING_FIELDS:
+        if section not in sections:
+            continue  # The whole section is reported or not read.
+        value = sections[section].get(key)
+        path = key if section is None else "{}.{}".format(section, key)
+        if value is None:
+            if required:
+                errors.append("{}: is required".format(path))
+            continue
+        error = check(value)
+        if error is not None:
+            errors.append("{}: {}".format(path, error))
+        else:
+            values[field] = value
+
+    if policy_id is not None:
+        if not isinstance(policy_id, str):
+            errors.append("policy_id: must be a string")
+        elif decode_policy_id(policy_id) is not None:
+            pass
+        elif resolve_policy is None or not is_valid_policy_name(policy_id):
+            errors.append("policy_id: is not a valid policy id")
+        elif resolve_policy(policy_id) is None:
+            errors.append("policy_id: is not a policy of the API key")
+    if (
+        "min_characters" in values
+        and "max_characters" in values
+        and values["min_characters"] > values["max_characters"]
+    ):
+        errors.append(
+            "characteristics.min_length: must not exceed"
+            " characteristics.max_length"
+        )
+    return errors
+
+
+def _password_errors(payload: dict) -> list:
+    password = payload.get("password")
+    if password is None:
+        return ["password: is required"]
+    error = _non_empty_string(password)
+    return [] if error is None else ["password: {}".format(error)]
+
+
+def _passwords_errors(payload: dict, max_passwords: int) -> list:
+    passwords = payload.get("passwords")
+    if passwords is None:
+        return ["passwords: is required"]
+    if not isinstance(passwords, list) or not passwords:
+        return ["passwords: must be a non empty list"]
+    if len(passwords) > max_passwords:
+        return [
+            "passwords: must not contain more than {} passwords".format(
+                max_passwords
+            )
+        ]
+    return [
+        "passwords.{}: must be a non empty string".format(index)
+        for index, password in enumerate(passwords)
+        if not isinstance(password, str) or not password
+    ]
 
 
 def __is_valid_password_to_score(payload) -> bool:
-    return (
-        not __is_payload_empty(payload)
-        and __has_password(payload)
-        and __has_min_length(payload)
-        and __has_max_length(payload)
-        and __has_uppercase(payload)
-        and __has_lowercase(payload)
-        and __has_digit(payload)
-        and __has_symbol(payload)
-        and __has_space(payload)
-        and __has_min_score(payload)
-    )
+    try:
+        decode_scoring_payload(payload)
+    except PayloadValidationError:
+        return False
+    return True
 
 
 def __is_valid_email(payload: dict) -> bool:
     return (
-        not __is_payload_empty(payload)
-        and __has_email(payload)
+        payload is not None
+        and bool(payload.get("email"))
         and EmailValidator.is_valid_email(payload.get("email")).get("status")
     )
 
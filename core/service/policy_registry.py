@@ -0,0 +1,176 @@
+"""Cache the named scoring policies of the API keys in each process.
+
+A named policy is loaded from the database on its first use by a process,
+then served from memory: the scoring requests referencing it skip the
+validation of a policy and, the validators being cached per policy, its
+compilation. The entries live at most a time to live, the bound of their
+staleness. When a policy is updated or deleted, its entries are evicted
+from the process that changed it and, with a Redis URL, from all the
+other processes through a Redis channel. Without Redis, the other
+processes serve the previous policy until its entry expires: the time to
+live is short by default.
+"""
+
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_ENTRIES: int = 10000
+DEFAULT_TTL: int = 5
+REDIS_CHANNEL: str = "policy-registry:invalidate"
+
+_MISSING = object()
+
+
+class PolicyRegistry:
+    """Declare the per-process cache of the named scoring policies."""
+
+    def __init__(
+        self,
+        loader,
+        max_entries: int = DEFAULT_MAX_ENTRIES,
+        ttl: int = DEFAULT_TTL,
+        redis_client=None,
+        clock=time.monotonic,
+    ) -> None:
+        """Instanciate a named policies cache.
+
+        Args:
+            loader (function): Give the ScoringPolicy of an API key and a policy name from the database, None when it does not exist.
+            max_entries (int, optional): The maximum number of cached policies. Defaults to 10000.
+            ttl (int, optional): The time to live of the entries, in seconds. Defaults to 5.
+            redis_client (redis.Redis, optional): The client of the Redis channel of the evictions. Defaults to None.
+            clock (function, optional): The time source of the entries. Defaults to time.monotonic.
+        """
+        self.__loader = loader
+        self.__max_entries = max_entries
+        self.__ttl = ttl
+        self.__redis = redis_client
+        self.__clock = clock
+        self.__entries = OrderedDict()
+        self.__lock = threading.Lock()
+        self.__listener_pid = None
+
+    def get(self, api_key: str, name: str):
+        """Give a named policy of an API key.
+
+        Args:
+            api_key (str): The API key owning the policy.
+            name (str): The name of the policy.
+
+        Returns:
+            ScoringPolicy: The policy, None when the API key has no policy of this name.
+        """
+        if self.__redis is not None and self.__listener_pid != os.getpid():
+            self.__start_listener()
+        key = (api_key, name)
+        with self.__lock:
+            entry = self.__entries.get(key, _MISSING)
+            if entry is not _MISSING and entry[0] > self.__clock():
+                self.__entries.move_to_end(key)
+                return entry[1]
+
+        # The unknown names are cached too, the creations evict them.
+        policy = self.__loader(api_key, name)
+        with self.__lock:
+            self.__entries[key] = (self.__clock() + self.__ttl, policy)
+            self.__entries.move_to_end(key)
+            while len(self.__entries) > self.__max_entries:
+                self.__entries.popitem(last=False)
+        return policy
+
+    def invalidate(self, name: str):
+        """Evict a policy that is created, updated or deleted, in all the processes.
+
+        The entries of all the API keys with a policy of this name are evicted, the channel carrying no API key.
+
+        Args:
+            name (str): The name of the policy.
+        """
+        self.evict(name)
+        if self.__redis is not None:
+            try:
+                self.__redis.publish(REDIS_CHANNEL, name)
+            except Exception as e:
+                logger.error("The policy eviction broadcast failed: %s", e)
+
+    def evict(self, name: str = None):
+        """Evict the entries of a policy name from this process.
+
+        Args:
+            name (str, optional): The name of the policy. Defaults to None, for all the entries.
+        """
+        with self.__lock:
+            if name is None:
+                self.__entries.clear()
+                return
+            for key in [key for key in self.__entries if key[1] == name]:
+                del self.__entries[key]
+
+    def __len__(self) -> int:
+        """Give the number of cached entries."""
+        return len(self.__entries)
+
+    def __start_listener(self):
+        # Started once per process: the threads are not inherited by the
+        # forked workers.
+        with self.__lock:
+            if self.__listener_pid == os.getpid():
+                return
+            self.__listener_pid = os.getpid()
+        threading.Thread(
+            target=self.__listen, name="policy-registry", daemon=True
+        ).start()
+
+    def __listen(self):
+        while True:
+            try:
+                pubsub = self.__redis.pubsub(ignore_subscribe_messages=True)
+                pubsub.subscribe(REDIS_CHANNEL)
+                # The evictions sent while disconnected are lost.
+                self.evict()
+                for message in pubsub.listen():
+                    self.evict(message["data"].decode("utf-8"))
+            except Exception as e:
+                logger.error("The policy eviction channel failed: %s", e)
+                time.sleep(1)
+
+
+def policy_registry_init_app(app) -> PolicyRegistry:
+    """Create the named policies cache of the flask app.
+
+    Args:
+        app (Flask): The flask application.
+
+    Returns:
+        PolicyRegistry: The cache of the named policies.
+    """
+    from core.models import NamedPolicy
+
+    redis_client = None
+    redis_url = app.config.get("POLICY_CACHE_REDIS_URL")
+    if redis_url:
+        try:
+            import redis
+
+            redis_client = redis.Redis.from_url(redis_url)
+        except ImportError:
+            logger.error(
+                "The redis package is missing, the policy evictions are not"
+                " broadcast."
+            )
+
+    policy_registry = PolicyRegistry(
+        loader=NamedPolicy.load_policy,
+        max_entries=int(
+            app.config.get("POLICY_CACHE_MAX_ENTRIES", DEFAULT_MAX_ENTRIES)
+        ),
+        ttl=int(app.config.get("POLICY_CACHE_TTL", DEFAULT_TTL)),
+        redis_client=redis_client,
+    )
+    app.extensions["policy_registry"] = policy_registry
+    return policy_registry
@@ -6,6 +6,7 @@ import logging
 import os
 
 import boto3
+from botocore.exceptions import ClientError
 
 from core.common.file_tools import create_compressed_copy_of_file
 from core.service.s3_managers.S3_driver_interface import S3DriverInterface
@@ -59,9 +60,7 @@ class S3BotoDriver(S3DriverInterface):
         try:
             self.session.create_bucket(Bucket=bucket_name)
         except:
-            logger.info(
-                "The bucket {} is already existing.".format(bucket_name)
-            )
+            logger.info("The bucket %s is already existing.", bucket_name)
         return True
 
     def upload_file_from_memory(
@@ -140,7 +139,67 @@ class S3BotoDriver(S3DriverInterface):
             )
             return True
         else:
-            logger.info(
-                "The file {} does not exist.".format(filename_with_path)
-            )
+            logger.info("The file %s does not exist.", filename_with_path)
             return False
+
+    def create_presigned_upload(
+        self,
+        bucket_name: str,
+        object_name: str,
+        max_size: int,
+        expires_in: int,
+        *args,
+        **kwargs
+    ) -> dict:
+        """Define a method to give a presigned POST form uploading a file straight to the s3 repo.
+
+        Args:
+            bucket_name (str): The bucket where to store the file.
+            object_name (str): The name of the file on the S3 server.
+            max_size (int): The maximum size in bytes of the file accepted by the form.
+            expires_in (int): The number of seconds of validity of the form.
+
+        Returns:
+            dict: the url and the fields of the form, the file being sent in its "file" field.
+        """
+        return self.session.generate_presigned_post(
+            Bucket=bucket_name,
+            Key=object_name,
+            Conditions=[["content-length-range", 1, max_size]],
+            ExpiresIn=expires_in,
+        )
+
+    def get_object_size(
+        self, bucket_name: str, object_name: str, *args, **kwargs
+    ) -> int | None:
+        """Define a method to give the size of a file of the s3 repo.
+
+        Args:
+            bucket_name (str): The bucket of the file.
+            object_name (str): The name of the file on the S3 server.
+
+        Returns:
+            int: the size in bytes, None when the file does not exist.
+        """
+        try:
+            return self.session.head_object(
+                Bucket=bucket_name, Key=object_name
+            )["ContentLength"]
+        except ClientError as e:
+            if e.response["Error"]["Code"] in ("404", "NoSuchKey"):
+                return None
+            raise
+
+    def open_object(self, bucket_name: str, object_name: str, *args, **kwargs):
+        """Define a method to read a file of the s3 repo as a stream.
+
+        Args:
+            bucket_name (str): The bucket of the file.
+            object_name (str): The name of the file on the S3 server.
+
+        Returns:
+            StreamingBody: the binary stream of the file, to close after reading.
+        """
+        return self.session.get_object(Bucket=bucket_name, Key=object_name)[
+            "Body"
+        ]
@@ -41,6 +41,30 @@ class S3DriverInterface:
         """
         return True
 
+    def create_presigned_upload(self, *args, **kwargs) -> dict:
+        """Define a method to give a presigned form uploading a file straight to the s3 repo.
+
+        Returns:
+            dict: the url and the fields of the form.
+        """
+        return {"url": None, "fields": {}}
+
+    def get_object_size(self, *args, **kwargs) -> int | None:
+        """Define a method to give the size of a file of the s3 repo.
+
+        Returns:
+            int: the size in bytes, None when the file does not exist.
+        """
+        return None
+
+    def open_object(self, *args, **kwargs):
+        """Define a method to read a file of the s3 repo as a stream.
+
+        Returns:
+            file: the binary stream of the file, to close after reading.
+        """
+        return None
+
     @classmethod
     def get_instance(cls, type_s3_manager: str):
         """Declare a factory method to create a concrete object of type service S3.
@@ -3,8 +3,11 @@
 import io
 import logging
 import os
+from datetime import datetime, timedelta, timezone
 
 from minio import Minio
+from minio.datatypes import PostPolicy
+from minio.error import S3Error
 
 from core.common.file_tools import create_compressed_copy_of_file
 from core.service.s3_managers.S3_driver_interface import S3DriverInterface
@@ -39,6 +42,7 @@ class S3MinioDriver(S3DriverInterface):
         Returns:
             dict: the status of type boolean and the session object.
         """
+        self.endpoint_url = "".join(["http://", hostname, ":", port])
         self.session = Minio(
             ":".join(
                 [
@@ -62,9 +66,7 @@ class S3MinioDriver(S3DriverInterface):
         if not found:
             self.session.make_bucket(bucket_name)  # Make bucket if not exist.
         else:
-            logger.info(
-                "The bucket {} is already existing.".format(bucket_name)
-            )
+            logger.info("The bucket %s is already existing.", bucket_name)
         return True
 
     def upload_file_from_memory(
@@ -140,7 +142,70 @@ class S3MinioDriver(S3DriverInterface):
             )
             return True
         else:
-            logger.info(
-                "The file {} does not exist.".format(filename_with_path)
-            )
+            logger.info("The file %s does not exist.", filename_with_path)
             return False
+
+    def create_presigned_upload(
+        self,
+        bucket_name: str,
+        object_name: str,
+        max_size: int,
+        expires_in: int,
+        *args,
+        **kwargs
+    ) -> dict:
+        """Define a method to give a presigned POST form uploading a file straight to the s3 repo.
+
+        Args:
+            bucket_name (str): The bucket where to store the file.
+            object_name (str): The name of the file on the S3 server.
+            max_size (int): The maximum size in bytes of the file accepted by the form.
+            expires_in (int): The number of seconds of validity of the form.
+
+        Returns:
+            dict: the url and the fields of the form, the file being sent in its "file" field.
+        """
+        policy = PostPolicy(
+            bucket_name,
+            datetime.now(timezone.utc) + timedelta(seconds=expires_in),
+        )
+        policy.add_equals_condition("key", object_name)
+        policy.add_content_length_range_condition(1, max_size)
+        return {
+            "url": "/".join([self.endpoint_url, bucket_name]),
+            "fields": {
+                "key": object_name,
+                **self.session.presigned_post_policy(policy),
+            },
+        }
+
+    def get_object_size(
+        self, bucket_name: str, object_name: str, *args, **kwargs
+    ) -> int | None:
+        """Define a method to give the size of a file of the s3 repo.
+
+        Args:
+            bucket_name (str): The bucket of the file.
+            object_name (str): The name of the file on the S3 server.
+
+        Returns:
+            int: the size in bytes, None when the file does not exist.
+        """
+        try:
+            return self.session.stat_object(bucket_name, object_name).size
+        except S3Error as e:
+            if e.code == "NoSuchKey":
+                return None
+            raise
+
+    def open_object(self, bucket_name: str, object_name: str, *args, **kwargs):
+        """Define a method to read a file of the s3 repo as a stream.
+
+        Args:
+            bucket_name (str): The bucket of the file.
+            object_name (str): The name of the file on the S3 server.
+
+        Returns:
+            HTTPResponse: the binary stream of the file, to close after reading.
+        """
+        return self.session.get_object(bucket_name, object_name)
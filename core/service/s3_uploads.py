@@ -0,0 +1,102 @@
+"""Issue the direct uploads of the bulk scoring files to the S3 service.
+
+Instead of sending its file through a worker of the web tier, a client gets
+a presigned POST form from POST /s3-uploads and sends its file straight to
+the bucket: the form is valid S3_UPLOAD_EXPIRES_IN seconds and only accepts
+a file of S3_UPLOAD_MAX_SIZE bytes at most, stored under the upload id and
+the user of the API key. The client then calls
+POST /s3-uploads/<upload id>/complete, which checks the stored file and
+queues its scoring; the Celery worker reads the file line per line.
+"""
+
+import re
+import uuid
+
+from flask import current_app
+
+from core.service.s3_managers.S3_driver_interface import S3DriverInterface
+
+DEFAULT_S3_DRIVER: str = "aws"
+DEFAULT_UPLOAD_MAX_SIZE: int = 100 * 1024 * 1024
+DEFAULT_UPLOAD_EXPIRES_IN: int = 900
+UPLOAD_PREFIX: str = "uploads"
+UPLOAD_ID = re.compile(r"[0-9a-f]{32}")
+
+
+def connect_s3_driver(driver: str = None) -> S3DriverInterface:
+    """Connect a driver to the S3 service of the flask app.
+
+    Args:
+        driver (str, optional): aws or minio. Defaults to None, for S3_DRIVER.
+
+    Returns:
+        S3DriverInterface: The connected driver.
+    """
+    if driver is None:
+        driver = current_app.config.get("S3_DRIVER") or DEFAULT_S3_DRIVER
+    driver_manager = S3DriverInterface.get_instance(driver)
+    driver_manager.connect(
+        hostname=current_app.config.get("S3_MINIO_HOST"),
+        port=str(current_app.config.get("S3_MINIO_API_PORT")),
+        user=current_app.config.get("S3_MINIO_USER"),
+        password=current_app.config.get("S3_MINIO_PASSWORD"),
+    )
+    return driver_manager
+
+
+def get_upload_max_size() -> int:
+    """Give the maximum size in bytes of an uploaded file.
+
+    Returns:
+        int: S3_UPLOAD_MAX_SIZE.
+    """
+    return int(
+        current_app.config.get("S3_UPLOAD_MAX_SIZE", DEFAULT_UPLOAD_MAX_SIZE)
+    )
+
+
+def make_upload_object_name(user_id: int, upload_id: str) -> str:
+    """Give the name on the S3 server of the file of an upload.
+
+    Args:
+        user_id (int): The ID of the user of the upload.
+        upload_id (str): The id of the upload.
+
+    Returns:
+        str: The name of the file, under the prefix of the user.
+    """
+    return "/".join([UPLOAD_PREFIX, str(user_id), upload_id])
+
+
+def create_upload(driver: S3DriverInterface, user_id: int) -> dict:
+    """Create an upload of a file straight to the bucket of the flask app.
+
+    Args:
+        driver (S3DriverInterface): The connected driver of the S3 service.
+        user_id (int): The ID of the user of the upload.
+
+    Returns:
+        dict: The upload id and the presigned form of the upload, with its maximum size and validity.
+    """
+    bucket_name = current_app.config.get("S3_MINIO_BUCKET_NAME")
+    max_size = get_upload_max_size()
+    expires_in = int(
+        current_app.config.get(
+            "S3_UPLOAD_EXPIRES_IN", DEFAULT_UPLOAD_EXPIRES_IN
+        )
+    )
+    upload_id = uuid.uuid4().hex
+    driver.create_bucket(bucket_name)
+    form = driver.create_presigned_upload(
+        bucket_name,
+        make_upload_object_name(user_id, upload_id),
+        max_size,
+        expires_in,
+    )
+    return {
+        "upload_id": upload_id,
+        "url": form["url"],
+        "fields": form["fields"],
+        "max_size": max_size,
+        "expires_in": expires_in,
+    }
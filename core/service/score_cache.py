@@ -0,0 +1,205 @@
+"""Cache the scoring results of the repeated (policy, password) checks.
+
+The entries are keyed by a HMAC-SHA256, computed with the application
+secret key, of the policy id and the password: no password is ever stored,
+in memory or in Redis. Two tiers are available:
+
+- a per-process LRU tier, bounded in size, with a time to live,
+- an optional Redis tier shared by all the processes, with the same TTL.
+"""
+
+import hashlib
+import hmac
+import json
+import logging
+import threading
+import time
+from collections import OrderedDict
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_ENTRIES: int = 10000
+DEFAULT_TTL: int = 60
+REDIS_KEY_PREFIX: str = "score-cache:"
+
+
+def make_policy_id(policy: dict, *extras) -> str:
+    """Give a stable id to a scoring policy.
+
+    Args:
+        policy (dict): The arguments of the PasswordConfig of the policy.
+        extras (str): Any other value the results depend on (ex: the generation of the breach index).
+
+    Returns:
+        str: The id of the policy.
+    """
+    canonical = json.dumps([policy, extras], sort_keys=True, default=str)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+class ScoreCache:
+    """Declare the two tiers cache of the scoring results."""
+
+    def __init__(
+        self,
+        secret_key: str,
+        max_entries: int = DEFAULT_MAX_ENTRIES,
+        ttl: int = DEFAULT_TTL,
+        redis_client=None,
+        clock=time.monotonic,
+    ) -> None:
+        """Instanciate a scoring results cache.
+
+        Args:
+            secret_key (str): The key of the HMAC of the cache keys.
+            max_entries (int, optional): The maximum number of entries of the per-process tier. Defaults to 10000.
+            ttl (int, optional): The time to live of the entries, in seconds. Defaults to 60.
+            redis_client (redis.Redis, optional): The client of the shared Redis tier. Defaults to None.
+            clock (function, optional): The time source of the per-process tier. Defaults to time.monotonic.
+        """
+        self.__secret_key = secret_key.encode("utf-8")
+        self.__max_entries = max_entries
+        self.__ttl = ttl
+        self.__redis = redis_client
+        self.__clock = clock
+        self.__entries = OrderedDict()
+        self.__lock = threading.Lock()
+        self.hits = 0
+        self.redis_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def make_key(self, policy_id: str, password: str) -> str:
+        """Compute the cache key of a password scored with a policy.
+
+        Args:
+            policy_id (str): The id of the policy.
+            password (str): The password to score.
+
+        Returns:
+            str: The HMAC-SHA256 of the policy id and the password.
+        """
+        return hmac.new(
+            self.__secret_key,
+            b"\0".join([policy_id.encode("utf-8"), password.encode("utf-8")]),
+            hashlib.sha256,
+        ).hexdigest()
+
+    def get(self, policy_id: str, password: str) -> dict | None:
+        """Retrieve the cached result of a password scored with a policy.
+
+        Args:
+            policy_id (str): The id of the policy.
+            password (str): The password to score.
+
+        Returns:
+            dict: The cached scoring result, None if it is not cached.
+        """
+        key = self.make_key(policy_id, password)
+        with self.__lock:
+            entry = self.__entries.get(key)
+            if entry is not None:
+                if entry[0] > self.__clock():
+                    self.__entries.move_to_end(key)
+                    self.hits += 1
+                    return entry[1]
+                del self.__entries[key]
+
+        result = self.__redis_get(key)
+        with self.__lock:
+            if result is None:
+                self.misses += 1
+                return None
+            self.redis_hits += 1
+        self.__store(key, result)
+        return result
+
+    def set(self, policy_id: str, password: str, result: dict):
+        """Cache the result of a password scored with a policy.
+
+        Args:
+            policy_id (str): The id of the policy.
+            password (str): The scored password.
+            result (dict): The scoring result.
+        """
+        key = self.make_key(policy_id, password)
+        self.__store(key, result)
+        if self.__redis is not None:
+            try:
+                self.__redis.set(
+                    REDIS_KEY_PREFIX + key, json.dumps(result), ex=self.__ttl
+                )
+            except Exception as e:
+                logger.error("The score cache write failed: %s", e)
+
+    def __store(self, key: str, result: dict):
+        with self.__lock:
+            self.__entries[key] = (self.__clock() + self.__ttl, result)
+            self.__entries.move_to_end(key)
+            while len(self.__entries) > self.__max_entries:
+                self.__entries.popitem(last=False)
+                self.evictions += 1
+
+    def __redis_get(self, key: str) -> dict | None:
+        if self.__redis is None:
+            return None
+        try:
+            value = self.__redis.get(REDIS_KEY_PREFIX + key)
+        except Exception as e:
+            logger.error("The score cache read failed: %s", e)
+            return None
+        return json.loads(value) if value is not None else None
+
+    def stats(self) -> dict:
+        """Give the metrics of the cache.
+
+        Returns:
+            dict: The hits (per tier), misses, evictions and size of the cache.
+        """
+        with self.__lock:
+            return {
+                "hits": self.hits,
+                "redis_hits": self.redis_hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "size": len(self.__entries),
+            }
+
+
+def score_cache_init_app(app) -> ScoreCache | None:
+    """Create the scoring results cache of the flask app, if enabled.
+
+    Args:
+        app (Flask): The flask application.
+
+    Returns:
+        ScoreCache: The cache, None when SCORE_CACHE_ENABLED is not set.
+    """
+    app.extensions.pop("score_cache", None)
+    enabled = str(app.config.get("SCORE_CACHE_ENABLED", "false")).lower()
+    if enabled not in ("true", "yes", "1"):
+        return None
+
+    redis_client = None
+    redis_url = app.config.get("SCORE_CACHE_REDIS_URL")
+    if redis_url:
+        try:
+            import redis
+
+            redis_client = redis.Redis.from_url(redis_url)
+        except ImportError:
+            logger.error(
+                "The redis package is missing, the score cache Redis tier"
+                " is disabled."
+            )
+
+    score_cache = ScoreCache(
+        secret_key=app.config["SECRET_KEY"],
+        max_entries=int(
+            app.config.get("SCORE_CACHE_MAX_ENTRIES", DEFAULT_MAX_ENTRIES)
+        ),
+        ttl=int(app.config.get("SCORE_CACHE_TTL", DEFAULT_TTL)),
+        redis_client=redis_client,
+    )
+    app.extensions["score_cache"] = score_cache
+    return score_cache
@@ -0,0 +1,194 @@
+"""Coalesce the concurrent scoring requests of a worker into batches.
+
+Under threaded or gevent serving, the /score requests arriving together
+with the same policy are gathered for a short window and scored in one
+call of the batch kernel of the policy. The first request of a batch leads
+it: it waits for the window or for the batch to be full, then scores the
+passwords of all the waiting requests. A request alone in the worker does
+not wait: it is scored on the spot. The other requests wait for their
+result at most the latency ceiling; past it, a request not taken in its
+batch yet leaves it and scores its password alone.
+"""
+
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_WINDOW: float = 0.001
+DEFAULT_MAX_BATCH_SIZE: int = 32
+DEFAULT_MAX_DELAY: float = 0.005
+
+
+class _Batch:
+    """Declare the passwords gathered for a policy and their results."""
+
+    __slots__ = ("passwords", "taken", "results", "error", "full", "done")
+
+    def __init__(self) -> None:
+        """Instanciate an empty batch."""
+        self.passwords = []
+        self.taken = False
+        self.results = None
+        self.error = None
+        self.full = threading.Event()
+        self.done = threading.Event()
+
+
+class ScoreCoalescer:
+    """Declare the coalescer of the scoring requests of a process."""
+
+    def __init__(
+        self,
+        window: float = DEFAULT_WINDOW,
+        max_batch_size: int = DEFAULT_MAX_BATCH_SIZE,
+        max_delay: float = DEFAULT_MAX_DELAY,
+    ) -> None:
+        """Instanciate a scoring requests coalescer.
+
+        Args:
+            window (float, optional): The time the first request of a batch waits for the others, in seconds, at most max_delay. Defaults to 0.001.
+            max_batch_size (int, optional): The number of passwords closing a batch before the end of its window. Defaults to 32.
+            max_delay (float, optional): The latency ceiling: the maximum time a request waits for its batch, in seconds. Defaults to 0.005.
+        """
+        self.__window = min(window, max_delay)
+        self.__max_batch_size = max_batch_size
+        self.__max_delay = max_delay
+        self.__batches = {}
+        self.__lock = threading.Lock()
+        self.__requests = 0
+        self.batches = 0
+        self.coalesced = 0
+        self.timeouts = 0
+
+    def validate_password(self, password_config, password: str) -> dict:
+        """Score a password within the batch of its policy.
+
+        Args:
+            password_config (PasswordConfig): The validator of the policy, the same object for the requests of a policy.
+            password (str): The password to score.
+
+        Returns:
+            dict: The payload of PasswordConfig.validate_password.
+        """
+        with self.__lock:
+            if self.__requests == 0 and password_config not in self.__batches:
+                batch = None
+            else:
+                batch = self.__batches.get(password_config)
+                leader = batch is None
+                if leader:
+                    batch = self.__batches[password_config] = _Batch()
+                index = len(batch.passwords)
+                batch.passwords.append(password)
+                if index + 1 >= self.__max_batch_size:
+                    del self.__batches[password_config]
+                    batch.full.set()
+            self.__requests += 1
+        try:
+            if batch is None:
+                # No other request to wait for.
+                return password_config.validate_password(password)
+            return self.__score_in_batch(
+                password_config, password, batch, index, leader
+            )
+        finally:
+            with self.__lock:
+                self.__requests -= 1
+
+    def stats(self) -> dict:
+        """Give the statistics of the coalescer.
+
+        Returns:
+            dict: The number of batches run, of requests scored in the batch of another one and of requests leaving their batch past the latency ceiling.
+        """
+        return {
+            "batches": self.batches,
+            "coalesced": self.coalesced,
+            "timeouts": self.timeouts,
+        }
+
+    def __score_in_batch(
+        self,
+        password_config,
+        password: str,
+        batch: _Batch,
+        index: int,
+        leader: bool,
+    ) -> dict:
+        if leader:
+            self.__run(password_config, batch)
+        elif not batch.done.wait(self.__max_delay):
+            with self.__lock:
+                left = not batch.taken
+                if left:
+                    # The leader is late: leave the batch, keep the ceiling.
+                    batch.passwords[index] = None
+                    self.timeouts += 1
+            if left:
+                return password_config.validate_password(password)
+            # The batch is being scored: scoring again would double the work.
+            batch.done.wait()
+
+        if batch.error is not None:
+            raise batch.error
+        return batch.results[index]
+
+    def __run(self, password_config, batch: _Batch):
+        batch.full.wait(self.__window)
+        with self.__lock:
+            if self.__batches.get(password_config) is batch:
+                del self.__batches[password_config]
+            batch.taken = True
+            passwords = [
+                password
+                for password in batch.passwords
+                if password is not None
+            ]
+            self.batches += 1
+            self.coalesced += len(passwords) - 1
+        try:
+            results = iter(password_config.validate_passwords(passwords))
+            batch.results = [
+                None if password is None else next(results)
+                for password in batch.passwords
+            ]
+        except Exception as e:
+            logger.error("The scoring of a batch failed: %s", e)
+            batch.error = e
+        batch.done.set()
+
+
+def score_coalescer_init_app(app) -> ScoreCoalescer | None:
+    """Create the scoring requests coalescer of the flask app, if enabled.
+
+    Args:
+        app (Flask): The flask application.
+
+    Returns:
+        ScoreCoalescer: The coalescer, None when SCORE_COALESCING_ENABLED is not set.
+    """
+    app.extensions.pop("score_coalescer", None)
+    enabled = str(app.config.get("SCORE_COALESCING_ENABLED", "false")).lower()
+    if enabled not in ("true", "yes", "1"):
+        return None
+
+    score_coalescer = ScoreCoalescer(
+        window=float(
+            app.config.get("SCORE_COALESCING_WINDOW_MS", DEFAULT_WINDOW * 1000)
+        )
+        / 1000,
+        max_batch_size=int(
+            app.config.get(
+                "SCORE_COALESCING_MAX_BATCH_SIZE", DEFAULT_MAX_BATCH_SIZE
+            )
+        ),
+        max_delay=float(
+            app.config.get(
+                "SCORE_COALESCING_MAX_DELAY_MS", DEFAULT_MAX_DELAY * 1000
+            )
+        )
+        / 1000,
+    )
+    app.extensions["score_coalescer"] = score_coalescer
+    return score_coalescer
@@ -0,0 +1,187 @@
+"""Read the passwords of a streamed scoring body and write their results.
+
+The body of POST /score/stream is read in chunks and split into lines, one
+password per line: a raw password (text/plain) or a JSON object with a
+"password" (application/x-ndjson). The lines are scored per batch and the
+result lines of a batch are written before the next batch is read, so the
+worker never holds more than a batch of the body or of the response.
+"""
+
+import json
+
+from core.service.payload_validator import PayloadValidationError
+
+MIMETYPE_NDJSON: str = "application/x-ndjson"
+MIMETYPE_TEXT: str = "text/plain"
+NDJSON_MIMETYPES = frozenset(
+    (MIMETYPE_NDJSON, "application/jsonl", "application/x-jsonlines")
+)
+
+DEFAULT_BATCH_SIZE: int = 64
+DEFAULT_MAX_LINE_LENGTH: int = 4096
+READ_SIZE: int = 65536
+
+
+def _check_line(line: bytes, max_line_length: int) -> bytes | None:
+    if len(line) > max_line_length:
+        return None
+    return line[:-1] if line.endswith(b"\r") else line
+
+
+def iter_lines(
+    stream,
+    max_line_length: int = DEFAULT_MAX_LINE_LENGTH,
+    read_size: int = READ_SIZE,
+):
+    """Split a binary stream into lines, reading it in chunks.
+
+    Args:
+        stream (file): The binary stream, ex: the input stream of a request.
+        max_line_length (int, optional): The maximum number of bytes of a line, its line break excluded. Defaults to DEFAULT_MAX_LINE_LENGTH.
+        read_size (int, optional): The number of bytes read at once. Defaults to READ_SIZE.
+
+    Yields:
+        bytes: A line without its line break, None for a line longer than max_line_length, which is skipped.
+    """
+    pending = b""
+    skipping = False  # The rest of a too long line is dropped.
+    while True:
+        chunk = stream.read(read_size)
+        if not chunk:
+            break
+        pending += chunk
+        start = 0
+        end = pending.find(b"\n")
+        while end >= 0:
+            if skipping:
+                skipping = False
+            else:
+                yield _check_line(pending[start:end], max_line_length)
+            start = end + 1
+            end = pending.find(b"\n", start)
+        pending = pending[start:]
+        if len(pending) > max_line_length:
+            if not skipping:
+                yield None
+                skipping = True
+            pending = b""
+    if pending and not skipping:
+        yield _check_line(pending, max_line_length)
+
+
+def decode_stream_line(line: bytes, ndjson: bool, loads=json.loads) -> str:
+    """Decode the password of a line of a scoring stream.
+
+    Args:
+        line (bytes): The line, without its line break.
+        ndjson (bool): Indicates if the line is a JSON object with a password, rather than a raw password.
+        loads (function, optional): Parse a JSON document. Defaults to json.loads.
+
+    Raises:
+        PayloadValidationError: When the line has no valid password.
+
+    Returns:
+        str: The password.
+    """
+    if not ndjson:
+        try:
+            return line.decode("utf-8")
+        except UnicodeDecodeError:
+            raise PayloadValidationError(["password: must be UTF-8 text"])
+
+    try:
+        payload = loads(line)
+    except ValueError:
+        payload = None
+    if type(payload) is not dict:
+        raise PayloadValidationError(["line: must be a JSON object"])
+    password = payload.get("password")
+    if type(password) is str and password:
+        return password
+    if password is None:
+        raise PayloadValidationError(["password: is required"])
+    raise PayloadValidationError(["password: must be a non empty string"])
+
+
+def iter_password_batches(
+    stream,
+    ndjson: bool,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    max_line_length: int = DEFAULT_MAX_LINE_LENGTH,
+    loads=json.loads,
+):
+    """Read the passwords of a scoring stream per batch, the blank lines skipped.
+
+    Args:
+        stream (file): The binary stream of the body.
+        ndjson (bool): Indicates if the lines are JSON objects with a password, rather than raw passwords.
+        batch_size (int, optional): The maximum number of lines of a batch. Defaults to DEFAULT_BATCH_SIZE.
+        max_line_length (int, optional): The maximum number of bytes of a line. Defaults to DEFAULT_MAX_LINE_LENGTH.
+        loads (function, optional): Parse a JSON document. Defaults to json.loads.
+
+    Yields:
+        list: The passwords of the lines of a batch, in order, and a PayloadValidationError for each invalid line.
+    """
+    batch = []
+    for line in iter_lines(stream, max_line_length):
+        if line is None:
+            batch.append(
+                PayloadValidationError(
+                    [
+                        "password: must not exceed {} bytes".format(
+                            max_line_length
+                        )
+                    ]
+                )
+            )
+        elif not (line.strip() if ndjson else line):
+            continue
+        else:
+            try:
+                batch.append(decode_stream_line(line, ndjson, loads))
+            except PayloadValidationError as e:
+                batch.append(e)
+        if len(batch) >= batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def score_batch(password_config, batch: list) -> list:
+    """Score the passwords of a batch of a scoring stream.
+
+    Args:
+        password_config (PasswordConfig): The validator of the policy of the stream.
+        batch (list): The passwords and the errors of the lines of a batch.
+
+    Returns:
+        list: The result of each line, in the same order, or the errors of the invalid lines.
+    """
+    passwords = [entry for entry in batch if type(entry) is str]
+    results = iter(password_config.validate_passwords(passwords))
+    return [
+        (
+            next(results)
+            if type(entry) is str
+            else {
+                "message": "The input data is invalid!",
+                "error": "Bad request.",
+                "errors": entry.errors,
+            }
+        )
+        for entry in batch
+    ]
+
+
+def encode_lines(results: list, dumps=json.dumps) -> str:
+    """Serialize results as JSON lines.
+
+    Args:
+        results (list): The results to serialize.
+        dumps (function, optional): Serialize a JSON document to a string. Defaults to json.dumps.
+
+    Returns:
+        str: A JSON document per result, each of them ended by a line break.
+    """
+    return "".join([dumps(result) + "\n" for result in results])
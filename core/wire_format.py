@@ -0,0 +1,90 @@
+"""Define the wire formats of the scoring API.
+
+The external clients send and receive JSON. The high-volume internal
+clients can send MessagePack bodies (Content-Type: application/msgpack),
+smaller and faster to decode; the responses are then MessagePack too, as
+well as for the requests that prefer it through their Accept header.
+"""
+
+from flask import current_app, g, jsonify, request
+from werkzeug.exceptions import BadRequest, UnsupportedMediaType
+
+try:
+    import msgpack
+except ImportError:  # pragma: no cover
+    msgpack = None
+
+MIMETYPE_JSON: str = "application/json"
+MIMETYPE_MSGPACK: str = "application/msgpack"
+MSGPACK_MIMETYPES = frozenset((MIMETYPE_MSGPACK, "application/x-msgpack"))
+
+
+def is_msgpack_request() -> bool:
+    """Indicate if the body of the current request is MessagePack.
+
+    Returns:
+        bool: True for a MessagePack body.
+    """
+    return request.mimetype in MSGPACK_MIMETYPES
+
+
+def get_payload():
+    """Give the decoded body of the current request, JSON or MessagePack.
+
+    Raises:
+        BadRequest: When the body can not be decoded.
+        UnsupportedMediaType: When the body is neither JSON nor MessagePack.
+
+    Returns:
+        object: The decoded body.
+    """
+    if not is_msgpack_request():
+        return request.get_json()
+    payload = g.get("msgpack_payload")
+    if payload is None:
+        if msgpack is None:
+            raise UnsupportedMediaType("MessagePack is not supported.")
+        try:
+            payload = msgpack.unpackb(
+                request.get_data(cache=True),
+                raw=False,
+            )
+        except (TypeError, ValueError) as e:
+            raise BadRequest("The MessagePack body is invalid.") from e
+        g.msgpack_payload = payload
+    return payload
+
+
+def wants_msgpack() -> bool:
+    """Indicate if the response of the current request is MessagePack.
+
+    Returns:
+        bool: True when the body of the request is MessagePack or when its Accept header prefers MessagePack to JSON.
+    """
+    if msgpack is None:
+        return False
+    if is_msgpack_request():
+        return True
+    accept = request.accept_mimetypes
+    return accept[MIMETYPE_MSGPACK] > accept[MIMETYPE_JSON]
+
+
+def make_payload_response(data, status: int = 200, headers: dict = None):
+    """Serialize data in the wire format of the current request.
+
+    Args:
+        data (object): The data to serialize.
+        status (int, optional): The status code of the response. Defaults to 200.
+        headers (dict, optional): The headers of the response. Defaults to None.
+
+    Returns:
+        tuple: The response, its status code and headers.
+    """
+    if wants_msgpack():
+        response = current_app.response_class(
+            msgpack.packb(data, use_bin_type=True), mimetype=MIMETYPE_MSGPACK
+        )
+    else:
+        response = jsonify(data)
+    response.vary.add("Accept")
+    return response, status, headers or {}
@@ -0,0 +1,124 @@
+"""Configure gunicorn for the password scoring application.
+
+The server settings are read from the GUNICORN_* environment variables
+(the env files of the docker image), with defaults sized for the CPUs
+available to the container:
+
+- GUNICORN_BIND: the address to listen on. Defaults to 0.0.0.0:6019.
+- GUNICORN_WORKER_CLASS: sync (default), gthread or gevent.
+- GUNICORN_WORKERS: the number of workers. Defaults to
+  GUNICORN_WORKERS_PER_CORE (default 1) per available CPU.
+- GUNICORN_THREADS: the threads of a gthread worker. Defaults to 4.
+- GUNICORN_WORKER_CONNECTIONS: the connections of a gevent worker.
+  Defaults to 1000.
+- GUNICORN_KEEPALIVE: the seconds a client connection of a gthread or
+  gevent worker is kept open between two requests. Defaults to 2. Behind a
+  load balancer reusing its connections, set it above the idle timeout of
+  the load balancer (ex: 75 for 60 seconds), so that it closes them first.
+- GUNICORN_MAX_REQUESTS and GUNICORN_MAX_REQUESTS_JITTER: a worker is
+  restarted after this number of requests, plus a random jitter so that
+  the workers do not restart together. Defaults to 10000 and 1000.
+- GUNICORN_PRELOAD_APP: load the application once in the master, before
+  forking the workers. Defaults to true.
+- GUNICORN_TIMEOUT and GUNICORN_GRACEFUL_TIMEOUT: defaults to 30 seconds.
+"""
+
+import glob
+import math
+import os
+
+WORKER_CLASS_GEVENT: str = "gevent"
+# The pid of the master which emptied the metrics directory.
+_MULTIPROCESS_DIR_OWNER: str = "GUNICORN_METRICS_DIR_OWNER"
+
+
+def _env(key: str, default: str) -> str:
+    return os.environ.get(key) or default
+
+
+def _env_bool(key: str, default: str) -> bool:
+    return _env(key, default).lower() in ("true", "yes", "1")
+
+
+def available_cpus() -> int:
+    """Give the number of CPUs available to the process.
+
+    The CPU quota of the container (cgroup v2) is taken into account, not only the CPUs of the host.
+
+    Returns:
+        int: The number of available CPUs, at least 1.
+    """
+    cpus = len(os.sched_getaffinity(0))
+    try:
+        with open("/sys/fs/cgroup/cpu.max") as cpu_max:
+            quota, period = cpu_max.read().split()
+        if quota != "max":
+            cpus = min(cpus, math.ceil(int(quota) / int(period)))
+    except (OSError, ValueError):
+        pass
+    return max(cpus, 1)
+
+
+bind = _env("GUNICORN_BIND", "0.0.0.0:6019")
+worker_class = _env("GUNICORN_WORKER_CLASS", "sync")
+workers = int(
+    _env(
+        "GUNICORN_WORKERS",
+        str(available_cpus() * int(_env("GUNICORN_WORKERS_PER_CORE", "1"))),
+    )
+)
+threads = int(_env("GUNICORN_THREADS", "4"))
+worker_connections = int(_env("GUNICORN_WORKER_CONNECTIONS", "1000"))
+keepalive = int(_env("GUNICORN_KEEPALIVE", "2"))
+max_requests = int(_env("GUNICORN_MAX_REQUESTS", "10000"))
+max_requests_jitter = int(_env("GUNICORN_MAX_REQUESTS_JITTER", "1000"))
+preload_app = _env_bool("GUNICORN_PRELOAD_APP", "true")
+timeout = int(_env("GUNICORN_TIMEOUT", "30"))
+graceful_timeout = int(_env("GUNICORN_GRACEFUL_TIMEOUT", "30"))
+
+
+def reset_multiprocess_dir():
+    """Create the empty directory of the metrics files, in multiprocess mode.
+
+    Called when the configuration is loaded, before the master loads the application with preload_app: the metrics files are opened when the application is imported. The files of a previous run are removed once per master, not when the configuration is reloaded (HUP) while the workers use them.
+    """
+    multiprocess_dir = os.environ.get("PROMETHEUS_MULTIPROC_DIR")
+    if not multiprocess_dir:
+        return
+    os.makedirs(multiprocess_dir, exist_ok=True)
+    if os.environ.get(_MULTIPROCESS_DIR_OWNER) == str(os.getpid()):
+        return
+    os.environ[_MULTIPROCESS_DIR_OWNER] = str(os.getpid())
+    for path in glob.glob(os.path.join(multiprocess_dir, "*.db")):
+        os.remove(path)
+
+
+reset_multiprocess_dir()
+
+if worker_class == WORKER_CLASS_GEVENT:
+    # Patch the standard library before the application is loaded, in the
+    # master with preload_app, not after as the gevent worker does.
+    from gevent import monkey
+
+    monkey.patch_all()
+
+
+def post_fork(server, worker):
+    """Drop the database connections inherited from the master, with preload_app."""
+    if not server.cfg.preload_app:
+        return
+    from core import db
+
+    app = worker.app.wsgi()
+    with app.app_context():
+        db.engine.dispose(close=False)
+    replica = app.extensions.get("db_replica")
+    if replica is not None:
+        replica.dispose(close=False)
+
+
+def child_exit(server, worker):
+    """Remove the live gauges of an exited worker, in multiprocess mode."""
+    from core.metrics import mark_process_dead
+
+    mark_process_dead(worker.pid)
@@ -0,0 +1,31 @@
+"""Score the strength of passwords, without any web stack.
+
+The scoring engine of the web service, importable on its own by the batch
+jobs, the Celery workers or any other Python service to score passwords
+in-process; it only depends on password-validator:
+
+    from password_scoring import PasswordConfig
+
+    result = PasswordConfig(min_characters=12).validate_password(password)
+"""
+
+from password_scoring.colors import DEFAULT_MINIMUM_SCORE, ColorScore
+from password_scoring.entropy import calc_entropy
+from password_scoring.kernel import PasswordConfig
+from password_scoring.pattern_analyzer import analyze_password
+from password_scoring.policy import (
+    ScoringPolicy,
+    decode_policy_id,
+    encode_policy_id,
+)
+
+__all__ = [
+    "DEFAULT_MINIMUM_SCORE",
+    "ColorScore",
+    "PasswordConfig",
+    "ScoringPolicy",
+    "analyze_password",
+    "calc_entropy",
+    "decode_policy_id",
+    "encode_policy_id",
+]
@@ -0,0 +1,30 @@
+"""Declare the color bands of the password scores."""
+
+import enum
+
+DEFAULT_MINIMUM_SCORE = 62
+
+
+class ColorScore(enum.Enum):
+    """Declare the enumaration for correspondance between a score and a color."""
+
+    black = (0, DEFAULT_MINIMUM_SCORE)
+    crimson = (DEFAULT_MINIMUM_SCORE, 85)
+    coral = (85, 95)
+    yellow = (95, 105)
+    yellowgreen = (105, 115)
+    lightgreen = (115, 155)
+    lime = (155, 1000)
+
+    @staticmethod
+    def get_color_from_score(score: float) -> str:
+        """Retrieve the color that binds to this scoring value.
+
+        Args:
+            score (float): The scoring value of a password.
+
+        Returns:
+            str: The color that represents this score.
+        """
+        l = [c.name for c in ColorScore if int(score) in range(*c.value)]
+        return l[0]
@@ -0,0 +1,164 @@
+"""Estimate the entropy of a password with memoized charset-size math.
+
+The estimator gives the same results as `enpass.calc_entropy`: the entropy
+is log2(B^L) rounded to 2 decimals, B being the size of the union of the
+character sets used by the password and L its length.
+
+Since B only depends on which of the 4 character classes are present, the
+value of log2(B) is precomputed once for each of the 16 class bitmasks and
+the rounded entropies are memoized per (bitmask, length).
+"""
+
+import math
+from functools import lru_cache
+
+LOWERCASE_CHARSET_SIZE: int = 26
+UPPERCASE_CHARSET_SIZE: int = 26
+DIGITS_CHARSET_SIZE: int = 10
+SYMBOLS_CHARSET_SIZE: int = 36
+
+CLASS_LOWERCASE: int = 1
+CLASS_UPPERCASE: int = 2
+CLASS_DIGIT: int = 4
+CLASS_SYMBOL: int = 8
+ALL_CLASSES: int = (
+    CLASS_LOWERCASE | CLASS_UPPERCASE | CLASS_DIGIT | CLASS_SYMBOL
+)
+
+# Up to this length, L * log2(B) rounded to 2 decimals is verified to be
+# identical to round(log2(B ** L), 2). Beyond, the exact formula is used.
+MAX_TABULATED_LENGTH: int = 1024
+
+
+def _charset_size(mask: int) -> int:
+    return (
+        (LOWERCASE_CHARSET_SIZE if mask & CLASS_LOWERCASE else 0)
+        + (UPPERCASE_CHARSET_SIZE if mask & CLASS_UPPERCASE else 0)
+        + (DIGITS_CHARSET_SIZE if mask & CLASS_DIGIT else 0)
+        + (SYMBOLS_CHARSET_SIZE if mask & CLASS_SYMBOL else 0)
+    )
+
+
+CHARSET_SIZES: tuple = tuple(
+    _charset_size(mask) for mask in range(ALL_CLASSES + 1)
+)
+LOG2_CHARSET_SIZES: tuple = tuple(
+    math.log2(size) if size else 0.0 for size in CHARSET_SIZES
+)
+
+
+def _classify(character: str) -> int:
+    """Give the class bit of a character, following the enpass rules.
+
+    Args:
+        character (str): A single character.
+
+    Returns:
+        int: The class bit of the character, 0 when it belongs to no class.
+    """
+    if character.islower():
+        return CLASS_LOWERCASE
+    if character.isupper():
+        return CLASS_UPPERCASE
+    if character.isdigit():
+        return CLASS_DIGIT
+    if not character.isalnum():
+        return CLASS_SYMBOL
+    return 0
+
+
+_ASCII_CLASSES: dict = {chr(i): _classify(chr(i)) for i in range(128)}
+_classify_non_ascii = lru_cache(maxsize=4096)(_classify)
+
+
+def charset_mask(password: str) -> int:
+    """Compute the bitmask of the character classes used by a password.
+
+    Args:
+        password (str): The password to analyze.
+
+    Returns:
+        int: The combination of the CLASS_* bits present in the password.
+    """
+    mask = 0
+    for character in password:
+        bit = _ASCII_CLASSES.get(character)
+        mask |= _classify_non_ascii(character) if bit is None else bit
+        if mask == ALL_CLASSES:
+            break
+    return mask
+
+
+@lru_cache(maxsize=4096)
+def entropy_from_mask(mask: int, length: int) -> float:
+    """Compute the entropy of a password from its class bitmask and length.
+
+    A password made only of characters of no class (ex: '½') has an entropy
+    of 0.0 where enpass fails with a math domain error.
+
+    Args:
+        mask (int): The bitmask of the character classes of the password.
+        length (int): The number of characters of the password.
+
+    Returns:
+        float: The entropy in bits, rounded to 2 decimals.
+    """
+    if length <= MAX_TABULATED_LENGTH or not CHARSET_SIZES[mask]:
+        return round(length * LOG2_CHARSET_SIZES[mask], 2)
+    return round(math.log2(CHARSET_SIZES[mask] ** length), 2)
+
+
+def calc_entropy(password: str) -> float:
+    """Calculate the entropy of a password in bits.
+
+    Args:
+        password (str): The password to score.
+
+    Returns:
+        float: The entropy in bits, rounded to 2 decimals.
+    """
+    return entropy_from_mask(charset_mask(password), len(password))
+
+
+def calc_entropy_batch(passwords) -> list:
+    """Calculate the entropy of each password of an iterable.
+
+    Args:
+        passwords (iterable): The passwords to score.
+
+    Returns:
+        list: The entropies, in the same order as the passwords.
+    """
+    return [
+        entropy_from_mask(charset_mask(password), len(password))
+        for password in passwords
+    ]
+
+
+def calc_entropy_vectorized(masks, lengths) -> list:
+    """Calculate the entropies from the columns of class bitmasks and lengths.
+
+    Intended for callers already holding the bitmasks and the lengths (ex:
+    precomputed with `charset_mask`), so that only table lookups are left.
+
+    Args:
+        masks (sequence): The class bitmasks of the passwords.
+        lengths (sequence): The lengths of the passwords, aligned on masks.
+
+    Returns:
+        list: The entropies, in the same order as the inputs.
+    """
+    return list(map(entropy_from_mask, masks, lengths))
+
+
+def validate(entropy: float, min_entropy: float = 60.0) -> bool:
+    """Check if an entropy meets the minimum requirement.
+
+    Args:
+        entropy (float): The entropy of a password.
+        min_entropy (float, optional): The minimum accepted entropy. Defaults to 60.0.
+
+    Returns:
+        bool: True if the entropy is high enough.
+    """
+    return entropy >= min_entropy
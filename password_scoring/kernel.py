@@ -1,39 +1,14 @@
 """Process the main algorithms for scoring a password."""
 
-import enum
 import logging
 
-import enpass as ep
 from password_validator import PasswordValidator
 
-logger = logging.getLogger(__name__)
-
-DEFAULT_MINIMUM_SCORE = 62
-
-
-class ColorScore(enum.Enum):
-    """Declare the enumaration for correspondance between a score and a color."""
-
-    black = (0, DEFAULT_MINIMUM_SCORE)
-    crimson = (DEFAULT_MINIMUM_SCORE, 85)
-    coral = (85, 95)
-    yellow = (95, 105)
-    yellowgreen = (105, 115)
-    lightgreen = (115, 155)
-    lime = (155, 1000)
+from password_scoring import entropy
+from password_scoring.colors import DEFAULT_MINIMUM_SCORE, ColorScore
+from password_scoring.pattern_analyzer import analyze_password
 
-    @staticmethod
-    def get_color_from_score(score: float) -> str:
-        """Retrieve the color that binds to this scoring value.
-
-        Args:
-            score (float): The scoring value of a password.
-
-        Returns:
-            str: The color that represents this score.
-        """
-        l = [c.name for c in ColorScore if int(score) in range(*c.value)]
-        return l[0]
+logger = logging.getLogger(__name__)
 
 
 class Singleton(type):
@@ -91,14 +66,16 @@ class PasswordConfigSingleton(metaclass=Singleton):
         message_for_entropy = ""
         status = True
 
-        if not self.__schema.validate(password):
+        if not valid_schema:
             message_for_schema = (
                 "The password is not meeting the length and/or characters"
                 " requirements !"
             )
             status = False
 
-        if not ep.validate(ep.calc_entropy(password), self.__min_entropy):
+        if not entropy.validate(
+            entropy.calc_entropy(password), self.__min_entropy
+        ):
             message_for_entropy = "The strength of the password is too low !"
             status = False
 
@@ -131,6 +108,9 @@ class PasswordConfig:
         has_symbols: bool = True,
         has_spaces: bool = False,
         min_score: int = DEFAULT_MINIMUM_SCORE,
+        analyze_patterns: bool = False,
+        breach_index=None,
+        reject_breached: bool = False,
     ) -> None:
         """Instanciate an object of type PasswordConfig.
 
@@ -143,9 +123,15 @@ class PasswordConfig:
             has_symbols (bool, optional): Indicates if a symbol character is needed for this password. Defaults to True.
             has_spaces (bool, optional): Indicates if a space character is needed for this password. Defaults to False.
             min_score (int, optional): Determines if the calculated final score strength is sufficient or not. Defaults to 65.
+            analyze_patterns (bool, optional): Indicates if the password should also be scored on its predictable patterns (dictionary words, keyboard walks, repeats, sequences, dates). Defaults to False.
+            breach_index (BreachIndex, optional): The index of the breached passwords to look the password up into. Defaults to None.
+            reject_breached (bool, optional): Indicates if a password found in the breach index is invalid. Defaults to False.
         """
         self.__schema = PasswordValidator()
         self.__min_entropy = min_score
+        self.__analyze_patterns = analyze_patterns
+        self.__breach_index = breach_index
+        self.__reject_breached = reject_breached
 
         if min_characters:
             self.__set_min_characters(min_characters)
@@ -201,29 +187,133 @@ class PasswordConfig:
         Args:
             password (str): The password to score.
 
+        Returns:
+            dict: The payload with the information for this password.
+        """
+        score = entropy.calc_entropy(password)
+        return self.__make_result(
+            password,
+            score,
+            ColorScore.get_color_from_score(score),
+            self.__schema.validate(password),
+        )
+
+    def validate_passwords(self, passwords: list) -> list:
+        """Validate a batch of passwords with the same policy.
+
+        A password repeated in the batch is scored once. The entropies are computed in one pass over the class bitmasks and the lengths of the passwords, the rules of the schema are bound once per batch and the color is looked up once per integer score.
+
+        Args:
+            passwords (list): The passwords to score.
+
+        Returns:
+            list: The payloads of validate_password, in the same order.
+        """
+        distinct = list(dict.fromkeys(passwords))
+        scores = entropy.calc_entropy_vectorized(
+            [entropy.charset_mask(password) for password in distinct],
+            [len(password) for password in distinct],
+        )
+        colors = {
+            int(score): ColorScore.get_color_from_score(score)
+            for score in scores
+        }
+        rules = [
+            (rule["method"], rule["positive"], rule["arguments"])
+            for rule in self.__schema.properties
+        ]
+        results = [
+            self.__make_result(
+                password,
+                score,
+                colors[int(score)],
+                all(
+                    method(password, positive, *arguments)
+                    for method, positive, arguments in rules
+                ),
+            )
+            for password, score in zip(distinct, scores)
+        ]
+        if len(distinct) == len(passwords):
+            return results
+        # A repeated password gets a copy, its caller may complete it.
+        scored = dict(zip(distinct, results))
+        return [dict(scored[password]) for password in passwords]
+
+    def __make_result(
+        self, password: str, score: float, color: str, valid_schema: bool
+    ) -> dict:
+        """Build the scoring result of a password from its entropy and its schema check.
+
+        Args:
+            password (str): The password to score.
+            score (float): The entropy of the password.
+            color (str): The color of the score.
+            valid_schema (bool): Indicates if the password meets the length and characters requirements.
+
         Returns:
             dict: The payload with the information for this password.
         """
         message_for_schema = "Your password is valid."
         message_for_entropy = "Your password is strong enough."
         status = True
-        score = ep.calc_entropy(password)
 
-        if not self.__schema.validate(password):
+        if not valid_schema:
             message_for_schema = (
                 "The password is not meeting the length and/or characters"
                 " requirements!"
             )
             status = False
 
-        if not ep.validate(score, self.__min_entropy):
+        if not entropy.validate(score, self.__min_entropy):
             message_for_entropy = "The strength of the password is too low!"
             status = False
-        logger.info("Password score: {}".format(score))
-        return {
+        logger.debug("Password score: %s", score)
+        result = {
             "status": status,
             "score": score,
-            "color": ColorScore.get_color_from_score(score),
+            "color": color,
             "message_password": message_for_schema,
             "message_score": message_for_entropy,
         }
+        if self.__analyze_patterns:
+            self.__apply_pattern_analysis(password, result)
+        if self.__breach_index is not None:
+            self.__apply_breach_check(password, result)
+        return result
+
+    def __apply_breach_check(self, password: str, result: dict):
+        """Complete the scoring result with the breach index lookup.
+
+        Args:
+            password (str): The password to score.
+            result (dict): The payload built by validate_password.
+        """
+        result["breached"] = self.__breach_index.is_breached(password)
+        if result["breached"] and self.__reject_breached:
+            result["message_score"] = (
+                "The password appears in a known data breach!"
+            )
+            result["color"] = ColorScore.black.name
+            result["status"] = False
+
+    def __apply_pattern_analysis(self, password: str, result: dict):
+        """Complete the scoring result with the pattern analysis.
+
+        The strength of the password is then the lowest of the entropy score and the pattern score.
+
+        Args:
+            password (str): The password to score.
+            result (dict): The payload built by validate_password.
+        """
+        analysis = analyze_password(password)
+        pattern_score = analysis["pattern_score"]
+        result.update(analysis)
+        result["color"] = ColorScore.get_color_from_score(
+            min(result["score"], pattern_score)
+        )
+        if result["score"] >= self.__min_entropy and not entropy.validate(
+            pattern_score, self.__min_entropy
+        ):
+            result["message_score"] = "The password is too predictable!"
+            result["status"] = False
@@ -0,0 +1,393 @@
+"""Estimate the strength of a password from the predictable patterns it uses.
+
+The analysis follows the zxcvbn approach: every dictionary word (with
+leetspeak substitutions), keyboard walk, repeat, sequence and date found in
+the password is given a number of guesses, then the cheapest way to cover
+the password with matches and brute-forced characters is kept.
+
+The dictionary trie, the keyboard graphs and the regular expressions are
+compiled once per process, on first use.
+"""
+
+import math
+import os
+import re
+from functools import lru_cache
+
+from password_scoring.entropy import LOG2_CHARSET_SIZES, charset_mask
+
+DICTIONARY_PATH: str = os.path.join(
+    os.path.dirname(__file__), "dictionaries", "common_passwords.txt"
+)
+
+PATTERN_DICTIONARY: str = "dictionary"
+PATTERN_KEYBOARD: str = "keyboard"
+PATTERN_REPEAT: str = "repeat"
+PATTERN_SEQUENCE: str = "sequence"
+PATTERN_DATE: str = "date"
+
+MIN_MATCH_LENGTH: int = 3
+MAX_SEQUENCE_DELTA: int = 5
+REFERENCE_YEAR: int = 2024
+MIN_YEAR_SPACE: int = 20
+# Characters beyond this length are counted as brute-forced, which bounds
+# the cost of the analysis for very long passwords.
+MAX_ANALYZED_LENGTH: int = 128
+
+LEET_SUBSTITUTIONS: dict = {
+    "4": "a",
+    "@": "a",
+    "8": "b",
+    "(": "c",
+    "{": "c",
+    "[": "c",
+    "<": "c",
+    "3": "e",
+    "6": "g",
+    "9": "g",
+    "1": "il",
+    "!": "i",
+    "|": "il",
+    "0": "o",
+    "$": "s",
+    "5": "s",
+    "7": "lt",
+    "+": "t",
+    "%": "x",
+    "2": "z",
+}
+
+# Each layout is described by its rows of unshifted then shifted keys.
+KEYBOARD_LAYOUTS: dict = {
+    "qwerty": (
+        ("`1234567890-=", "qwertyuiop[]\\", "asdfghjkl;'", "zxcvbnm,./"),
+        ("~!@#$%^&*()_+", "QWERTYUIOP{}|", 'ASDFGHJKL:"', "ZXCVBNM<>?"),
+    ),
+    "azerty": (
+        ("²&é\"'(-è_çà)=", "azertyuiop^$", "qsdfghjklmù*", "<wxcvbn,;:!"),
+        ("²1234567890°+", "AZERTYUIOP¨£", "QSDFGHJKLM%µ", ">WXCVBN?./§"),
+    ),
+}
+
+# Neighbour slots of a key on a slanted keyboard: (row offset, col offset).
+_KEYBOARD_DIRECTIONS: tuple = (
+    (0, -1),
+    (0, 1),
+    (-1, 0),
+    (-1, 1),
+    (1, -1),
+    (1, 0),
+)
+
+_REPEAT_GREEDY = re.compile(r"(.+)\1+")
+_REPEAT_LAZY = re.compile(r"(.+?)\1+")
+_YEAR = re.compile(r"(?=(19\d\d|20[0-4]\d))")
+_DATE = re.compile(
+    r"(?=((\d{1,2})([\s/\\_.-]?)(\d{1,2})\3(19\d\d|20[0-4]\d|\d\d)))"
+)
+_DATE_YEAR_FIRST = re.compile(
+    r"(?=((19\d\d|20[0-4]\d)([\s/\\_.-]?)(\d{1,2})\3(\d{1,2})))"
+)
+
+
+@lru_cache(maxsize=None)
+def _load_dictionary_trie() -> dict:
+    """Build the trie of the ranked dictionary words.
+
+    Returns:
+        dict: Nested dicts keyed by characters, "" holding the word rank.
+    """
+    trie = {}
+    with open(DICTIONARY_PATH, encoding="utf-8") as f:
+        for rank, word in enumerate((w.strip().lower() for w in f), 1):
+            if len(word) < MIN_MATCH_LENGTH:
+                continue
+            node = trie
+            for character in word:
+                node = node.setdefault(character, {})
+            node.setdefault("", rank)
+    return trie
+
+
+@lru_cache(maxsize=None)
+def _load_keyboard_graphs() -> tuple:
+    """Build the adjacency graphs of the keyboard layouts.
+
+    Returns:
+        tuple: For each layout, a tuple (graph, shifted characters, number of keys, average degree), the graph mapping a character to its neighbour characters with their direction slot.
+    """
+    graphs = []
+    for unshifted_rows, shifted_rows in KEYBOARD_LAYOUTS.values():
+        positions = {}
+        for rows in (unshifted_rows, shifted_rows):
+            for r, row in enumerate(rows):
+                for c, character in enumerate(row):
+                    positions.setdefault(character, (r, c))
+
+        graph = {}
+        degrees = 0
+        for character, (r, c) in positions.items():
+            neighbours = {}
+            for slot, (dr, dc) in enumerate(_KEYBOARD_DIRECTIONS):
+                nr, nc = r + dr, c + dc
+                if 0 <= nr < len(unshifted_rows):
+                    for rows in (unshifted_rows, shifted_rows):
+                        if 0 <= nc < len(rows[nr]):
+                            neighbours[rows[nr][nc]] = slot
+            graph[character] = neighbours
+            degrees += len(set(neighbours.values()))
+        keys = len(set(positions.values()))
+        shifted = set("".join(shifted_rows)) - set("".join(unshifted_rows))
+        graphs.append((graph, shifted, keys, degrees / len(positions)))
+    return tuple(graphs)
+
+
+def _match(pattern: str, i: int, j: int, guesses: float) -> tuple:
+    return (i, j, math.log2(max(guesses, 1)), pattern)
+
+
+def _uppercase_variations(token: str) -> float:
+    if token.islower() or not any(c.isalpha() for c in token):
+        return 1
+    upper = sum(1 for c in token if c.isupper())
+    lower = sum(1 for c in token if c.islower())
+    if token.isupper() or token[1:].islower() or token[:-1].islower():
+        return 2
+    return sum(
+        math.comb(upper + lower, k) for k in range(1, min(upper, lower) + 1)
+    )
+
+
+def _dictionary_matches(password: str) -> list:
+    trie = _load_dictionary_trie()
+    lowered = password.lower()
+    matches = []
+    length = len(password)
+    for i in range(length):
+        # Depth-first walk of the trie, leet characters opening branches.
+        stack = [(trie, i, 0)]
+        while stack:
+            node, j, substitutions = stack.pop()
+            if "" in node and j - i >= MIN_MATCH_LENGTH:
+                guesses = (
+                    node[""]
+                    * _uppercase_variations(password[i:j])
+                    * 2**substitutions
+                )
+                matches.append(_match(PATTERN_DICTIONARY, i, j - 1, guesses))
+            if j == length:
+                continue
+            character = lowered[j]
+            child = node.get(character)
+            if child is not None:
+                stack.append((child, j + 1, substitutions))
+            for unleeted in LEET_SUBSTITUTIONS.get(character, ""):
+                child = node.get(unleeted)
+                if child is not None:
+                    stack.append((child, j + 1, substitutions + 1))
+    return matches
+
+
+def _keyboard_matches(password: str) -> list:
+    matches = []
+    length = len(password)
+    for graph, shifted_characters, keys, degree in _load_keyboard_graphs():
+        i = 0
+        while i < length - 1:
+            j = i
+            turns = 0
+            shifted = 0
+            direction = None
+            while j < length - 1:
+                slot = graph.get(password[j], {}).get(password[j + 1])
+                if slot is None:
+                    break
+                if slot != direction:
+                    turns += 1
+                    direction = slot
+                shifted += password[j + 1] in shifted_characters
+                j += 1
+            if j - i + 1 >= MIN_MATCH_LENGTH:
+                guesses = 0
+                size = j - i + 1
+                for k in range(2, size + 1):
+                    for t in range(1, min(turns, k - 1) + 1):
+                        guesses += math.comb(k - 1, t - 1) * keys * degree**t
+                if shifted:
+                    guesses *= 2
+                matches.append(_match(PATTERN_KEYBOARD, i, j, guesses))
+            i = max(j, i + 1)
+    return matches
+
+
+def _sequence_matches(password: str) -> list:
+    matches = []
+    length = len(password)
+    i = 0
+    while i < length - 1:
+        delta = ord(password[i + 1]) - ord(password[i])
+        j = i + 1
+        while (
+            j < length - 1 and ord(password[j + 1]) - ord(password[j]) == delta
+        ):
+            j += 1
+        if (
+            j - i + 1 >= MIN_MATCH_LENGTH
+            and 0 < abs(delta) <= MAX_SEQUENCE_DELTA
+        ):
+            first = password[i]
+            if first in "aAzZ019":
+                base = 4
+            elif first.isdigit():
+                base = 10
+            else:
+                base = 26
+            if delta < 0:
+                base *= 2
+            matches.append(_match(PATTERN_SEQUENCE, i, j, base * (j - i + 1)))
+        i = j
+    return matches
+
+
+def _repeat_matches(password: str) -> list:
+    matches = []
+    position = 0
+    length = len(password)
+    while position < length:
+        greedy = _REPEAT_GREEDY.search(password, position)
+        if not greedy:
+            break
+        lazy = _REPEAT_LAZY.search(password, position)
+        if len(greedy.group(0)) > len(lazy.group(0)):
+            match = greedy
+            base = _REPEAT_LAZY.fullmatch(match.group(0)).group(1)
+        else:
+            match = lazy
+            base = match.group(1)
+        count = len(match.group(0)) // len(base)
+        base_guesses = 2 ** _minimum_bits(base) if len(base) > 1 else 10
+        matches.append(
+            _match(
+                PATTERN_REPEAT,
+                match.start(),
+                match.end() - 1,
+                base_guesses * count,
+            )
+        )
+        position = match.end()
+    return matches
+
+
+def _date_matches(password: str) -> list:
+    matches = []
+    for m in _YEAR.finditer(password):
+        year = int(m.group(1))
+        matches.append(
+            _match(
+                PATTERN_DATE,
+                m.start(1),
+                m.start(1) + 3,
+                max(abs(year - REFERENCE_YEAR), MIN_YEAR_SPACE),
+            )
+        )
+    for regex, year_first in ((_DATE, False), (_DATE_YEAR_FIRST, True)):
+        for m in regex.finditer(password):
+            if year_first:
+                year, day_or_month, month_or_day = m.group(2, 4, 5)
+            else:
+                day_or_month, month_or_day, year = m.group(2, 4, 5)
+            first, second = int(day_or_month), int(month_or_day)
+            if not (
+                (1 <= first <= 31 and 1 <= second <= 12)
+                or (1 <= first <= 12 and 1 <= second <= 31)
+            ):
+                continue
+            year = int(year)
+            if year < 100:
+                year += 1900 if year > 50 else 2000
+            guesses = max(abs(year - REFERENCE_YEAR), MIN_YEAR_SPACE) * 365
+            if m.group(3):
+                guesses *= 4
+            start = m.start(1)
+            matches.append(
+                _match(
+                    PATTERN_DATE, start, start + len(m.group(1)) - 1, guesses
+                )
+            )
+    return matches
+
+
+def _find_matches(password: str) -> list:
+    return (
+        _dictionary_matches(password)
+        + _keyboard_matches(password)
+        + _sequence_matches(password)
+        + _repeat_matches(password)
+        + _date_matches(password)
+    )
+
+
+def _best_cover(password: str, matches: list) -> tuple:
+    """Find the cheapest cover of the password by matches and brute force.
+
+    Args:
+        password (str): The password to analyze.
+        matches (list): The matches (start, end, bits, pattern) found.
+
+    Returns:
+        tuple: (the number of bits of the cover, the matches of the cover)
+    """
+    bruteforce_bits = LOG2_CHARSET_SIZES[charset_mask(password)]
+    length = len(password)
+    ending_at = [[] for _ in range(length)]
+    for match in matches:
+        ending_at[match[1]].append(match)
+
+    best = [0.0] * (length + 1)
+    chosen = [None] * (length + 1)
+    for k in range(1, length + 1):
+        best[k] = best[k - 1] + bruteforce_bits
+        for match in ending_at[k - 1]:
+            bits = best[match[0]] + match[2]
+            if bits < best[k]:
+                best[k] = bits
+                chosen[k] = match
+
+    cover = []
+    k = length
+    while k > 0:
+        if chosen[k] is None:
+            k -= 1
+        else:
+            cover.append(chosen[k])
+            k = chosen[k][0]
+    cover.reverse()
+    return best[length], cover
+
+
+def _minimum_bits(password: str) -> float:
+    return _best_cover(password, _find_matches(password))[0]
+
+
+def analyze_password(password: str) -> dict:
+    """Estimate the strength of a password according to its patterns.
+
+    The pattern score is expressed in bits, like the entropy score, and is
+    never higher than it: a password with no pattern gets its entropy.
+
+    Args:
+        password (str): The password to analyze.
+
+    Returns:
+        dict: The pattern score and the patterns kept in the estimation.
+    """
+    bits, cover = _best_cover(
+        password, _find_matches(password[:MAX_ANALYZED_LENGTH])
+    )
+    return {
+        "pattern_score": round(bits, 2),
+        "patterns": [
+            {"pattern": pattern, "start": start, "end": end}
+            for start, end, _, pattern in cover
+        ],
+    }
@@ -0,0 +1,101 @@
+"""Declare the scoring policies and their compact ids.
+
+A policy id is a compact and self-contained encoding of a policy, ex:
+"p1-12-50-0f-80" (min length, max length, hexadecimal flags, min score):
+no storage is needed to resolve it, each process decodes an id once.
+"""
+
+import math
+import re
+from functools import lru_cache
+from typing import NamedTuple
+
+
+class ScoringPolicy(NamedTuple):
+    """Declare the policy a password is scored with."""
+
+    min_characters: int
+    max_characters: int
+    has_uppercase: bool
+    has_lowercase: bool
+    has_digits: bool
+    has_symbols: bool
+    has_spaces: bool
+    min_score: float
+    analyze_patterns: bool = False
+    reject_breached: bool = False
+
+    def as_config(self) -> dict:
+        """Give the arguments of the PasswordConfig of this policy.
+
+        Returns:
+            dict: The keyword arguments of PasswordConfig.
+        """
+        return self._asdict()
+
+
+# The flags of a policy id, by bit.
+_POLICY_ID_FLAGS: tuple = (
+    "has_uppercase",
+    "has_lowercase",
+    "has_digits",
+    "has_symbols",
+    "has_spaces",
+    "analyze_patterns",
+    "reject_breached",
+)
+_POLICY_ID = re.compile(
+    r"p1-([1-9][0-9]{0,5})-([1-9][0-9]{0,5})-([0-7][0-9a-f])"
+    r"-([0-9][0-9.e-]{0,23})"
+)
+
+
+def encode_policy_id(policy: ScoringPolicy) -> str:
+    """Give the policy id of a scoring policy.
+
+    Args:
+        policy (ScoringPolicy): The scoring policy.
+
+    Returns:
+        str: The compact and self-contained id of the policy.
+    """
+    flags = 0
+    for bit, field in enumerate(_POLICY_ID_FLAGS):
+        if getattr(policy, field):
+            flags |= 1 << bit
+    return "p1-{}-{}-{:02x}-{}".format(
+        policy.min_characters, policy.max_characters, flags, policy.min_score
+    )
+
+
+@lru_cache(maxsize=1024)
+def decode_policy_id(policy_id: str) -> ScoringPolicy | None:
+    """Give the scoring policy of a policy id, decoded once per process.
+
+    Args:
+        policy_id (str): The id of a policy, given by encode_policy_id.
+
+    Returns:
+        ScoringPolicy: The scoring policy, None when the id is invalid.
+    """
+    match = _POLICY_ID.fullmatch(policy_id)
+    if match is None:
+        return None
+    min_characters, max_characters, flags, min_score = match.groups()
+    min_characters, max_characters = int(min_characters), int(max_characters)
+    try:
+        min_score = int(min_score) if min_score.isdigit() else float(min_score)
+    except ValueError:
+        return None
+    if min_characters > max_characters or not 0 < min_score < math.inf:
+        return None
+    flags = int(flags, 16)
+    return ScoringPolicy(
+        min_characters=min_characters,
+        max_characters=max_characters,
+        min_score=min_score,
+        **{
+            field: bool(flags & 1 << bit)
+            for bit, field in enumerate(_POLICY_ID_FLAGS)
+        },
+    )
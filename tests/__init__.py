@@ -6,7 +6,7 @@ from faker import Faker
 
 from core import create_app, db
 from core.models import User
-from core.service.password_scoring import DEFAULT_MINIMUM_SCORE
+from password_scoring import DEFAULT_MINIMUM_SCORE
 
 
 class BaseTestClass(unittest.TestCase):
@@ -145,7 +145,7 @@ class BaseTestClass(unittest.TestCase):
             User: Returns an instance of a user
         """
         user = User(email)
-        user.set_token(secret, email)
+        user.set_token(secret)
         user.save()
         return user
 
@@ -199,5 +199,7 @@ class BaseTestClass(unittest.TestCase):
             "sqlite:///api-password-scoring-testing.db"
         )
         configuration["API_MAX_USAGE_LIMIT"] = "20"
+        configuration["CELERY_URL_BROKER"] = "memory://"
+        configuration["CELERY_URL_RESULT"] = "cache+memory://"
 
         return configuration
@@ -0,0 +1,162 @@
+from sqlalchemy import event
+
+from core import db
+from core.api import ROUTE_PASSWORD_SCORING, ROUTE_RESET_SESSION_TOKEN
+from core.models import User
+from core.service.API_key_generator import (
+    ApiKeyVerifier,
+    api_key_verifier_init_app,
+    create_sha256_signature,
+    create_signed_api_key,
+)
+
+from . import BaseTestClass
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1718000000
+
+    def __call__(self):
+        return self.now
+
+
+class TestApiKeys(BaseTestClass):
+    def setUp(self):
+        super().setUp()
+        self.secret_key = self.app.config["SECRET_KEY"]
+        self.clock = FakeClock()
+
+    def score(self, api_key: str):
+        payload = {
+            "api_key": api_key,
+            "password": "xK9#mQ2$vL7@pW",
+            **self.characteristics,
+        }
+        return self.client.post(ROUTE_PASSWORD_SCORING, json=payload)
+
+    def test_signed_api_key_claims(self):
+        verifier = ApiKeyVerifier(self.secret_key, clock=self.clock)
+        api_key = create_signed_api_key(self.secret_key, 42, 3, 1718000000)
+
+        self.assertTrue(api_key.startswith("pk1.42.3.1718000000."))
+        claims = verifier.get_claims(api_key)
+        self.assertEqual((42, 3, 1718000000), tuple(claims))
+        self.assertTrue(verifier.verify(api_key))
+
+    def test_forged_api_keys_are_rejected(self):
+        verifier = ApiKeyVerifier(self.secret_key, clock=self.clock)
+        api_key = create_signed_api_key(self.secret_key, 42, 3, 1718000000)
+        other_key = create_signed_api_key("00" * 16, 42, 3, 1718000000)
+
+        for forged_key in (
+            api_key.replace("pk1.42.", "pk1.43.", 1),
+            api_key[:-1] + ("0" if api_key[-1] != "0" else "1"),
+            api_key[:-2],
+            other_key,
+            "pk1.",
+            "",
+            None,
+        ):
+            with self.subTest(api_key=forged_key):
+                self.assertFalse(verifier.verify(forged_key))
+
+    def test_expired_and_revoked_api_keys_are_rejected(self):
+        verifier = ApiKeyVerifier(
+            self.secret_key, max_age=3600, clock=self.clock
+        )
+        api_key = create_signed_api_key(self.secret_key, 42, 3, 1718000000)
+
+        self.clock.now += 3600
+        self.assertTrue(verifier.verify(api_key))
+        self.clock.now += 1
+        self.assertFalse(verifier.verify(api_key))
+
+        self.clock.now = 1718000000
+        verifier.revoke(api_key)
+        self.assertFalse(verifier.verify(api_key))
+
+    def test_legacy_api_keys(self):
+        legacy_key = create_sha256_signature(self.secret_key, "legacy")
+
+        self.assertTrue(ApiKeyVerifier(self.secret_key).verify(legacy_key))
+        self.assertFalse(
+            ApiKeyVerifier(self.secret_key, accept_legacy=False).verify(
+                legacy_key
+            )
+        )
+
+    def test_invalid_api_keys_do_not_reach_the_database(self):
+        with self.app.app_context():
+            api_key = BaseTestClass.get_user().token
+            statements = []
+            event.listen(
+                db.engine,
+                "before_cursor_execute",
+                lambda *args: statements.append(args[2]),
+            )
+            response = self.score(api_key[:-1] + "x")
+
+            self.assertEqual(
+                401,
+                response.status_code,
+                "The response status code is unexpected !",
+            )
+            self.assertEqual(
+                "The API key is invalid!", response.get_json()["message"]
+            )
+            self.assertEqual([], statements)
+
+    def test_renewed_api_key_is_revoked(self):
+        with self.app.app_context():
+            api_key = BaseTestClass.get_user().token
+            response = self.client.post(
+                ROUTE_RESET_SESSION_TOKEN, json={"api_key": api_key}
+            )
+            renewed_key = response.get_json()["api_key"]
+
+            self.assertNotEqual(api_key, renewed_key)
+            self.assertEqual(401, self.score(api_key).status_code)
+            self.assertEqual(
+                "The API key is invalid!",
+                self.score(api_key).get_json()["message"],
+            )
+            self.assertEqual(200, self.score(renewed_key).status_code)
+
+    def test_non_ascii_signatures_are_rejected(self):
+        with self.app.app_context():
+            user_id = BaseTestClass.get_user().id
+        response = self.score("pk1.{}.0.0.".format(user_id) + "\u00e9" * 64)
+
+        self.assertEqual(
+            401,
+            response.status_code,
+            "The response status code is unexpected !",
+        )
+        self.assertEqual(
+            "The API key is invalid!", response.get_json()["message"]
+        )
+
+    def test_expired_api_key_is_renewed(self):
+        self.app.config["API_KEY_MAX_AGE"] = "3600"
+        api_key_verifier_init_app(self.app)
+        with self.app.app_context():
+            user = BaseTestClass.get_user()
+            user.token = create_signed_api_key(
+                self.secret_key, user.id, 0, 1718000000
+            )
+            user.save()
+            api_key = user.token
+
+            self.assertEqual(401, self.score(api_key).status_code)
+            response = self.client.post(
+                ROUTE_RESET_SESSION_TOKEN, json={"api_key": api_key}
+            )
+            renewed_key = response.get_json()["api_key"]
+
+            self.assertTrue(response.get_json()["status"])
+            self.assertEqual(200, self.score(renewed_key).status_code)
+            self.assertIsNone(
+                User.get_by_api_token(api_key, allow_expired=True),
+                "The renewed expired API key is not revoked !",
+            )
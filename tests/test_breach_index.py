@@ -0,0 +1,145 @@
+import gc
+import hashlib
+import os
+import tempfile
+import weakref
+from unittest import TestCase
+
+from core.api import get_password_config
+from core.service.breach_index import (
+    BreachIndex,
+    BreachIndexError,
+    build_breach_index,
+    get_breach_index,
+)
+from password_scoring import decode_policy_id
+
+BREACHED_PASSWORDS = ["123456", "password", "azerty", "P@ssw0rd", "soleil"]
+
+
+def sha1_hex(password: str) -> str:
+    return hashlib.sha1(password.encode("utf-8")).hexdigest().upper()  # nosec
+
+
+class TestBreachIndex(TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.source = os.path.join(self.directory.name, "hashes.txt")
+        self.index_path = os.path.join(self.directory.name, "breach.idx")
+        with open(self.source, "w", encoding="utf-8") as f:
+            for count, password in enumerate(BREACHED_PASSWORDS, 1):
+                f.write("{}:{}\n".format(sha1_hex(password), count))
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_lookup_of_breached_and_safe_passwords(self):
+        self.assertEqual(
+            len(BREACHED_PASSWORDS),
+            build_breach_index(self.source, self.index_path, presorted=False),
+        )
+        index = BreachIndex(self.index_path)
+        for count, password in enumerate(BREACHED_PASSWORDS, 1):
+            self.assertTrue(index.is_breached(password))
+            self.assertEqual(
+                count,
+                index.count_hash(bytes.fromhex(sha1_hex(password))),
+            )
+        self.assertFalse(index.is_breached("xK9#mQ2$vL7@"))
+        index.close()
+
+    def test_rebuild_replaces_the_mapped_index(self):
+        build_breach_index(self.source, self.index_path, presorted=False)
+        index = BreachIndex(self.index_path)
+        with open(self.source, "w", encoding="utf-8") as f:
+            f.write(sha1_hex("soleil") + ":1\n")
+        build_breach_index(self.source, self.index_path)
+
+        # The mapped index keeps reading the file it opened.
+        self.assertTrue(index.is_breached("password"))
+        index.close()
+        index = BreachIndex(self.index_path)
+        self.assertEqual(1, index.number_of_records)
+        self.assertFalse(os.path.exists(self.index_path + ".tmp"))
+        index.close()
+
+    def test_unsorted_hash_list_is_refused_when_presorted(self):
+        with self.assertRaises(BreachIndexError):
+            build_breach_index(self.source, self.index_path)
+        self.assertFalse(os.path.exists(self.index_path + ".body"))
+
+    def test_small_fanout(self):
+        build_breach_index(
+            self.source, self.index_path, fanout_bits=4, presorted=False
+        )
+        index = BreachIndex(self.index_path)
+        self.assertTrue(all(index.is_breached(p) for p in BREACHED_PASSWORDS))
+        index.close()
+
+    def test_range_of_prefix(self):
+        hashes = sorted(sha1_hex(str(i)) for i in range(3000)) + [
+            sha1_hex(p) for p in BREACHED_PASSWORDS
+        ]
+        with open(self.source, "w", encoding="utf-8") as f:
+            f.write("\n".join(hashes))
+        prefix = sha1_hex("password")[:5]
+        expected = "".join(
+            "{}:1\r\n".format(h[5:])
+            for h in sorted(set(hashes))
+            if h.startswith(prefix)
+        )
+        for fanout_bits in (4, 20, 22):
+            build_breach_index(
+                self.source,
+                self.index_path,
+                fanout_bits=fanout_bits,
+                presorted=False,
+            )
+            index = BreachIndex(self.index_path)
+            self.assertEqual(
+                expected, "".join(index.iter_range(prefix, lines_per_chunk=2))
+            )
+            self.assertEqual("", "".join(index.iter_range("00000")))
+            index.close()
+
+    def test_invalid_index_file(self):
+        with self.assertRaises(BreachIndexError):
+            BreachIndex(self.source)
+        self.assertIsNone(get_breach_index(self.source))
+        self.assertIsNone(get_breach_index(""))
+
+    def test_rebuilt_index_is_reloaded(self):
+        self.assertIsNone(get_breach_index(self.index_path, check_interval=0))
+        build_breach_index(self.source, self.index_path, presorted=False)
+        index = get_breach_index(self.index_path, check_interval=0)
+
+        self.assertIsNotNone(index, "The built index is not loaded !")
+        self.assertIs(index, get_breach_index(self.index_path))
+        with open(self.source, "w", encoding="utf-8") as f:
+            f.write(sha1_hex("soleil") + ":1\n")
+        build_breach_index(self.source, self.index_path)
+        os.utime(self.index_path, ns=(0, 0))
+
+        rebuilt_index = get_breach_index(self.index_path, check_interval=0)
+        self.assertEqual(1, rebuilt_index.number_of_records)
+        self.assertNotEqual(index.generation, rebuilt_index.generation)
+
+    def test_rebuilt_index_is_released_by_the_validators(self):
+        policy = decode_policy_id("p1-10-40-0f-62")
+        build_breach_index(self.source, self.index_path, presorted=False)
+        index = BreachIndex(self.index_path)
+        password_config = get_password_config(policy, index)
+        self.assertIs(password_config, get_password_config(policy, index))
+        released = weakref.ref(index)
+        del index, password_config
+
+        rebuilt_index = BreachIndex(self.index_path)
+        self.assertTrue(
+            get_password_config(policy, rebuilt_index).validate_password(
+                "password"
+            )["breached"]
+        )
+        gc.collect()
+        self.assertIsNone(
+            released(), "The validators keep the previous index mapped !"
+        )
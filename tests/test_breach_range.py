@@ -0,0 +1,61 @@
+import hashlib
+import os
+import tempfile
+
+from core.api import ROUTE_BREACH_RANGE
+from core.service.breach_index import build_breach_index
+
+from . import BaseTestClass
+
+
+class TestBreachRange(BaseTestClass):
+    def setUp(self):
+        super().setUp()
+        self.directory = tempfile.TemporaryDirectory()
+        self.password_hash = (
+            hashlib.sha1("soleil".encode("utf-8")).hexdigest().upper()  # nosec
+        )
+        source = os.path.join(self.directory.name, "hashes.txt")
+        with open(source, "w", encoding="utf-8") as f:
+            f.write("{}:42\n".format(self.password_hash))
+        self.app.config["BREACH_INDEX_PATH"] = os.path.join(
+            self.directory.name, "breach.idx"
+        )
+        build_breach_index(source, self.app.config["BREACH_INDEX_PATH"])
+
+    def tearDown(self):
+        super().tearDown()
+        self.directory.cleanup()
+
+    def get_range(self, prefix: str, **kwargs):
+        return self.client.get(
+            ROUTE_BREACH_RANGE.replace("<prefix>", prefix), **kwargs
+        )
+
+    def test_range_of_breached_hash(self):
+        with self.app.app_context():
+            response = self.get_range(self.password_hash[:5].lower())
+            self.assertEqual(200, response.status_code)
+            self.assertEqual(
+                "{}:42\r\n".format(self.password_hash[5:]),
+                response.get_data(as_text=True),
+            )
+            self.assertIn("public", response.headers["Cache-Control"])
+            self.assertIn("max-age=86400", response.headers["Cache-Control"])
+
+            response = self.get_range(
+                self.password_hash[:5],
+                headers={"If-None-Match": response.headers["ETag"]},
+            )
+            self.assertEqual(304, response.status_code)
+            self.assertEqual(b"", response.get_data())
+
+    def test_invalid_prefix(self):
+        with self.app.app_context():
+            for prefix in ("ABCD", "ABCDEF", "GHIJK"):
+                self.assertEqual(400, self.get_range(prefix).status_code)
+
+    def test_range_without_breach_index(self):
+        with self.app.app_context():
+            self.app.config["BREACH_INDEX_PATH"] = ""
+            self.assertEqual(503, self.get_range("ABCDE").status_code)
@@ -0,0 +1,42 @@
+from core import data_access
+from core.models import NamedPolicy, TokenUsage
+from password_scoring import decode_policy_id
+
+from . import BaseTestClass
+
+
+class TestDataAccess(BaseTestClass):
+    def test_token_usage_row(self):
+        with self.app.app_context():
+            user = BaseTestClass.get_user()
+            TokenUsage.increment(user.id, 3, slots=2)
+            TokenUsage.increment(user.id, 4, slots=2)
+
+            token_usage = data_access.select_token_usage(user.token)
+            self.assertEqual((user.id, 7), tuple(token_usage))
+            self.assertIsNone(data_access.select_token_usage("unknown"))
+
+    def test_users_by_token_and_email(self):
+        with self.app.app_context():
+            user = BaseTestClass.get_user()
+
+            self.assertIs(user, data_access.select_user_by_token(user.token))
+            self.assertIs(user, data_access.select_user_by_email(user.email))
+            self.assertIsNone(data_access.select_user_by_email("x@y.z"))
+
+    def test_named_policy(self):
+        policy = decode_policy_id("p1-12-50-0f-80")
+        with self.app.app_context():
+            user = BaseTestClass.get_user()
+            NamedPolicy(user.id, "strict", policy).save()
+
+            self.assertEqual(
+                policy._asdict(),
+                data_access.select_named_policy(user.token, "strict"),
+            )
+            self.assertIsNone(
+                data_access.select_named_policy(user.token, "other")
+            )
+            self.assertEqual(
+                policy, NamedPolicy.load_policy(user.token, "strict")
+            )
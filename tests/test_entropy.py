@@ -0,0 +1,101 @@
+import math
+import random
+from unittest import TestCase
+
+import enpass
+from faker import Faker
+
+from password_scoring import PasswordConfig, entropy
+
+REGRESSION_CORPUS_SEED = 20240601
+REGRESSION_CORPUS_SIZE = 2000
+
+EDGE_CASES = [
+    "",
+    "a",
+    "A",
+    "0",
+    "!",
+    " ",
+    "aaaaaaaaaa",
+    "Password1234!",
+    "correct horse battery staple",
+    "Tr0ub4dor&3",
+    "ÉCOLE-été_2024",
+    "ßẞǅ²߀",
+    "pass word\twith\nwhitespaces",
+    "😀😀secret😀😀",
+    "x" * 300,
+    "Aa1!" * 200,
+]
+
+
+class TestEntropy(TestCase):
+    def setUp(self):
+        self.fake = Faker()
+        Faker.seed(REGRESSION_CORPUS_SEED)
+        rng = random.Random(REGRESSION_CORPUS_SEED)  # nosec B311
+        self.corpus = list(EDGE_CASES)
+        for _ in range(REGRESSION_CORPUS_SIZE):
+            self.corpus.append(
+                self.fake.password(
+                    length=rng.randrange(4, 64),
+                    special_chars=rng.random() < 0.5,
+                    digits=rng.random() < 0.5,
+                    upper_case=rng.random() < 0.5,
+                    lower_case=True,
+                )
+            )
+
+    def test_entropy_matches_enpass_on_regression_corpus(self):
+        for password in self.corpus:
+            self.assertEqual(
+                enpass.calc_entropy(password),
+                entropy.calc_entropy(password),
+                "The entropy differs from enpass for {!r}".format(password),
+            )
+
+    def test_batch_and_vectorized_match_scalar(self):
+        expected = [entropy.calc_entropy(p) for p in self.corpus]
+        self.assertEqual(expected, entropy.calc_entropy_batch(self.corpus))
+        self.assertEqual(
+            expected,
+            entropy.calc_entropy_vectorized(
+                [entropy.charset_mask(p) for p in self.corpus],
+                [len(p) for p in self.corpus],
+            ),
+        )
+
+    def test_batch_kernel_matches_validate_password(self):
+        # The repeated passwords of the batch, the colors stop at 1000 bits.
+        passwords = [p for p in self.corpus + EDGE_CASES if len(p) <= 100]
+        for password_config in (
+            PasswordConfig(),
+            PasswordConfig(analyze_patterns=True, has_spaces=True),
+        ):
+            results = password_config.validate_passwords(passwords)
+            self.assertEqual(
+                [password_config.validate_password(p) for p in passwords],
+                results,
+                "The batch kernel does not score as validate_password !",
+            )
+            self.assertIsNot(results[0], results[passwords.index("", 1)])
+
+    def test_tabulated_lengths_match_exact_formula(self):
+        for mask, size in enumerate(entropy.CHARSET_SIZES):
+            if not size:
+                continue
+            for length in range(entropy.MAX_TABULATED_LENGTH + 1):
+                self.assertEqual(
+                    round(math.log2(size**length), 2),
+                    entropy.entropy_from_mask(mask, length),
+                    "Mismatch for mask {} and length {}".format(mask, length),
+                )
+
+    def test_password_without_any_class_has_no_entropy(self):
+        self.assertEqual(0.0, entropy.calc_entropy("½½½½"))
+
+    def test_validate(self):
+        self.assertTrue(entropy.validate(60.0))
+        self.assertFalse(entropy.validate(59.99))
+        self.assertTrue(entropy.validate(80.5, min_entropy=80))
@@ -0,0 +1,101 @@
+import datetime
+import json
+import uuid
+
+from core.api import ROUTE_PASSWORD_SCORING
+from core.json_provider import (
+    BACKEND_MSGSPEC,
+    BACKEND_ORJSON,
+    BACKEND_STDLIB,
+    FastJSONProvider,
+    msgspec,
+    orjson,
+)
+
+from . import BaseTestClass
+
+
+class TestJSONProvider(BaseTestClass):
+    def backends(self) -> list:
+        backends = [BACKEND_STDLIB]
+        if orjson is not None:
+            backends.append(BACKEND_ORJSON)
+        if msgspec is not None:
+            backends.append(BACKEND_MSGSPEC)
+        return backends
+
+    def test_compact_and_equivalent_output(self):
+        data = {
+            "status": True,
+            "score": 80.53,
+            "color": "green",
+            "message_password": "Le mot de passe est trop prévisible!",
+            "breached": None,
+            "patterns": [{"pattern": "dictionary", "start": 0, "end": 4}],
+            "big": 2**70,
+            "id": uuid.UUID(int=1),
+        }
+        expected = json.dumps(
+            data,
+            default=str,
+            ensure_ascii=False,
+            sort_keys=True,
+            separators=(",", ":"),
+        )
+        for backend in self.backends():
+            with self.subTest(backend=backend):
+                provider = FastJSONProvider(self.app, backend=backend)
+                self.assertEqual(expected, provider.dumps(data))
+                self.assertEqual(
+                    data | {"id": str(data["id"])},
+                    provider.loads(expected.encode("utf-8")),
+                )
+
+    def test_dates_are_http_dates(self):
+        date = datetime.datetime(
+            2024, 6, 1, 12, 30, tzinfo=datetime.timezone.utc
+        )
+        if orjson is None:
+            self.skipTest("orjson is not installed")
+        provider = FastJSONProvider(self.app, backend=BACKEND_ORJSON)
+        self.assertEqual(
+            '"Sat, 01 Jun 2024 12:30:00 GMT"', provider.dumps(date)
+        )
+
+    def test_invalid_json_is_rejected(self):
+        for backend in self.backends():
+            with self.subTest(backend=backend):
+                provider = FastJSONProvider(self.app, backend=backend)
+                with self.assertRaises(ValueError):
+                    provider.loads(b'{"password": ')
+
+        response = self.client.post(
+            ROUTE_PASSWORD_SCORING,
+            data='{"password": ',
+            content_type="application/json",
+        )
+        self.assertEqual(
+            400,
+            response.status_code,
+            "The response status code is unexpected !",
+        )
+
+    def test_compact_score_response(self):
+        with self.app.app_context():
+            response = self.client.post(
+                ROUTE_PASSWORD_SCORING,
+                json={
+                    "api_key": BaseTestClass.get_user().token,
+                    "password": "Tr0ub4dor&3-horse-battery",
+                    **self.characteristics,
+                },
+            )
+        self.assertEqual(
+            200,
+            response.status_code,
+            "The response status code is unexpected !",
+        )
+        self.assertEqual("application/json", response.mimetype)
+        self.assertNotIn(b"\n", response.data, "The response is not compact !")
+        self.assertNotIn(b": ", response.data, "The response is not compact !")
+        self.assertIn("score", response.json)
@@ -0,0 +1,145 @@
+import json
+import logging
+import os
+import queue
+import tempfile
+
+from core import create_app, logging_handlers
+from core.api import ROUTE_PASSWORD_SCORING
+from core.logging_handlers import DeferredQueueHandler, JsonFormatter
+
+from . import BaseTestClass
+
+
+class TestLogging(BaseTestClass):
+    def score(self, client, password: str = "Tr0ub4dor&3-horse-battery"):
+        with self.app.app_context():
+            payload = {
+                "api_key": BaseTestClass.get_user().token,
+                "password": password,
+                **self.characteristics,
+            }
+        response = client.post(
+            ROUTE_PASSWORD_SCORING,
+            json=payload,
+            headers={"Authorization": "Basic secret-credentials"},
+        )
+        self.assertEqual(
+            200,
+            response.status_code,
+            "The response status code is unexpected !",
+        )
+        return payload
+
+    @staticmethod
+    def create_app_without_listener(configuration: dict):
+        """Create an app of which the records stay in the queue."""
+        app = create_app(configuration)
+        logging_handlers.stop_listener()
+        return app
+
+    def queued_records(self, app) -> list:
+        """Drain the queue of the loggers."""
+        log_queue = app.logger.handlers[0].queue
+        records = []
+        while True:
+            try:
+                records.append(log_queue.get_nowait())
+            except queue.Empty:
+                return records
+
+    def test_json_records(self):
+        record = logging.LogRecord(
+            "core.api", logging.INFO, __file__, 1, "score %s", (42,), None
+        )
+        record.route = "score"
+        document = json.loads(JsonFormatter().format(record))
+        self.assertEqual("score 42", document["message"])
+        self.assertEqual("INFO", document["level"])
+        self.assertEqual("core.api", document["logger"])
+        self.assertEqual("score", document["route"])
+
+    def test_messages_are_formatted_by_the_listener(self):
+        handler = DeferredQueueHandler(queue.SimpleQueue())
+        record = logging.LogRecord(
+            "core", logging.INFO, __file__, 1, "score %s", (42.5,), None
+        )
+        self.assertEqual(("score %s", (42.5,)), self.prepare(handler, record))
+
+        record = logging.LogRecord(
+            "core", logging.INFO, __file__, 1, "user %s", (object(),), None
+        )
+        message, args = self.prepare(handler, record)
+        self.assertTrue(message.startswith("user <object"))
+        self.assertIsNone(args)
+
+    @staticmethod
+    def prepare(handler, record) -> tuple:
+        record = handler.prepare(record)
+        return record.msg, record.args
+
+    def test_no_secret_is_logged_at_info(self):
+        with self.assertLogs("core", level=logging.INFO) as logs:
+            payload = self.score(self.client)
+        output = "\n".join(logs.output)
+        for secret in (
+            payload["api_key"],
+            payload["password"],
+            "secret-credentials",
+            "Content-Type",
+        ):
+            self.assertNotIn(secret, output, "A secret is logged at INFO !")
+
+    def test_route_sampling(self):
+        configuration = BaseTestClass._setup_test_env()
+        # The API key of the user is signed with the secret key of self.app.
+        configuration["SECRET_KEY"] = self.app.config["SECRET_KEY"]
+        configuration["LOG_SAMPLING"] = "api_urls.score=0"
+        app = self.create_app_without_listener(configuration)
+        self.score(app.test_client())
+        app.logger.error("Always logged")
+        records = self.queued_records(app)
+        self.assertEqual(
+            ["Always logged"],
+            [record.getMessage() for record in records],
+            "The INFO records of the score route are not sampled out !",
+        )
+
+        configuration["LOG_SAMPLING"] = "api_urls.score=1"
+        app = self.create_app_without_listener(configuration)
+        self.score(app.test_client())
+        self.assertIn(
+            "Call score endpoint",
+            [record.getMessage() for record in self.queued_records(app)],
+            "The INFO records of the score route are missing !",
+        )
+
+    def test_forked_process_has_its_own_listener(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "child.log")
+            file_handler = logging.FileHandler(path)
+            self.addCleanup(file_handler.close)
+            queue_handler = logging_handlers.start_queue_logging(
+                self.app, [file_handler]
+            )
+            self.addCleanup(logging_handlers.stop_listener)
+            logger = logging.getLogger("core.tests.fork")
+            logger.addHandler(queue_handler)
+            self.addCleanup(logger.removeHandler, queue_handler)
+            logger.setLevel(logging.INFO)
+
+            pid = os.fork()
+            if pid == 0:
+                try:
+                    logger.info("Logged by the child")
+                    logging_handlers.stop_listener()
+                finally:
+                    os._exit(0)
+            os.waitpid(pid, 0)
+
+            with open(path, encoding="utf-8") as f:
+                self.assertIn(
+                    "Logged by the child",
+                    f.read(),
+                    "The records of a forked process are not handled !",
+                )
@@ -0,0 +1,113 @@
+from prometheus_client import REGISTRY
+
+from core.api import ROUTE_PASSWORD_SCORING
+from core.celery_tasks import multiple_password_scoring
+from core.metrics import ROUTE_METRICS, SCORE_STAGES
+
+from . import BaseTestClass
+
+
+def sample(name: str, labels: dict) -> float:
+    return REGISTRY.get_sample_value(name, labels) or 0.0
+
+
+class TestMetrics(BaseTestClass):
+    def test_score_request_metrics(self):
+        with self.app.app_context():
+            payload = {
+                "api_key": BaseTestClass.get_user().token,
+                "password": "Tr0ub4dor&3-horse-battery",
+                **self.characteristics,
+            }
+            requests_labels = {
+                "endpoint": "api_urls.score",
+                "method": "POST",
+                "status": "200",
+            }
+            requests_before = sample(
+                "http_request_duration_seconds_count", requests_labels
+            )
+            stages_before = {
+                stage: sample(
+                    "score_stage_duration_seconds_count", {"stage": stage}
+                )
+                for stage in SCORE_STAGES
+            }
+
+            response = self.client.post(ROUTE_PASSWORD_SCORING, json=payload)
+            self.assertEqual(
+                200,
+                response.status_code,
+                "The response status code is unexpected !",
+            )
+            color = response.json["color"]
+
+            self.assertEqual(
+                requests_before + 1,
+                sample("http_request_duration_seconds_count", requests_labels),
+                "The request latency is not observed !",
+            )
+            for stage in SCORE_STAGES:
+                # No score cache is configured for the tests.
+                expected = stages_before[stage] + (stage != "cache")
+                self.assertEqual(
+                    expected,
+                    sample(
+                        "score_stage_duration_seconds_count", {"stage": stage}
+                    ),
+                    "The stage {} is not observed !".format(stage),
+                )
+
+            response = self.client.get(ROUTE_METRICS)
+            self.assertEqual(
+                200,
+                response.status_code,
+                "The response status code is unexpected !",
+            )
+            self.assertIn(
+                'score_results_total{{color="{}"}}'.format(color),
+                response.text,
+                "The score colors are not exported !",
+            )
+            self.assertIn(
+                "http_request_duration_seconds_bucket",
+                response.text,
+                "The request latencies are not exported !",
+            )
+
+    def test_quota_rejection_metrics(self):
+        self.app.config["API_MAX_USAGE_LIMIT"] = "0"
+        with self.app.app_context():
+            rejections_before = sample("quota_rejections_total", {})
+            response = self.client.post(
+                ROUTE_PASSWORD_SCORING,
+                json={
+                    "api_key": BaseTestClass.get_user().token,
+                    "password": "Tr0ub4dor&3-horse-battery",
+                    **self.characteristics,
+                },
+            )
+            self.assertEqual(
+                401,
+                response.status_code,
+                "The response status code is unexpected !",
+            )
+            self.assertEqual(
+                rejections_before + 1,
+                sample("quota_rejections_total", {}),
+                "The quota rejection is not counted !",
+            )
+
+    def test_celery_task_metrics(self):
+        self.app.extensions["celery"].conf.task_always_eager = True
+        labels = {
+            "task": multiple_password_scoring.name,
+            "state": "SUCCESS",
+        }
+        tasks_before = sample("celery_task_duration_seconds_count", labels)
+        multiple_password_scoring.delay([b"Tr0ub4dor&3-horse-battery"])
+        self.assertEqual(
+            tasks_before + 1,
+            sample("celery_task_duration_seconds_count", labels),
+            "The task duration is not observed !",
+        )
@@ -0,0 +1,167 @@
+import json
+
+from core.api import (
+    ROUTE_BATCH_PASSWORD_SCORING,
+    ROUTE_PASSWORD_SCORING,
+    ROUTE_POLICIES,
+)
+from core.service.policy_registry import PolicyRegistry
+
+from . import BaseTestClass
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestNamedPolicies(BaseTestClass):
+    def api_key(self) -> str:
+        with self.app.app_context():
+            return BaseTestClass.get_user().token
+
+    def create_policy(self, name: str = "internal", **overrides):
+        return self.client.post(
+            ROUTE_POLICIES,
+            json={
+                "api_key": self.api_key(),
+                "name": name,
+                **self.characteristics,
+                **overrides,
+            },
+        )
+
+    def score(self, password: str, policy_id: str = "internal"):
+        return self.client.post(
+            ROUTE_PASSWORD_SCORING,
+            json={
+                "api_key": self.api_key(),
+                "password": password,
+                "policy_id": policy_id,
+            },
+        )
+
+    def test_crud(self):
+        response = self.create_policy()
+        self.assertEqual(
+            201,
+            response.status_code,
+            "The response status code is unexpected !",
+        )
+        self.assertEqual(
+            {"name": "internal", **self.characteristics}
+            | {"analyze_patterns": False, "reject_breached": False},
+            response.json,
+        )
+        self.assertEqual(409, self.create_policy().status_code)
+        self.assertEqual(
+            400, self.create_policy(name="Not-A-Name").status_code
+        )
+
+        route = "/".join([ROUTE_POLICIES, "internal"])
+        response = self.client.get(
+            ROUTE_POLICIES, query_string={"api_key": self.api_key()}
+        )
+        self.assertEqual(
+            ["internal"], [p["name"] for p in response.json["policies"]]
+        )
+
+        payload = json.loads(json.dumps(self.characteristics))
+        payload["characteristics"]["min_length"] = 30
+        response = self.client.put(
+            route, json={"api_key": self.api_key(), **payload}
+        )
+        self.assertEqual(
+            200,
+            response.status_code,
+            "The response status code is unexpected !",
+        )
+        self.assertEqual(30, response.json["characteristics"]["min_length"])
+
+        response = self.client.delete(
+            route, query_string={"api_key": self.api_key()}
+        )
+        self.assertEqual(
+            200,
+            response.status_code,
+            "The response status code is unexpected !",
+        )
+        response = self.client.get(
+            route, query_string={"api_key": self.api_key()}
+        )
+        self.assertEqual(404, response.status_code)
+        response = self.client.get(route)
+        self.assertEqual(401, response.status_code)
+
+    def test_score_with_a_named_policy(self):
+        self.create_policy()
+        password = "Tr0ub4dor&3-horse"
+        response = self.score(password)
+        self.assertEqual(
+            200,
+            response.status_code,
+            "The response status code is unexpected !",
+        )
+        expected = self.client.post(
+            ROUTE_PASSWORD_SCORING,
+            json={
+                "api_key": self.api_key(),
+                "password": password,
+                **self.characteristics,
+            },
+        ).json
+        self.assertEqual(expected, response.json)
+
+        response = self.client.post(
+            ROUTE_BATCH_PASSWORD_SCORING,
+            json={
+                "api_key": self.api_key(),
+                "passwords": [password],
+                "policy_id": "internal",
+            },
+        )
+        self.assertEqual([expected], response.json["results"])
+
+        # An update is seen by the next requests.
+        payload = json.loads(json.dumps(self.characteristics))
+        payload["characteristics"]["min_length"] = 30
+        self.client.put(
+            "/".join([ROUTE_POLICIES, "internal"]),
+            json={"api_key": self.api_key(), **payload},
+        )
+        self.assertFalse(self.score(password).json["status"])
+
+        response = self.score(password, policy_id="unknown")
+        self.assertEqual(400, response.status_code)
+        self.assertEqual(
+            ["policy_id: is not a policy of the API key"],
+            response.json["errors"],
+        )
+
+    def test_registry_ttl_and_eviction(self):
+        loads = []
+        clock = FakeClock()
+
+        def loader(api_key, name):
+            loads.append((api_key, name))
+            return name.upper()
+
+        registry = PolicyRegistry(loader, max_entries=2, ttl=10, clock=clock)
+        self.assertEqual("FIRST", registry.get("key", "first"))
+        self.assertEqual("FIRST", registry.get("key", "first"))
+        self.assertEqual(1, len(loads), "The policy is loaded twice !")
+
+        registry.get("other", "first")
+        registry.invalidate("first")
+        self.assertEqual(0, len(registry))
+        registry.get("key", "first")
+        clock.now = 11
+        registry.get("key", "first")
+        self.assertEqual(4, len(loads), "The stale policy is served !")
+
+        registry.get("key", "second")
+        registry.get("key", "third")
+        self.assertEqual(2, len(registry))
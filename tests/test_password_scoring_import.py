@@ -0,0 +1,44 @@
+import json
+import subprocess  # nosec B404
+import sys
+from unittest import TestCase
+
+# The web stack takes about 750 ms to import, the library about 20 ms.
+IMPORT_TIME_BUDGET = 0.25
+WEB_STACK_MODULES = ("core", "flask", "sqlalchemy", "celery", "werkzeug")
+
+IMPORT_SCRIPT = """
+import json, sys, time
+start = time.perf_counter()
+import password_scoring
+elapsed = time.perf_counter() - start
+print(json.dumps({"elapsed": elapsed, "modules": sorted(sys.modules)}))
+"""
+
+
+class TestPasswordScoringImport(TestCase):
+    def setUp(self):
+        # A fresh interpreter, the test runner has already imported the app.
+        output = subprocess.run(  # nosec B603
+            [sys.executable, "-c", IMPORT_SCRIPT],
+            capture_output=True,
+            check=True,
+            text=True,
+        ).stdout
+        self.report = json.loads(output)
+
+    def test_import_without_web_stack(self):
+        modules = set(self.report["modules"])
+        for module in WEB_STACK_MODULES:
+            self.assertNotIn(
+                module,
+                modules,
+                "The scoring library imports the web stack !",
+            )
+
+    def test_import_time(self):
+        self.assertLess(
+            self.report["elapsed"],
+            IMPORT_TIME_BUDGET,
+            "The scoring library is too slow to import !",
+        )
@@ -0,0 +1,70 @@
+from unittest import TestCase
+
+from password_scoring.entropy import calc_entropy
+from password_scoring.pattern_analyzer import (
+    MAX_ANALYZED_LENGTH,
+    PATTERN_DATE,
+    PATTERN_DICTIONARY,
+    PATTERN_KEYBOARD,
+    PATTERN_REPEAT,
+    PATTERN_SEQUENCE,
+    analyze_password,
+)
+
+
+class TestPatternAnalyzer(TestCase):
+    def assertPatterns(self, password: str, expected: list):
+        patterns = [
+            p["pattern"] for p in analyze_password(password)["patterns"]
+        ]
+        self.assertEqual(
+            expected,
+            patterns,
+            "Unexpected patterns for {!r}".format(password),
+        )
+
+    def test_dictionary_with_leetspeak(self):
+        self.assertPatterns("P@ssw0rd", [PATTERN_DICTIONARY])
+
+    def test_keyboard_walks(self):
+        self.assertPatterns("zxcvbnm,./", [PATTERN_KEYBOARD])
+        self.assertPatterns("wxcvbn,;:!", [PATTERN_KEYBOARD])
+
+    def test_repeats(self):
+        self.assertPatterns("xyzXYZxyzXYZ", [PATTERN_REPEAT])
+
+    def test_sequences(self):
+        self.assertPatterns("9876543", [PATTERN_SEQUENCE])
+
+    def test_dates(self):
+        self.assertPatterns("#31/12/1987#", [PATTERN_DATE])
+
+    def test_composed_password(self):
+        self.assertPatterns(
+            "Password1234!", [PATTERN_DICTIONARY, PATTERN_SEQUENCE]
+        )
+        self.assertLess(
+            analyze_password("Password1234!")["pattern_score"],
+            calc_entropy("Password1234!") / 4,
+        )
+
+    def test_random_password_keeps_its_entropy(self):
+        for password in ("xK9#mQ2$vL7@", "", "Tr0ub4dor&3"):
+            self.assertEqual(
+                calc_entropy(password),
+                analyze_password(password)["pattern_score"],
+            )
+
+    def test_long_password_is_analyzed_on_its_prefix(self):
+        password = "Password" + "x" * MAX_ANALYZED_LENGTH
+        self.assertEqual(
+            [
+                {"pattern": PATTERN_DICTIONARY, "start": 0, "end": 7},
+                {
+                    "pattern": PATTERN_REPEAT,
+                    "start": 8,
+                    "end": MAX_ANALYZED_LENGTH - 1,
+                },
+            ],
+            analyze_password(password)["patterns"],
+        )
@@ -0,0 +1,154 @@
+import json
+
+from core.api import ROUTE_PASSWORD_SCORING
+from core.service.payload_validator import (
+    PayloadValidationError,
+    decode_batch_scoring_payload,
+    decode_scoring_payload,
+)
+from password_scoring import ScoringPolicy, decode_policy_id, encode_policy_id
+
+from . import BaseTestClass
+
+
+class TestPayloadValidator(BaseTestClass):
+    def payload(self, **overrides) -> dict:
+        payload = {
+            "password": "Tr0ub4dor&3-horse-battery",
+            **self.characteristics,
+        }
+        payload["characteristics"] = dict(payload["characteristics"])
+        payload.update(overrides)
+        return payload
+
+    def assertErrors(self, errors: list, payload):
+        with self.assertRaises(PayloadValidationError) as context:
+            decode_scoring_payload(payload)
+        self.assertEqual(errors, context.exception.errors)
+
+    def test_decode_into_a_policy(self):
+        scoring_request = decode_scoring_payload(
+            self.payload(analyze_patterns=True)
+        )
+        self.assertEqual("Tr0ub4dor&3-horse-battery", scoring_request.password)
+        self.assertEqual(
+            ScoringPolicy(
+                min_characters=self.min_length,
+                max_characters=self.max_length,
+                has_uppercase=True,
+                has_lowercase=True,
+                has_digits=True,
+                has_symbols=True,
+                has_spaces=False,
+                min_score=self.min_accepted_score,
+                analyze_patterns=True,
+            ),
+            scoring_request.policy,
+        )
+        self.assertEqual(
+            hash(scoring_request.policy),
+            hash(
+                decode_scoring_payload(
+                    self.payload(analyze_patterns=True)
+                ).policy
+            ),
+            "The policies are not hashable !",
+        )
+
+    def test_optional_fields_may_be_null(self):
+        policy = decode_scoring_payload(
+            self.payload(analyze_patterns=None, reject_breached=None)
+        ).policy
+        self.assertFalse(policy.analyze_patterns)
+        self.assertFalse(policy.reject_breached)
+
+    def test_precise_errors(self):
+        self.assertErrors(["payload: must be a JSON object"], None)
+        self.assertErrors(
+            ["characteristics: is required", "password: is required"],
+            {"min_accepted_score": 62},
+        )
+        payload = self.payload(min_accepted_score="62", reject_breached=1)
+        payload["characteristics"]["min_length"] = 0
+        payload["characteristics"]["has_digits"] = "true"
+        del payload["characteristics"]["has_spaces"]
+        self.assertErrors(
+            [
+                "min_accepted_score: must be a positive number",
+                "reject_breached: must be a boolean",
+                "characteristics.min_length: must be a positive integer",
+                "characteristics.has_digits: must be a boolean",
+                "characteristics.has_spaces: is required",
+            ],
+            payload,
+        )
+        payload = self.payload()
+        payload["characteristics"]["min_length"] = 50
+        self.assertErrors(
+            [
+                "characteristics.min_length: must not exceed"
+                " characteristics.max_length"
+            ],
+            payload,
+        )
+
+    def test_errors_in_the_api_response(self):
+        with self.app.app_context():
+            payload = self.payload(password="")
+            payload["api_key"] = BaseTestClass.get_user().token
+            response = self.client.post(ROUTE_PASSWORD_SCORING, json=payload)
+        self.assertEqual(
+            400,
+            response.status_code,
+            "The response status code is unexpected !",
+        )
+        response_message = json.loads(response.text)
+        self.assertEqual(
+            "The input data is invalid!",
+            response_message["message"],
+            "The message is not expected !",
+        )
+        self.assertEqual(
+            ["password: must be a non empty string"],
+            response_message["errors"],
+            "The errors are not expected !",
+        )
+
+    def test_policy_id(self):
+        policy = decode_scoring_payload(
+            self.payload(reject_breached=True)
+        ).policy
+        policy_id = encode_policy_id(policy)
+        self.assertEqual("p1-10-40-4f-62", policy_id)
+        self.assertEqual(policy, decode_policy_id(policy_id))
+        self.assertEqual(
+            policy,
+            decode_scoring_payload(
+                {"password": "Tr0ub4dor&3", "policy_id": policy_id}
+            ).policy,
+        )
+        self.assertErrors(
+            ["password: is required", "policy_id: is not a valid policy id"],
+            {"policy_id": "p1-40-10-4f-62"},
+        )
+
+    def test_batch(self):
+        payload = self.payload(passwords=["Tr0ub4dor&3", "horse-battery"])
+        del payload["password"]
+        self.assertEqual(
+            ["Tr0ub4dor&3", "horse-battery"],
+            decode_batch_scoring_payload(payload, 2).passwords,
+        )
+        with self.assertRaises(PayloadValidationError) as context:
+            decode_batch_scoring_payload(payload, 1)
+        self.assertEqual(
+            ["passwords: must not contain more than 1 passwords"],
+            context.exception.errors,
+        )
+        payload["passwords"] = ["Tr0ub4dor&3", ""]
+        with self.assertRaises(PayloadValidationError) as context:
+            decode_batch_scoring_payload(payload, 2)
+        self.assertEqual(
+            ["passwords.1: must be a non empty string"],
+            context.exception.errors,
+        )
@@ -0,0 +1,97 @@
+import os
+import pstats
+import shutil
+import tempfile
+
+from core.api import ROUTE_PASSWORD_SCORING, ROUTE_WELCOME
+from core.profiling import FORMAT_COLLAPSED, FORMAT_TEXT
+
+from . import BaseTestClass
+
+
+class TestProfiling(BaseTestClass):
+    def setUp(self):
+        super().setUp()
+        self.directory = tempfile.mkdtemp()
+        self.profiler = self.app.extensions["profiler"]
+        self.profiler.directory = self.directory
+        self.profiler.allowed_keys = {"profile-key"}
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+        super().tearDown()
+
+    def score(self, headers: dict = None):
+        with self.app.app_context():
+            response = self.client.post(
+                ROUTE_PASSWORD_SCORING,
+                json={
+                    "api_key": BaseTestClass.get_user().token,
+                    "password": "Tr0ub4dor&3-horse-battery",
+                    **self.characteristics,
+                },
+                headers=headers,
+            )
+        self.assertEqual(
+            200,
+            response.status_code,
+            "The response status code is unexpected !",
+        )
+
+    def profiles(self) -> list:
+        return sorted(os.listdir(self.directory))
+
+    def test_profiling_is_off_by_default(self):
+        self.score()
+        self.score(headers={"X-Profile-Key": "not-allowed"})
+        self.assertEqual([], self.profiles(), "No profile is expected !")
+
+    def test_profile_requested_by_header(self):
+        self.score(headers={"X-Profile-Key": "profile-key"})
+        profiles = self.profiles()
+        self.assertEqual(1, len(profiles), "A profile is expected !")
+        self.assertIn("api_urls.score", profiles[0])
+        stats = pstats.Stats(os.path.join(self.directory, profiles[0]))
+        self.assertTrue(
+            any(
+                function == "validate_password"
+                for _, _, function in stats.stats
+            ),
+            "The scoring is not profiled !",
+        )
+
+    def test_sampled_profiles_of_the_profiled_endpoints_only(self):
+        self.profiler.sample_rate = 1.0
+        self.profiler.output_format = FORMAT_TEXT
+        self.client.get(ROUTE_WELCOME)
+        self.assertEqual([], self.profiles(), "No profile is expected !")
+        self.score()
+        profiles = self.profiles()
+        self.assertEqual(1, len(profiles), "A profile is expected !")
+        with open(os.path.join(self.directory, profiles[0])) as f:
+            self.assertIn("cumulative", f.read())
+
+    def test_collapsed_stacks(self):
+        self.profiler.sample_rate = 1.0
+        self.profiler.output_format = FORMAT_COLLAPSED
+        self.profiler.interval = 0.0001
+        self.score()
+        with open(os.path.join(self.directory, self.profiles()[0])) as f:
+            lines = f.read().splitlines()
+        for line in lines:
+            stack, count = line.rsplit(" ", 1)
+            self.assertGreater(int(count), 0)
+            self.assertIn(":", stack)
+
+    def test_profiles_ring_is_bounded(self):
+        self.profiler.sample_rate = 1.0
+        self.profiler.max_files = 3
+        for _ in range(6):
+            self.score()
+        self.assertEqual(3, len(self.profiles()), "The ring is not bounded !")
+
+        self.profiler.max_bytes = 1
+        self.score()
+        self.assertEqual(
+            0, len(self.profiles()), "The ring size is not bounded !"
+        )
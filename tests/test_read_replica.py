@@ -0,0 +1,73 @@
+import os
+
+from sqlalchemy import insert, select, update
+
+from core import create_app, db
+from core.models import User
+
+from . import BaseTestClass
+
+
+class TestReadReplica(BaseTestClass):
+    def setUp(self):
+        super().setUp()
+        configuration = BaseTestClass._setup_test_env()
+        configuration["SECRET_KEY"] = self.app.config["SECRET_KEY"]
+        configuration["DB_REPLICA_URI"] = "sqlite:///" + os.path.join(
+            self.app.instance_path, "api-password-scoring-testing-replica.db"
+        )
+        self.app = create_app(configuration)
+        with self.app.app_context():
+            self.replica = self.app.extensions["db_replica"]
+            db.metadata.create_all(self.replica)
+            self.user = BaseTestClass.get_user()
+            self.token = self.user.token
+
+    def tearDown(self):
+        db.metadata.drop_all(self.replica)
+        self.replica.dispose()
+        super().tearDown()
+
+    def replicate(self, email: str):
+        """Copy the users to the replica, under another email."""
+        app_user = User.__table__
+        with db.engine.connect() as primary:
+            rows = primary.execute(select(app_user)).mappings().all()
+        with self.replica.begin() as replica:
+            replica.execute(insert(app_user), [dict(row) for row in rows])
+            replica.execute(update(app_user).values(email=email))
+
+    def test_lookups_are_read_from_the_replica(self):
+        self.app.config["DB_REPLICA_MAX_LAG"] = "-1"
+        with self.app.app_context():
+            self.replicate("replica@example.com")
+
+            user = User.get_by_api_token(self.token, replica=True)
+            self.assertEqual("replica@example.com", user.email)
+            db.session.remove()
+            user = User.get_by_api_token(self.token)
+            self.assertEqual(self.user.email, user.email)
+            db.session.remove()
+            user = User.get_by_email("replica@example.com", replica=True)
+            self.assertEqual(self.token, user.token)
+
+    def test_recent_keys_are_read_from_the_primary(self):
+        self.app.config["DB_REPLICA_MAX_LAG"] = "60"
+        with self.app.app_context():
+            self.replicate("replica@example.com")
+
+            user = User.get_by_api_token(self.token, replica=True)
+            self.assertEqual(self.user.email, user.email)
+
+    def test_users_missing_from_the_replica_are_read_from_the_primary(self):
+        self.app.config["DB_REPLICA_MAX_LAG"] = "-1"
+        with self.app.app_context():
+            user = User.get_by_api_token(self.token, replica=True)
+            self.assertEqual(self.user.email, user.email)
+            self.assertTrue(
+                self.app.extensions["api_key_verifier"].verify(self.token),
+                "A key missing from the replica is revoked !",
+            )
+            db.session.remove()
+            user = User.get_by_email(self.user.email, replica=True)
+            self.assertEqual(self.token, user.token)
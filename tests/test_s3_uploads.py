@@ -0,0 +1,163 @@
+import hashlib
+import os
+import tempfile
+
+import requests
+from moto.server import ThreadedMotoServer
+
+from core.api import ROUTE_S3_UPLOAD_COMPLETION, ROUTE_S3_UPLOADS
+from core.service.breach_index import build_breach_index
+
+from . import BaseTestClass
+
+
+class TestS3Uploads(BaseTestClass):
+    @classmethod
+    def setUpClass(cls):
+        cls.s3_server = ThreadedMotoServer(ip_address="127.0.0.1", port=0)
+        cls.s3_server.start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.s3_server.stop()
+
+    def setUp(self):
+        super().setUp()
+        host, port = self.s3_server.get_host_and_port()
+        self.app.config["S3_MINIO_HOST"] = host
+        self.app.config["S3_MINIO_API_PORT"] = str(port)
+        self.app.config["S3_UPLOAD_MAX_SIZE"] = "64"
+        self.app.extensions["celery"].conf.task_always_eager = True
+        self.app.extensions["celery"].conf.task_store_eager_result = True
+        with self.app.app_context():
+            self.api_key = BaseTestClass.get_user().token
+
+    def create_upload(self):
+        response = self.client.post(
+            ROUTE_S3_UPLOADS, json={"api_key": self.api_key}
+        )
+        self.assertEqual(
+            201,
+            response.status_code,
+            "The response status code is unexpected !",
+        )
+        return response.get_json()
+
+    def upload(self, upload: dict, data: bytes):
+        return requests.post(
+            upload["url"],
+            data=upload["fields"],
+            files={"file": ("passwords.txt", data)},
+            timeout=10,
+        )
+
+    def complete(self, upload_id: str, **payload):
+        return self.client.post(
+            ROUTE_S3_UPLOAD_COMPLETION.replace("<upload_id>", upload_id),
+            json={"api_key": self.api_key, **self.characteristics, **payload},
+        )
+
+    def test_upload_is_scored_after_its_completion(self):
+        upload = self.create_upload()
+
+        self.assertEqual(64, upload["max_size"])
+        self.assertTrue(
+            upload["fields"]["key"].endswith(upload["upload_id"]),
+            "The form does not upload to the object of the upload !",
+        )
+        self.assertLess(
+            self.upload(upload, b"xK9#mQ2$vL7@pW\npassword\n\n").status_code,
+            300,
+        )
+        response = self.complete(upload["upload_id"])
+
+        self.assertEqual(
+            202,
+            response.status_code,
+            "The response status code is unexpected !",
+        )
+        task = self.app.extensions["celery"].AsyncResult(
+            response.get_json()["task_id"]
+        )
+        self.assertEqual(2, task.get(timeout=10)["passwords"])
+
+    def test_breached_passwords_of_the_upload_are_rejected(self):
+        password = "xK9#mQ2$vL7@pW"
+        with tempfile.TemporaryDirectory() as directory:
+            source = os.path.join(directory, "hashes.txt")
+            with open(source, "w", encoding="utf-8") as f:
+                f.write(
+                    hashlib.sha1(password.encode("utf-8"))  # nosec B324
+                    .hexdigest()
+                    .upper()
+                )
+            self.app.config["BREACH_INDEX_PATH"] = os.path.join(
+                directory, "breach.idx"
+            )
+            build_breach_index(source, self.app.config["BREACH_INDEX_PATH"])
+            upload = self.create_upload()
+            self.upload(upload, password.encode("utf-8"))
+            response = self.complete(upload["upload_id"], reject_breached=True)
+
+            task = self.app.extensions["celery"].AsyncResult(
+                response.get_json()["task_id"]
+            )
+            self.assertEqual(
+                {"black": 1},
+                task.get(timeout=10)["colors"],
+                "The breached password is not rejected !",
+            )
+
+    def test_lines_of_the_upload_use_the_api_key(self):
+        self.app.config["API_MAX_USAGE_LIMIT"] = "4"
+        upload = self.create_upload()
+        self.upload(upload, b"xK9#mQ2$vL7@pW\npassword\n\n")
+
+        summaries = []
+        for _ in range(2):
+            response = self.complete(upload["upload_id"])
+            task = self.app.extensions["celery"].AsyncResult(
+                response.get_json()["task_id"]
+            )
+            summaries.append(task.get(timeout=10))
+
+        self.assertFalse(summaries[0]["usage_limit_reached"])
+        self.assertTrue(
+            summaries[1]["usage_limit_reached"],
+            "A completed upload is scored again beyond the API key limit !",
+        )
+        self.assertEqual(0, summaries[1]["passwords"])
+        with self.app.app_context():
+            # The upload creation and the lines of the file.
+            self.assertEqual(
+                5,
+                BaseTestClass.get_user().get_number_of_uses_for_token(),
+                "The lines do not use the API key once each !",
+            )
+
+    def test_completion_checks_the_upload(self):
+        upload = self.create_upload()
+
+        self.assertEqual(404, self.complete(upload["upload_id"]).status_code)
+        self.assertEqual(404, self.complete("not-an-upload-id").status_code)
+
+        # The form refuses the larger files; its limit is checked again.
+        self.upload(upload, b"x" * (upload["max_size"] + 1))
+        self.assertEqual(413, self.complete(upload["upload_id"]).status_code)
+
+    def test_upload_of_another_api_key_is_not_found(self):
+        upload = self.create_upload()
+        self.upload(upload, b"xK9#mQ2$vL7@pW\n")
+        with self.app.app_context():
+            self.api_key = BaseTestClass.create_user(
+                "other.user@example.com", self.app.config["SECRET_KEY"]
+            ).token
+
+        self.assertEqual(404, self.complete(upload["upload_id"]).status_code)
+
+    def test_rejected_requests(self):
+        response = self.client.post(ROUTE_S3_UPLOADS, json={"api_key": "x"})
+        self.assertEqual(401, response.status_code)
+        response = self.complete("0" * 32, policy_id="p1-invalid")
+        self.assertEqual(400, response.status_code)
+        self.assertEqual(401, self.complete("0" * 32, api_key="").status_code)
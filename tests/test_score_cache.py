@@ -0,0 +1,111 @@
+import json
+
+from core.api import ROUTE_PASSWORD_SCORING
+from core.service.score_cache import (
+    ScoreCache,
+    make_policy_id,
+    score_cache_init_app,
+)
+
+from . import BaseTestClass
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class FakeRedis:
+    def __init__(self):
+        self.values = {}
+
+    def get(self, key):
+        return self.values.get(key)
+
+    def set(self, key, value, ex=None):
+        self.values[key] = value
+
+
+class TestScoreCache(BaseTestClass):
+    def setUp(self):
+        super().setUp()
+        self.clock = FakeClock()
+        self.policy_id = make_policy_id({"min_score": 62})
+        self.result = {"status": True, "score": 80.5}
+
+    def test_lru_eviction_and_ttl(self):
+        cache = ScoreCache("secret", max_entries=2, ttl=10, clock=self.clock)
+        cache.set(self.policy_id, "first", self.result)
+        cache.set(self.policy_id, "second", self.result)
+        self.assertEqual(self.result, cache.get(self.policy_id, "first"))
+        cache.set(self.policy_id, "third", self.result)
+        self.assertIsNone(cache.get(self.policy_id, "second"))
+        self.assertEqual(self.result, cache.get(self.policy_id, "third"))
+
+        self.clock.now = 11
+        self.assertIsNone(cache.get(self.policy_id, "first"))
+        self.assertEqual(
+            {
+                "hits": 2,
+                "redis_hits": 0,
+                "misses": 2,
+                "evictions": 1,
+                "size": 1,
+            },
+            cache.stats(),
+        )
+
+    def test_policy_is_part_of_the_key(self):
+        cache = ScoreCache("secret", clock=self.clock)
+        cache.set(self.policy_id, "password", self.result)
+        self.assertIsNone(
+            cache.get(make_policy_id({"min_score": 80}), "password")
+        )
+
+    def test_redis_tier_never_stores_the_password(self):
+        redis = FakeRedis()
+        ScoreCache("secret", redis_client=redis).set(
+            self.policy_id, "my-secret-password", self.result
+        )
+        self.assertNotIn("my-secret-password", json.dumps(redis.values))
+
+        cache = ScoreCache("secret", redis_client=redis)
+        self.assertEqual(
+            self.result, cache.get(self.policy_id, "my-secret-password")
+        )
+        self.assertEqual(1, cache.stats()["redis_hits"])
+        self.assertIsNone(
+            ScoreCache("other-secret", redis_client=redis).get(
+                self.policy_id, "my-secret-password"
+            )
+        )
+
+    def test_repeated_scoring_is_served_from_cache(self):
+        self.app.config["SCORE_CACHE_ENABLED"] = "true"
+        score_cache = score_cache_init_app(self.app)
+        with self.app.app_context():
+            payload = {}
+            payload["api_key"] = BaseTestClass.get_user().token
+            payload["password"] = "xK9#mQ2$vL7@pW"
+            payload["characteristics"] = self.characteristics[
+                "characteristics"
+            ]
+            payload["min_accepted_score"] = self.characteristics[
+                "min_accepted_score"
+            ]
+
+            responses = [
+                self.client.post(ROUTE_PASSWORD_SCORING, json=payload)
+                for _ in range(3)
+            ]
+            self.assertEqual(
+                [200] * 3, [response.status_code for response in responses]
+            )
+            self.assertEqual(
+                1, len({response.get_data() for response in responses})
+            )
+            self.assertEqual(2, score_cache.stats()["hits"])
+            self.assertEqual(1, score_cache.stats()["misses"])
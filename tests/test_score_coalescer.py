@@ -0,0 +1,162 @@
+import threading
+import time
+
+from core.api import ROUTE_PASSWORD_SCORING
+from core.service.score_coalescer import (
+    ScoreCoalescer,
+    score_coalescer_init_app,
+)
+
+from . import BaseTestClass
+
+
+class FakePasswordConfig:
+    def __init__(self, delay=0.0):
+        self.delay = delay
+        self.batches = []
+        self.entered = threading.Event()
+        self.release = None
+
+    def validate_password(self, password):
+        self.entered.set()
+        if self.release is not None:
+            self.release.wait()
+        return {"password": password, "batched": False}
+
+    def validate_passwords(self, passwords):
+        time.sleep(self.delay)
+        self.batches.append(list(passwords))
+        return [
+            {"password": password, "batched": True} for password in passwords
+        ]
+
+
+class TestScoreCoalescer(BaseTestClass):
+    def hold_request(self, coalescer):
+        """Keep a request in flight, the next ones are then batched."""
+        password_config = FakePasswordConfig()
+        password_config.release = threading.Event()
+        thread = threading.Thread(
+            target=coalescer.validate_password,
+            args=(password_config, "held"),
+        )
+        thread.start()
+        password_config.entered.wait()
+
+        def release():
+            password_config.release.set()
+            thread.join()
+
+        self.addCleanup(release)
+
+    def score_concurrently(self, coalescer, password_config, count):
+        results = [None] * count
+        barrier = threading.Barrier(count)
+
+        def score(index):
+            barrier.wait()
+            results[index] = coalescer.validate_password(
+                password_config, "password-{}".format(index)
+            )
+
+        threads = [
+            threading.Thread(target=score, args=(index,))
+            for index in range(count)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return results
+
+    def test_concurrent_requests_are_batched(self):
+        coalescer = ScoreCoalescer(window=0.5, max_batch_size=8, max_delay=1)
+        password_config = FakePasswordConfig()
+        self.hold_request(coalescer)
+
+        results = self.score_concurrently(coalescer, password_config, 8)
+
+        self.assertEqual(
+            ["password-{}".format(index) for index in range(8)],
+            [result["password"] for result in results],
+            "The results are not given back to their requests !",
+        )
+        self.assertEqual(
+            [8], [len(batch) for batch in password_config.batches]
+        )
+        self.assertEqual(
+            {"batches": 1, "coalesced": 7, "timeouts": 0}, coalescer.stats()
+        )
+
+    def test_lone_request_is_not_delayed(self):
+        coalescer = ScoreCoalescer(window=1, max_batch_size=8, max_delay=1)
+
+        start = time.perf_counter()
+        result = coalescer.validate_password(FakePasswordConfig(), "password")
+
+        self.assertLess(
+            time.perf_counter() - start,
+            0.5,
+            "A lone request waits for the window !",
+        )
+        self.assertFalse(result["batched"])
+        self.assertEqual(
+            {"batches": 0, "coalesced": 0, "timeouts": 0}, coalescer.stats()
+        )
+
+    def test_batches_are_per_policy(self):
+        coalescer = ScoreCoalescer(window=0, max_batch_size=8, max_delay=1)
+        self.hold_request(coalescer)
+        password_configs = [FakePasswordConfig(), FakePasswordConfig()]
+
+        results = [
+            coalescer.validate_password(password_config, "password")
+            for password_config in password_configs
+        ]
+
+        self.assertTrue(all(result["batched"] for result in results))
+        self.assertEqual(
+            [[["password"]], [["password"]]],
+            [password_config.batches for password_config in password_configs],
+        )
+
+    def test_scored_batch_is_not_scored_twice(self):
+        coalescer = ScoreCoalescer(
+            window=0.001, max_batch_size=2, max_delay=0.05
+        )
+        password_config = FakePasswordConfig(delay=0.5)
+        self.hold_request(coalescer)
+
+        results = self.score_concurrently(coalescer, password_config, 4)
+
+        # Past the ceiling, a request of a batch being scored waits for it.
+        self.assertTrue(all(result["batched"] for result in results))
+        self.assertEqual(
+            ["password-{}".format(index) for index in range(4)],
+            sorted(
+                password
+                for batch in password_config.batches
+                for password in batch
+            ),
+            "A password is scored twice !",
+        )
+        self.assertEqual(0, coalescer.stats()["timeouts"])
+
+    def test_scoring_endpoint_with_coalescing(self):
+        self.app.config["SCORE_COALESCING_ENABLED"] = "true"
+        score_coalescer = score_coalescer_init_app(self.app)
+        with self.app.app_context():
+            payload = {
+                "api_key": BaseTestClass.get_user().token,
+                "password": "xK9#mQ2$vL7@pW",
+                **self.characteristics,
+            }
+            response = self.client.post(ROUTE_PASSWORD_SCORING, json=payload)
+
+        self.assertEqual(
+            200,
+            response.status_code,
+            "The response status code is unexpected !",
+        )
+        self.assertTrue(response.get_json()["status"])
+        self.assertEqual(0, score_coalescer.stats()["batches"])
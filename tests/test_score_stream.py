@@ -0,0 +1,152 @@
+import io
+import json
+
+from core.api import (
+    ROUTE_POLICIES,
+    ROUTE_POLICY_ID,
+    ROUTE_STREAM_PASSWORD_SCORING,
+)
+from core.service.score_stream import iter_lines, iter_password_batches
+
+from . import BaseTestClass
+
+
+class TestScoreStream(BaseTestClass):
+    def setUp(self):
+        super().setUp()
+        with self.app.app_context():
+            self.api_key = BaseTestClass.get_user().token
+        self.policy_id = self.client.post(
+            ROUTE_POLICY_ID, json=self.characteristics
+        ).get_json()["policy_id"]
+
+    def stream(self, body, content_type="text/plain", **args):
+        return self.client.post(
+            ROUTE_STREAM_PASSWORD_SCORING,
+            query_string={
+                "api_key": self.api_key,
+                "policy_id": self.policy_id,
+                **args,
+            },
+            data=body,
+            content_type=content_type,
+        )
+
+    def test_one_result_line_per_password(self):
+        passwords = ["xK9#mQ2$vL7@pW", "password", "Tr0ub4dor&3!x"]
+        self.app.config["SCORE_STREAM_BATCH_SIZE"] = "2"
+        response = self.stream("\n".join(passwords) + "\n\n")
+
+        self.assertEqual(
+            200,
+            response.status_code,
+            "The response status code is unexpected !",
+        )
+        self.assertEqual("application/x-ndjson", response.mimetype)
+        lines = [json.loads(line) for line in response.data.splitlines()]
+        self.assertEqual(3, len(lines), "A password has no result line !")
+        self.assertTrue(lines[0]["status"])
+        self.assertFalse(lines[1]["status"])
+        with self.app.app_context():
+            self.assertEqual(
+                3,
+                BaseTestClass.get_user().get_number_of_uses_for_token(),
+                "The passwords do not use the API key once each !",
+            )
+
+    def test_invalid_lines_do_not_stop_the_stream(self):
+        body = "\n".join(
+            [
+                json.dumps({"password": "xK9#mQ2$vL7@pW"}),
+                "not json",
+                json.dumps({"password": ""}),
+                json.dumps({"password": "Tr0ub4dor&3!x"}),
+            ]
+        )
+        response = self.stream(body, "application/x-ndjson")
+
+        lines = [json.loads(line) for line in response.data.splitlines()]
+        self.assertEqual(
+            [
+                None,
+                ["line: must be a JSON object"],
+                ["password: must be a non empty string"],
+                None,
+            ],
+            [line.get("errors") for line in lines],
+        )
+
+    def test_usage_limit_stops_the_stream(self):
+        self.app.config["API_MAX_USAGE_LIMIT"] = "3"
+        self.app.config["SCORE_STREAM_BATCH_SIZE"] = "2"
+        response = self.stream("\n".join(["xK9#mQ2$vL7@pW"] * 6))
+
+        lines = [json.loads(line) for line in response.data.splitlines()]
+        self.assertEqual(3, len(lines))
+        self.assertEqual("The API key limit is reached!", lines[-1]["message"])
+
+        self.app.config["API_MAX_USAGE_LIMIT"] = "1"
+        response = self.stream("xK9#mQ2$vL7@pW\n")
+        self.assertEqual(
+            401,
+            response.status_code,
+            "The response status code is unexpected !",
+        )
+
+    def test_rejected_requests(self):
+        self.assertEqual(401, self.stream("password", api_key="").status_code)
+        self.assertEqual(
+            401, self.stream("password", api_key="pk1.1.0.0.00").status_code
+        )
+        response = self.stream("password", policy_id="p1-invalid")
+        self.assertEqual(400, response.status_code)
+        self.assertEqual(
+            ["policy_id: is not a valid policy id"],
+            response.get_json()["errors"],
+        )
+        self.assertEqual(
+            415, self.stream("password", "application/json").status_code
+        )
+        with self.app.app_context():
+            self.assertEqual(
+                0, BaseTestClass.get_user().get_number_of_uses_for_token()
+            )
+
+    def test_body_is_not_limited_by_max_content_length(self):
+        self.app.config["MAX_CONTENT_LENGTH"] = 64
+        response = self.stream("xK9#mQ2$vL7@pW\n" * 20)
+
+        self.assertEqual(200, response.status_code)
+        self.assertEqual(20, len(response.data.splitlines()))
+
+        self.app.config["SCORE_STREAM_MAX_CONTENT_LENGTH"] = "64"
+        response = self.stream("xK9#mQ2$vL7@pW\n" * 20)
+        self.assertEqual(413, response.status_code)
+
+    def test_lines_are_read_in_bounded_chunks(self):
+        stream = io.BytesIO(b"abc\r\n" + b"x" * 50 + b"\nde\n\nfg")
+
+        self.assertEqual(
+            [b"abc", None, b"de", b"", b"fg"],
+            list(iter_lines(stream, max_line_length=8, read_size=4)),
+        )
+        batches = list(
+            iter_password_batches(
+                io.BytesIO(b"a\nb\nc\n"), ndjson=False, batch_size=2
+            )
+        )
+        self.assertEqual([["a", "b"], ["c"]], batches)
+
+    def test_named_policy_of_the_api_key(self):
+        self.client.post(
+            ROUTE_POLICIES,
+            json={
+                "api_key": self.api_key,
+                "name": "internal",
+                **self.characteristics,
+            },
+        )
+        response = self.stream("xK9#mQ2$vL7@pW", policy_id="internal")
+
+        self.assertEqual(200, response.status_code)
+        self.assertTrue(json.loads(response.data)["status"])
@@ -1,8 +1,12 @@
+import hashlib
 import json
+import os
 import random
+import tempfile
 
 from core.api import ROUTE_PASSWORD_SCORING, ROUTE_WELCOME
-from core.service.password_scoring import ColorScore
+from core.service.breach_index import build_breach_index
+from password_scoring import ColorScore
 
 from . import BaseTestClass
 
@@ -656,3 +660,100 @@ class TestScoringPassword(BaseTestClass):
         self.assertEqual(
             "lime", resulting_color, "A score of 106 should give a lime color!"
         )
+
+    def test_predictable_password_rejected_with_pattern_analysis(self):
+        with self.app.app_context():
+            user_token = BaseTestClass.get_user().token
+
+            payload = {}
+            payload["api_key"] = user_token
+            payload["password"] = "Password1234!"
+            payload["characteristics"] = self.characteristics[
+                "characteristics"
+            ]
+            payload["min_accepted_score"] = self.characteristics[
+                "min_accepted_score"
+            ]
+            payload["analyze_patterns"] = True
+
+            response = self.client.post(
+                ROUTE_PASSWORD_SCORING,
+                json=payload,
+            )
+            response_message = json.loads(response.text)
+            self.assertEqual(
+                200,
+                response.status_code,
+                "The response status code is unexpected !",
+            )
+            self.assertFalse(
+                response_message["status"], "The status should be False !"
+            )
+            self.assertEqual(
+                "The password is too predictable!",
+                response_message["message_score"],
+                "The message is not expected !",
+            )
+            self.assertLess(
+                response_message["pattern_score"],
+                self.min_accepted_score,
+                "The pattern score {} is not inferior to the minimal score {}"
+                .format(
+                    response_message["pattern_score"], self.min_accepted_score
+                ),
+            )
+            self.assertEqual("black", response_message["color"])
+
+    def test_breached_password_rejected(self):
+        with self.app.app_context():
+            user_token = BaseTestClass.get_user().token
+            password = "Breached-Password-2024!"
+
+            with tempfile.TemporaryDirectory() as directory:
+                source = os.path.join(directory, "hashes.txt")
+                with open(source, "w", encoding="utf-8") as f:
+                    f.write(
+                        hashlib.sha1(password.encode("utf-8"))  # nosec B324
+                        .hexdigest()
+                        .upper()
+                    )
+                self.app.config["BREACH_INDEX_PATH"] = os.path.join(
+                    directory, "breach.idx"
+                )
+                build_breach_index(
+                    source, self.app.config["BREACH_INDEX_PATH"]
+                )
+
+                payload = {}
+                payload["api_key"] = user_token
+                payload["password"] = password
+                payload["characteristics"] = self.characteristics[
+                    "characteristics"
+                ]
+                payload["min_accepted_score"] = self.characteristics[
+                    "min_accepted_score"
+                ]
+                payload["reject_breached"] = True
+
+                response = self.client.post(
+                    ROUTE_PASSWORD_SCORING,
+                    json=payload,
+                )
+                response_message = json.loads(response.text)
+                self.assertEqual(
+                    200,
+                    response.status_code,
+                    "The response status code is unexpected !",
+                )
+                self.assertTrue(
+                    response_message["breached"],
+                    "The password should be breached !",
+                )
+                self.assertFalse(
+                    response_message["status"], "The status should be False !"
+                )
+                self.assertEqual(
+                    "The password appears in a known data breach!",
+                    response_message["message_score"],
+                    "The message is not expected !",
+                )
@@ -0,0 +1,71 @@
+from core import db
+from core.api import ROUTE_PASSWORD_SCORING, ROUTE_RESET_SESSION_TOKEN
+from core.cli import usage_counters_cli
+from core.models import TokenUsage, User
+
+from . import BaseTestClass
+
+
+class TestTokenUsage(BaseTestClass):
+    def score(self, api_key: str):
+        payload = {
+            "api_key": api_key,
+            "password": "xK9#mQ2$vL7@pW",
+            **self.characteristics,
+        }
+        return self.client.post(ROUTE_PASSWORD_SCORING, json=payload)
+
+    def test_uses_are_summed_over_the_slots(self):
+        with self.app.app_context():
+            user = BaseTestClass.get_user()
+            for _ in range(50):
+                TokenUsage.increment(user.id, 2, slots=4)
+
+            self.assertEqual(100, TokenUsage.get_uses(user.id))
+            self.assertLessEqual(
+                TokenUsage.query.filter_by(user_id=user.id).count(), 4
+            )
+
+    def test_scoring_does_not_update_the_user_row(self):
+        self.app.config["API_MAX_USAGE_LIMIT"] = "3"
+        self.app.config["USAGE_COUNTER_SLOTS"] = "2"
+        with self.app.app_context():
+            api_key = BaseTestClass.get_user().token
+            responses = [self.score(api_key) for _ in range(4)]
+
+            self.assertEqual(
+                [200, 200, 200, 401],
+                [response.status_code for response in responses],
+                "The usage limit of the API key is not enforced !",
+            )
+            user = User.get_by_api_token(api_key)
+            self.assertEqual(0, user.number_of_uses_for_token)
+            self.assertEqual(4, user.get_number_of_uses_for_token())
+
+    def test_renewal_resets_the_counters(self):
+        with self.app.app_context():
+            user = BaseTestClass.get_user()
+            TokenUsage.increment(user.id, 5, slots=2)
+            response = self.client.post(
+                ROUTE_RESET_SESSION_TOKEN, json={"api_key": user.token}
+            )
+
+            self.assertTrue(response.get_json()["status"])
+            self.assertEqual(0, TokenUsage.get_uses(user.id))
+
+    def test_migration_keeps_the_counts(self):
+        with self.app.app_context():
+            user = BaseTestClass.get_user()
+            user.number_of_uses_for_token = 7
+            db.session.commit()
+            TokenUsage.increment(user.id, 1)
+
+            runner = self.app.test_cli_runner()
+            result = runner.invoke(usage_counters_cli, ["migrate"])
+            self.assertIn("The uses of 1 users are moved.", result.output)
+            result = runner.invoke(usage_counters_cli, ["migrate"])
+            self.assertIn("The uses of 0 users are moved.", result.output)
+
+            user = BaseTestClass.get_user()
+            self.assertEqual(0, user.number_of_uses_for_token)
+            self.assertEqual(8, user.get_number_of_uses_for_token())
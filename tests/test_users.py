@@ -0,0 +1,96 @@
+from unittest import mock
+
+from sqlalchemy import event
+
+from core import db, models
+from core.models import NamedPolicy, TokenUsage, User
+from password_scoring import decode_policy_id
+
+from . import BaseTestClass
+
+
+class TestUserCreation(BaseTestClass):
+    def setUp(self):
+        super().setUp()
+        self.statements = []
+
+    def record_statements(self):
+        event.listen(
+            db.engine,
+            "before_cursor_execute",
+            lambda *args: self.statements.append(args[2]),
+        )
+
+    def test_create_user_with_token(self):
+        with self.app.app_context():
+            self.record_statements()
+            user = User.create_with_token(
+                "new.user@example.com", self.app.config["SECRET_KEY"]
+            )
+
+            self.assertIsNotNone(user)
+            self.assertTrue(user.token.startswith("pk1.{}.0.".format(user.id)))
+            self.assertEqual(
+                2,
+                len(self.statements),
+                "The user is not created in one INSERT and its token UPDATE !",
+            )
+            self.assertIn("ON CONFLICT", self.statements[0])
+            self.assertEqual(
+                user.token, User.get_by_email("new.user@example.com").token
+            )
+
+    def test_create_existing_user(self):
+        with self.app.app_context():
+            email = BaseTestClass.get_user().email
+            self.record_statements()
+            user = User.create_with_token(email, self.app.config["SECRET_KEY"])
+
+            self.assertIsNone(user)
+            self.assertEqual(
+                1,
+                len(self.statements),
+                "The existing user is not detected in one statement !",
+            )
+            self.assertEqual(1, len(User.get_all()))
+
+    def test_create_user_without_upsert_insert(self):
+        with self.app.app_context(), mock.patch.dict(
+            models._UPSERT_INSERTS, clear=True
+        ):
+            user = User.create_with_token(
+                "new.user@example.com", self.app.config["SECRET_KEY"]
+            )
+            self.assertTrue(user.token.startswith("pk1.{}.0.".format(user.id)))
+
+            self.assertIsNone(
+                User.create_with_token(
+                    "new.user@example.com", self.app.config["SECRET_KEY"]
+                )
+            )
+            # The failed insert is rolled back, the session is usable.
+            self.assertEqual(2, len(User.get_all()))
+
+    def test_delete_user_with_its_named_policies(self):
+        with self.app.app_context():
+            user = User.create_with_token(
+                "new.user@example.com", self.app.config["SECRET_KEY"]
+            )
+            user = User.get_by_id(user.id)
+            NamedPolicy(
+                user.id, "internal", decode_policy_id("p1-10-40-0f-62")
+            ).save()
+            user.increment_number_of_use_for_token()
+            db.session.commit()
+            # The foreign keys of SQLite are enforced per connection.
+            db.session.execute(db.text("PRAGMA foreign_keys = ON"))
+
+            user.delete()
+
+            self.assertIsNone(User.get_by_email("new.user@example.com"))
+            self.assertEqual(
+                [],
+                NamedPolicy.get_all_by_user(user.id),
+                "The named policies of the user are left !",
+            )
+            self.assertEqual(0, TokenUsage.get_uses(user.id))
@@ -0,0 +1,147 @@
+import msgpack
+
+from core.api import (
+    ROUTE_BATCH_PASSWORD_SCORING,
+    ROUTE_PASSWORD_SCORING,
+    ROUTE_POLICY_ID,
+)
+from core.models import User
+from core.wire_format import MIMETYPE_MSGPACK
+
+from . import BaseTestClass
+
+
+class TestWireFormat(BaseTestClass):
+    def post_msgpack(self, route: str, payload: dict):
+        return self.client.post(
+            route,
+            data=msgpack.packb(payload),
+            content_type=MIMETYPE_MSGPACK,
+        )
+
+    def api_key(self) -> str:
+        with self.app.app_context():
+            return BaseTestClass.get_user().token
+
+    def test_msgpack_score(self):
+        response = self.post_msgpack(
+            ROUTE_PASSWORD_SCORING,
+            {
+                "api_key": self.api_key(),
+                "password": "Tr0ub4dor&3-horse-battery",
+                **self.characteristics,
+            },
+        )
+        self.assertEqual(
+            200,
+            response.status_code,
+            "The response status code is unexpected !",
+        )
+        self.assertEqual(MIMETYPE_MSGPACK, response.mimetype)
+        json_response = self.client.post(
+            ROUTE_PASSWORD_SCORING,
+            json={
+                "api_key": self.api_key(),
+                "password": "Tr0ub4dor&3-horse-battery",
+                **self.characteristics,
+            },
+        )
+        self.assertEqual(json_response.json, msgpack.unpackb(response.data))
+
+    def test_msgpack_errors(self):
+        response = self.client.post(
+            ROUTE_PASSWORD_SCORING,
+            data=b"\xc1",
+            content_type=MIMETYPE_MSGPACK,
+        )
+        self.assertEqual(
+            400,
+            response.status_code,
+            "The response status code is unexpected !",
+        )
+        response = self.post_msgpack(
+            ROUTE_PASSWORD_SCORING,
+            {"api_key": self.api_key(), "policy_id": "p1-40-10-0f-62"},
+        )
+        self.assertEqual(
+            400,
+            response.status_code,
+            "The response status code is unexpected !",
+        )
+        self.assertEqual(
+            ["password: is required", "policy_id: is not a valid policy id"],
+            msgpack.unpackb(response.data)["errors"],
+        )
+
+    def test_json_accepting_msgpack(self):
+        response = self.client.post(
+            ROUTE_POLICY_ID,
+            json=self.characteristics,
+            headers={"Accept": MIMETYPE_MSGPACK},
+        )
+        self.assertEqual(MIMETYPE_MSGPACK, response.mimetype)
+        response = self.client.post(ROUTE_POLICY_ID, json=self.characteristics)
+        self.assertEqual("application/json", response.mimetype)
+        self.assertEqual("p1-10-40-0f-62", response.json["policy_id"])
+
+    def test_batch_with_a_policy_id(self):
+        policy_id = self.client.post(
+            ROUTE_POLICY_ID, json=self.characteristics
+        ).json["policy_id"]
+        passwords = ["Tr0ub4dor&3-horse-battery", "password", "Tr0ub4dor&3"]
+        response = self.post_msgpack(
+            ROUTE_BATCH_PASSWORD_SCORING,
+            {
+                "api_key": self.api_key(),
+                "policy_id": policy_id,
+                "passwords": passwords,
+            },
+        )
+        self.assertEqual(
+            200,
+            response.status_code,
+            "The response status code is unexpected !",
+        )
+        results = msgpack.unpackb(response.data)["results"]
+        self.assertEqual(len(passwords), len(results))
+        for password, result in zip(passwords, results):
+            single = self.client.post(
+                ROUTE_PASSWORD_SCORING,
+                json={
+                    "api_key": self.api_key(),
+                    "password": password,
+                    **self.characteristics,
+                },
+            ).json
+            self.assertEqual(single, result)
+        with self.app.app_context():
+            self.assertEqual(
+                len(passwords) * 2,
+                User.get_by_api_token(
+                    self.api_key()
+                ).get_number_of_uses_for_token(),
+                "A batch does not use the API key once per password !",
+            )
+
+    def test_rejected_batch_uses_the_api_key_once(self):
+        self.app.config["SCORE_BATCH_MAX_SIZE"] = "5"
+        passwords = ["Tr0ub4dor&3-horse-battery"] * 4
+        for payload in (
+            {"passwords": passwords * 4, **self.characteristics},
+            {"passwords": passwords, "policy_id": "p1-invalid"},
+        ):
+            response = self.client.post(
+                ROUTE_BATCH_PASSWORD_SCORING,
+                json={"api_key": self.api_key(), **payload},
+            )
+            self.assertEqual(
+                400,
+                response.status_code,
+                "The response status code is unexpected !",
+            )
+        with self.app.app_context():
+            self.assertEqual(
+                2,
+                BaseTestClass.get_user().get_number_of_uses_for_token(),
+                "A rejected batch does not use the API key once !",
+            )